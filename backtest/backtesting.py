@@ -1,36 +1,61 @@
-def backtest_strategy(data, initial_balance=100000, stop_loss=0.05, take_profit=0.10, position_size=0.1):
+import pandas as pd
+
+from backtest.engine import run_backtest_arrays
+from backtest.results import BacktestResult
+from utils.bar_cache import to_epoch_ns
+
+
+def backtest_strategy(data, initial_balance=100000, stop_loss=0.05, take_profit=0.10, position_size=0.1,
+                      fill='close', intrabar=False, slippage=0.0, slippage_model='bps', commission=0.0,
+                      commission_model='fixed'):
     """
     Backtest the RSI trading strategy with stop-loss, take-profit, and position sizing.
 
     Parameters:
-    - data: DataFrame containing 'close' prices and 'Signal'.
+    - data: DataFrame containing 'close' prices and 'Signal' ('open', 'high', 'low' and 'spread'
+      as needed by the execution model).
     - initial_balance: Initial account balance.
     - stop_loss: Stop-loss threshold as a percentage (default is 5%).
     - take_profit: Take-profit threshold as a percentage (default is 10%).
     - position_size: Fraction of balance to use for each trade (default is 10%).
+    - fill: str, 'close' fills at the signal bar's close, 'next_open' at the next bar's open
+      like the market orders placed by the live loop.
+    - intrabar: bool, trigger stops and take-profits against the bars' high and low instead of the close.
+    - slippage, slippage_model, commission, commission_model: cost models, see
+      backtest.engine.run_backtest_arrays ('fixed', 'bps' or 'spread' slippage and
+      'fixed', 'per_share' or 'bps' commission).
 
     Returns:
-    - final_balance: Balance after executing the strategy.
+    - BacktestResult with the equity curve, trade ledger and performance metrics
+      (result.final_balance is the balance after executing the strategy).
     """
-    balance = initial_balance
-    position = 0  # Tracks the number of shares held
-    buy_price = 0  # Tracks the purchase price of the position
-
-    for i in range(len(data)):
-        # Buy signal
-        if data['Signal'].iloc[i] == 1 and position == 0:
-            trade_value = balance * position_size
-            position = trade_value // data['close'].iloc[i]
-            buy_price = data['close'].iloc[i]
-            balance -= position * buy_price
-
-        # Sell signal or stop-loss/take-profit conditions
-        elif (data['Signal'].iloc[i] == -1 or 
-              (position > 0 and data['close'].iloc[i] <= buy_price * (1 - stop_loss)) or
-              (position > 0 and data['close'].iloc[i] >= buy_price * (1 + take_profit))):
-            balance += position * data['close'].iloc[i]
-            position = 0  # Reset position
-
-    # Final balance includes value of remaining shares
-    final_balance = balance + (position * data['close'].iloc[-1])
-    return final_balance
+    # Pull the columns out once and run the whole simulation on NumPy arrays
+    close = data['close'].to_numpy()
+    columns = {}
+    if fill == 'next_open' or intrabar:
+        columns['open'] = data['open'].to_numpy()
+    if intrabar:
+        columns['high'] = data['high'].to_numpy()
+        columns['low'] = data['low'].to_numpy()
+    if slippage_model == 'spread':
+        columns['spread'] = data['spread'].to_numpy()
+    run = run_backtest_arrays(
+        close,
+        data['Signal'].to_numpy(),
+        initial_balance=initial_balance,
+        stop_loss=stop_loss,
+        take_profit=take_profit,
+        position_size=position_size,
+        fill=fill,
+        slippage=slippage,
+        slippage_model=slippage_model,
+        commission=commission,
+        commission_model=commission_model,
+        **columns,
+    )
+    timestamps = to_epoch_ns(data.index) if isinstance(data.index, pd.DatetimeIndex) else None
+    params = {'stop_loss': stop_loss, 'take_profit': take_profit, 'position_size': position_size}
+    if fill != 'close' or intrabar or slippage or commission:
+        params.update({'fill': fill, 'intrabar': intrabar, 'slippage': slippage, 'slippage_model': slippage_model,
+                       'commission': commission, 'commission_model': commission_model})
+    return BacktestResult.from_run(close, run, initial_balance, timestamps, params)
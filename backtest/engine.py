@@ -0,0 +1,217 @@
+from collections import namedtuple
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional, the pure-Python pass is used instead
+    njit = None
+
+BacktestRun = namedtuple('BacktestRun', ['final_balance', 'equity', 'position', 'trades', 'fill_price', 'fees'],
+                         defaults=(None, None))
+
+FILLS = ('close', 'next_open')
+SLIPPAGE_MODELS = ('fixed', 'bps', 'spread')
+COMMISSION_MODELS = ('fixed', 'per_share', 'bps')
+
+
+def _simulate(close, signal, open_, high, low, spread, initial_balance, stop_loss, take_profit, position_size,
+              next_open, intrabar, slip_fixed, slip_bps, slip_spread, fee_fixed, fee_per_share, fee_bps,
+              equity, position, trades, fill_price, fees):
+    """
+    Single pass over the bars with the same stop-loss/take-profit/position-sizing
+    rules as backtest_strategy. Writes into the preallocated output buffers and
+    returns the cash balance left after the last bar.
+
+    At most one trade happens per bar: an order left by the previous bar's signal
+    filling at the open (next_open), else an intrabar stop or take-profit on a
+    position held from an earlier bar (intrabar), else the bar's own signal or a
+    close-based stop filling at the close. Fills move against the order by the
+    slippage (fixed per share, bps of the price and a fraction of the bar's spread),
+    and the commission (per order, per share and bps of the notional) is paid in cash.
+
+    Works on NumPy arrays (compiled by numba) and on plain lists (pure Python),
+    indexing plain lists is several times faster than indexing NumPy arrays.
+    """
+    balance = initial_balance
+    shares = 0.0
+    buy_price = 0.0
+    lower = 1.0 - stop_loss
+    upper = 1.0 + take_profit
+    pending = 0
+
+    for i in range(len(close)):
+        price = close[i]
+        sig = signal[i]
+        side = 0
+        base = price
+
+        # Order placed after the previous close, filled at this bar's open
+        if next_open:
+            if pending == 1 and shares == 0:
+                side = 1
+                base = open_[i]
+            elif pending == -1 and shares > 0:
+                side = -1
+                base = open_[i]
+            pending = 0
+
+        # Stop-loss/take-profit touched by the bar's range, filled at the level or at a worse opening gap
+        if side == 0 and intrabar and shares > 0:
+            if low[i] <= buy_price * lower:
+                side = -1
+                base = min(open_[i], buy_price * lower)
+            elif high[i] >= buy_price * upper:
+                side = -1
+                base = max(open_[i], buy_price * upper)
+
+        if side == 0 and not next_open:
+            # Buy signal
+            if sig == 1 and shares == 0:
+                side = 1
+            # Sell signal or stop-loss/take-profit conditions
+            elif shares > 0 and (sig == -1 or
+                                 (not intrabar and (price <= buy_price * lower or price >= buy_price * upper))):
+                side = -1
+
+        if side == 1:
+            fill = base + slip_fixed + base * slip_bps + slip_spread * spread[i]
+            qty = (balance * position_size - fee_fixed) // (fill * (1.0 + fee_bps) + fee_per_share)
+            if qty > 0:
+                fee = fee_fixed + fee_per_share * qty + fee_bps * qty * fill
+                balance -= qty * fill + fee
+                shares = qty
+                buy_price = fill
+                trades[i] = 1
+                fill_price[i] = fill
+                fees[i] = fee
+        elif side == -1:
+            fill = max(base - slip_fixed - base * slip_bps - slip_spread * spread[i], 0.0)
+            fee = fee_fixed + fee_per_share * shares + fee_bps * shares * fill
+            balance += shares * fill - fee
+            shares = 0.0
+            trades[i] = -1
+            fill_price[i] = fill
+            fees[i] = fee
+
+        # The close decides the order for the next open
+        if next_open:
+            if sig == 1 and shares == 0:
+                pending = 1
+            elif shares > 0 and (sig == -1 or
+                                 (not intrabar and (price <= buy_price * lower or price >= buy_price * upper))):
+                pending = -1
+
+        equity[i] = balance + shares * price
+        position[i] = shares
+
+    return balance
+
+
+_simulate_compiled = njit(cache=True, nogil=True)(_simulate) if njit is not None else None
+
+
+def _execution_costs(slippage, slippage_model, commission, commission_model):
+    # The pass adds up every model's term, the unused ones are zero
+    if slippage_model not in SLIPPAGE_MODELS:
+        raise ValueError(f"slippage_model must be one of {SLIPPAGE_MODELS}")
+    if commission_model not in COMMISSION_MODELS:
+        raise ValueError(f"commission_model must be one of {COMMISSION_MODELS}")
+    slip = [float(slippage) if slippage_model == model else 0.0 for model in SLIPPAGE_MODELS]
+    slip[1] /= 1e4
+    fee = [float(commission) if commission_model == model else 0.0 for model in COMMISSION_MODELS]
+    fee[2] /= 1e4
+    return slip + fee
+
+
+def run_backtest_arrays(close, signal, initial_balance=100000, stop_loss=0.05, take_profit=0.10,
+                        position_size=0.1, open=None, high=None, low=None, spread=None, fill='close',
+                        slippage=0.0, slippage_model='bps', commission=0.0, commission_model='fixed'):
+    """
+    Array-based engine behind backtest_strategy.
+
+    By default every trade fills at the bar's close and stops are checked against the
+    close, with no costs. The execution model is configurable without a second pass:
+    fill='next_open' fills each signal at the next bar's open like a market order sent
+    after the close, high/low trigger stops and take-profits inside the bar, and
+    slippage and commission models are applied to every fill.
+
+    Parameters:
+    - close: 1-D array-like of closing prices.
+    - signal: 1-D array-like of signals (1 = buy, -1 = sell, 0 = no action), same length as close.
+    - initial_balance: Initial account balance.
+    - stop_loss: Stop-loss threshold as a percentage (default is 5%).
+    - take_profit: Take-profit threshold as a percentage (default is 10%).
+    - position_size: Fraction of balance to use for each trade (default is 10%).
+    - open: optional 1-D array-like of opening prices, required for fill='next_open'. With intrabar
+      stops and no open, the previous close stands in for the open.
+    - high, low: optional 1-D array-likes of bar highs and lows. Given both, stops and take-profits
+      trigger when the bar's range reaches them (from the bar after the entry on), the stop first
+      when both are reached.
+    - spread: optional 1-D array-like of per-bar bid/ask spreads in price units, for slippage_model='spread'.
+    - fill: str, 'close' (fill at the signal bar's close) or 'next_open' (at the following bar's open).
+    - slippage: float, adverse price move per fill: price units per share ('fixed'), basis points of
+      the price ('bps') or the fraction of the bar's spread paid ('spread', e.g. 0.5 for half the spread).
+    - slippage_model: str, 'fixed', 'bps' or 'spread'.
+    - commission: float, cost per order ('fixed'), per share ('per_share') or basis points of the
+      traded notional ('bps').
+    - commission_model: str, 'fixed', 'per_share' or 'bps'.
+
+    Returns:
+    - BacktestRun(final_balance, equity, position, trades, fill_price, fees) where equity, position and
+      trades are per-bar float64/float64/int8 arrays (trades: 1 = buy, -1 = sell, 0 = none), fill_price
+      holds the execution price (NaN without a trade) and fees the commission paid on each bar.
+    """
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    signal = np.ascontiguousarray(signal, dtype=np.int8)
+    if close.shape != signal.shape or close.ndim != 1:
+        raise ValueError("close and signal must be 1-D arrays of the same length.")
+
+    n = len(close)
+    if n == 0:
+        raise ValueError("Cannot backtest an empty series.")
+    if fill not in FILLS:
+        raise ValueError(f"fill must be one of {FILLS}")
+    if fill == 'next_open' and open is None:
+        raise ValueError("fill='next_open' needs the opening prices.")
+    if slippage_model == 'spread' and slippage and spread is None:
+        raise ValueError("slippage_model='spread' needs the per-bar spreads.")
+
+    intrabar = high is not None and low is not None
+    if open is None:
+        open = np.concatenate((close[:1], close[:-1]))
+    # Unused inputs are passed as the close so the compiled pass always sees the same types
+    inputs = [close if values is None else np.ascontiguousarray(values, dtype=np.float64)
+              for values in (open, high if intrabar else None, low if intrabar else None, spread)]
+    for values in inputs:
+        if values.shape != close.shape:
+            raise ValueError("open, high, low and spread must have the same length as close.")
+    if spread is None:
+        inputs[3] = np.zeros(n)
+
+    args = (float(initial_balance), float(stop_loss), float(take_profit), float(position_size),
+            fill == 'next_open', intrabar, *_execution_costs(slippage, slippage_model, commission, commission_model))
+
+    if _simulate_compiled is not None:
+        equity = np.empty(n, dtype=np.float64)
+        position = np.empty(n, dtype=np.float64)
+        trades = np.zeros(n, dtype=np.int8)
+        fill_price = np.full(n, np.nan)
+        fees = np.zeros(n, dtype=np.float64)
+        _simulate_compiled(close, signal, *inputs, *args, equity, position, trades, fill_price, fees)
+    else:
+        equity = [0.0] * n
+        position = [0.0] * n
+        trades = [0] * n
+        fill_price = [np.nan] * n
+        fees = [0.0] * n
+        _simulate(close.tolist(), signal.tolist(), *(values.tolist() for values in inputs), *args,
+                  equity, position, trades, fill_price, fees)
+        equity = np.array(equity, dtype=np.float64)
+        position = np.array(position, dtype=np.float64)
+        trades = np.array(trades, dtype=np.int8)
+        fill_price = np.array(fill_price, dtype=np.float64)
+        fees = np.array(fees, dtype=np.float64)
+
+    # Final balance includes value of remaining shares
+    return BacktestRun(float(equity[-1]), equity, position, trades, fill_price, fees)
@@ -0,0 +1,270 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from backtest.results import equity_metrics, periods_per_year
+from utils.bar_cache import to_epoch_ns
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional, the per-bar NumPy pass is used instead
+    njit = None
+
+PortfolioRun = namedtuple('PortfolioRun', ['final_balance', 'equity', 'cash', 'positions', 'trades'])
+
+TRADE_FIELDS = ('bar', 'symbol', 'side', 'shares', 'price')
+
+
+def _simulate_portfolio(close, signal, initial_balance, stop_loss, take_profit, position_size,
+                        equity, cash, shares, buy_price, last_price, last_exit,
+                        trade_bar, trade_symbol, trade_side, trade_shares, trade_price):
+    """
+    Single pass over time with the backtest_strategy rules applied per symbol and one
+    shared cash balance. Within a bar all exits run first, then buys in symbol order,
+    each sized from the cash left at that point. Scalar loops, compiled by numba.
+
+    Returns:
+    - (cash balance after the last bar, number of trades recorded)
+    """
+    balance = initial_balance
+    lower = 1.0 - stop_loss
+    upper = 1.0 + take_profit
+    n_bars, n_symbols = close.shape
+    count = 0
+
+    for t in range(n_bars):
+        # Sell signal or stop-loss/take-profit conditions
+        for i in range(n_symbols):
+            price = close[t, i]
+            if price != price:  # NaN, the symbol has no bar here
+                continue
+            last_price[i] = price
+            if shares[i] > 0 and (signal[t, i] == -1 or price <= buy_price[i] * lower or
+                                  price >= buy_price[i] * upper):
+                balance += shares[i] * price
+                trade_bar[count] = t
+                trade_symbol[count] = i
+                trade_side[count] = -1
+                trade_shares[count] = shares[i]
+                trade_price[count] = price
+                count += 1
+                shares[i] = 0.0
+                last_exit[i] = t
+
+        # Buy signals, one action per symbol and bar
+        for i in range(n_symbols):
+            price = close[t, i]
+            if signal[t, i] != 1 or shares[i] != 0 or last_exit[i] == t or price != price:
+                continue
+            qty = (balance * position_size) // price
+            if qty > 0:
+                balance -= qty * price
+                shares[i] = qty
+                buy_price[i] = price
+                trade_bar[count] = t
+                trade_symbol[count] = i
+                trade_side[count] = 1
+                trade_shares[count] = qty
+                trade_price[count] = price
+                count += 1
+
+        value = balance
+        for i in range(n_symbols):
+            value += shares[i] * last_price[i]
+        equity[t] = value
+        cash[t] = balance
+
+    return balance, count
+
+
+_simulate_portfolio_compiled = njit(cache=True, nogil=True)(_simulate_portfolio) if njit is not None else None
+
+
+def _simulate_portfolio_numpy(close, signal, initial_balance, stop_loss, take_profit, position_size,
+                              equity, cash, shares, buy_price, last_price, last_exit,
+                              trade_bar, trade_symbol, trade_side, trade_shares, trade_price):
+    """
+    Same rules as _simulate_portfolio, vectorized across symbols for every bar. Only the
+    (sparse) exits and buys of a bar are walked in Python, in symbol order, so cash is
+    updated in exactly the same sequence as the compiled pass.
+    """
+    balance = initial_balance
+    lower = 1.0 - stop_loss
+    upper = 1.0 + take_profit
+    count = 0
+
+    for t in range(close.shape[0]):
+        row = close[t]
+        sig = signal[t]
+        valid = ~np.isnan(row)
+        last_price[valid] = row[valid]
+
+        held = shares > 0
+        if held.any():
+            exits = held & valid & ((sig == -1) | (row <= buy_price * lower) | (row >= buy_price * upper))
+            for i in np.flatnonzero(exits).tolist():
+                price = float(row[i])
+                balance += shares[i] * price
+                trade_bar[count], trade_symbol[count], trade_side[count] = t, i, -1
+                trade_shares[count], trade_price[count] = shares[i], price
+                count += 1
+                shares[i] = 0.0
+
+        for i in np.flatnonzero((sig == 1) & ~held & valid).tolist():
+            price = float(row[i])
+            qty = (balance * position_size) // price
+            if qty > 0:
+                balance -= qty * price
+                shares[i] = qty
+                buy_price[i] = price
+                trade_bar[count], trade_symbol[count], trade_side[count] = t, i, 1
+                trade_shares[count], trade_price[count] = qty, price
+                count += 1
+
+        equity[t] = balance + shares @ last_price
+        cash[t] = balance
+
+    return balance, count
+
+
+def run_portfolio_arrays(close, signal, initial_balance=100000, stop_loss=0.05, take_profit=0.10,
+                         position_size=0.1):
+    """
+    Backtest a panel of symbols sharing one cash balance.
+
+    Parameters:
+    - close: 2-D array-like (bars x symbols) of closing prices, NaN where a symbol has no bar.
+      A read-only np.memmap works, the panel is only read one bar at a time.
+    - signal: 2-D array-like of signals (1 = buy, -1 = sell, 0 = no action), same shape as close.
+    - initial_balance: Initial account balance shared by all symbols.
+    - stop_loss: Stop-loss threshold per position (default is 5%).
+    - take_profit: Take-profit threshold per position (default is 10%).
+    - position_size: Fraction of the available cash to use for each buy (default is 10%).
+
+    Returns:
+    - PortfolioRun(final_balance, equity, cash, positions, trades): per-bar equity and cash,
+      the shares held per symbol after the last bar, and the trades as a dict of TRADE_FIELDS
+      arrays in execution order. Memory is O(bars + symbols + trades), nothing per cell.
+    """
+    close = np.asarray(close)
+    signal = np.asarray(signal)
+    if close.ndim != 2 or close.shape != signal.shape:
+        raise ValueError("close and signal must be 2-D arrays (bars x symbols) of the same shape.")
+    if close.shape[0] == 0:
+        raise ValueError("Cannot backtest an empty panel.")
+    if close.dtype != np.float64 or not close.flags.c_contiguous:
+        close = np.ascontiguousarray(close, dtype=np.float64)
+    if signal.dtype != np.int8 or not signal.flags.c_contiguous:
+        signal = np.ascontiguousarray(signal, dtype=np.int8)
+
+    n_bars, n_symbols = close.shape
+    # Every sell closes an earlier buy, so there are at most two trades per buy signal
+    capacity = 2 * int(np.count_nonzero(signal == 1))
+    equity = np.empty(n_bars)
+    cash = np.empty(n_bars)
+    shares = np.zeros(n_symbols)
+    buy_price = np.zeros(n_symbols)
+    last_price = np.zeros(n_symbols)
+    last_exit = np.full(n_symbols, -1, dtype=np.int64)
+    trades = {
+        'bar': np.empty(capacity, dtype=np.int64),
+        'symbol': np.empty(capacity, dtype=np.int32),
+        'side': np.empty(capacity, dtype=np.int8),
+        'shares': np.empty(capacity),
+        'price': np.empty(capacity),
+    }
+
+    simulate = _simulate_portfolio_compiled or _simulate_portfolio_numpy
+    _, count = simulate(close, signal, float(initial_balance), float(stop_loss), float(take_profit),
+                        float(position_size), equity, cash, shares, buy_price, last_price, last_exit,
+                        *(trades[field] for field in TRADE_FIELDS))
+
+    trades = {field: values[:count] for field, values in trades.items()}
+    return PortfolioRun(float(equity[-1]), equity, cash, shares, trades)
+
+
+def round_trips(trades):
+    """
+    Pair each symbol's buys with the sell that closed them.
+
+    Returns:
+    - dict with symbol, entry_bar, exit_bar, shares, entry_price, exit_price and pnl arrays
+      (positions still open at the end are left out).
+    """
+    order = np.lexsort((trades['bar'], trades['symbol']))
+    symbol = trades['symbol'][order]
+    side = trades['side'][order]
+    # Per symbol the trades alternate buy, sell, so every sell closes the trade just before it
+    closes = np.flatnonzero(side[1:] == -1) + 1
+    closes = closes[symbol[closes] == symbol[closes - 1]]
+    entries = closes - 1
+    entry_price = trades['price'][order][entries]
+    exit_price = trades['price'][order][closes]
+    shares = trades['shares'][order][entries]
+    return {
+        'symbol': symbol[closes],
+        'entry_bar': trades['bar'][order][entries],
+        'exit_bar': trades['bar'][order][closes],
+        'shares': shares,
+        'entry_price': entry_price,
+        'exit_price': exit_price,
+        'pnl': shares * (exit_price - entry_price),
+    }
+
+
+def portfolio_metrics(run, initial_balance=100000, periods=None, timestamps=None):
+    """
+    Performance summary of a PortfolioRun.
+
+    Returns:
+    - dict with the equity metrics (see backtest.results.equity_metrics) plus trades,
+      win_rate over closed round trips and the mean fraction of equity invested.
+    """
+    if periods is None:
+        periods = periods_per_year(timestamps)
+    metrics = equity_metrics(run.equity, initial_balance, periods)
+    pnl = round_trips(run.trades)['pnl']
+    metrics['trades'] = int(len(run.trades['bar']))
+    metrics['win_rate'] = float(np.mean(pnl > 0)) if len(pnl) else 0.0
+    metrics['exposure'] = float(np.mean(1.0 - run.cash / run.equity))
+    return metrics
+
+
+def align_panel(data):
+    """
+    Align per-symbol DataFrames (with 'close' and 'Signal' columns) on a shared time index.
+
+    Parameters:
+    - data: dict of symbol -> DataFrame.
+
+    Returns:
+    - (symbols, index, close, signal): close is NaN and signal 0 where a symbol has no bar.
+    """
+    symbols = list(data)
+    close = pd.concat({symbol: data[symbol]['close'] for symbol in symbols}, axis=1).sort_index()
+    signal = pd.concat({symbol: data[symbol]['Signal'] for symbol in symbols}, axis=1).reindex(close.index)
+    return (symbols, close.index, close.to_numpy(dtype=np.float64),
+            signal.fillna(0).to_numpy(dtype=np.int8))
+
+
+def backtest_portfolio(data, initial_balance=100000, stop_loss=0.05, take_profit=0.10, position_size=0.1):
+    """
+    Backtest the RSI strategy over several symbols sharing one cash balance.
+
+    Parameters:
+    - data: dict of symbol -> DataFrame containing 'close' prices and 'Signal'.
+    - initial_balance, stop_loss, take_profit, position_size: as in backtest_strategy.
+
+    Returns:
+    - (PortfolioRun, metrics dict, trades DataFrame with symbol names and bar times)
+    """
+    symbols, index, close, signal = align_panel(data)
+    run = run_portfolio_arrays(close, signal, initial_balance, stop_loss, take_profit, position_size)
+    timestamps = to_epoch_ns(index) if isinstance(index, pd.DatetimeIndex) else None
+    metrics = portfolio_metrics(run, initial_balance, timestamps=timestamps)
+
+    trades = pd.DataFrame(run.trades)
+    trades.insert(0, 'time', index[trades['bar']])
+    trades['symbol'] = np.asarray(symbols, dtype=object)[trades['symbol']]
+    return run, metrics, trades
@@ -0,0 +1,286 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+SECONDS_PER_SESSION = 6.5 * 3600
+
+LEDGER_COLUMNS = ('entry_index', 'exit_index', 'entry_price', 'exit_price', 'qty', 'pnl', 'return_pct',
+                  'bars_held', 'open')
+
+
+def periods_per_year(timestamps):
+    """
+    Infer how many bars make up a trading year from epoch-nanosecond timestamps.
+
+    Daily (or slower) bars count one per trading day, intraday bars count the bars in a 6.5 hour session.
+    """
+    if timestamps is None or len(timestamps) < 2:
+        return TRADING_DAYS
+    spacing = float(np.median(np.diff(timestamps))) / 1e9
+    if spacing <= 0:
+        return TRADING_DAYS
+    if spacing >= 20 * 3600:
+        # Daily bars skip weekends and holidays, weekly and slower bars follow the calendar
+        return TRADING_DAYS if spacing < 4 * 86400 else 365.25 * 86400 / spacing
+    return TRADING_DAYS * SECONDS_PER_SESSION / spacing
+
+
+def max_drawdown(equity):
+    """
+    Largest peak-to-trough decline of an equity curve, as a fraction of the peak.
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    peak = np.maximum.accumulate(equity)
+    return float(np.max(1.0 - equity / peak))
+
+
+def bar_returns(equity, initial_balance):
+    """
+    Per-bar simple returns of an equity curve, the first bar measured against initial_balance.
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    previous = np.empty_like(equity)
+    previous[0] = initial_balance
+    previous[1:] = equity[:-1]
+    return equity / previous - 1.0
+
+
+def equity_metrics(equity, initial_balance, periods=TRADING_DAYS):
+    """
+    Return and risk metrics of an equity curve.
+
+    Returns:
+    - dict with final_balance, total_return_pct, annualized sharpe and sortino, and max_drawdown.
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    returns = bar_returns(equity, initial_balance)
+    scale = np.sqrt(periods)
+    std = returns.std()
+    downside = np.sqrt(np.mean(np.minimum(returns, 0.0) ** 2))
+    final_balance = float(equity[-1])
+    return {
+        'final_balance': final_balance,
+        'total_return_pct': (final_balance / initial_balance - 1.0) * 100,
+        'sharpe': float(returns.mean() / std * scale) if std > 0 else 0.0,
+        'sortino': float(returns.mean() / downside * scale) if downside > 0 else 0.0,
+        'max_drawdown': max_drawdown(equity),
+    }
+
+
+def trade_ledger(close, position, trades, fill_price=None, fees=None):
+    """
+    Pair the engine's buy and sell markers into round trips, without a per-trade loop.
+
+    The engine only buys when flat and only marks a sell when holding, so the k-th
+    buy belongs to the k-th sell; a final unmatched buy is still open at the last bar.
+    Trades are priced at the engine's fill prices when given (else the close), an open
+    trade at the last close, and the pnl is net of the fees paid on entry and exit.
+
+    Returns:
+    - dict of LEDGER_COLUMNS -> NumPy arrays, one entry per round trip.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    position = np.asarray(position, dtype=np.float64)
+    trades = np.asarray(trades)
+    entries = np.flatnonzero(trades == 1)
+    exits = np.flatnonzero(trades == -1)
+
+    is_open = np.zeros(len(entries), dtype=bool)
+    is_open[len(exits):] = True
+    exit_index = np.full(len(entries), len(close) - 1, dtype=np.int64)
+    exit_index[:len(exits)] = exits
+
+    prices = close if fill_price is None else np.where(trades != 0, fill_price, close)
+    entry_price = prices[entries]
+    exit_price = prices[exit_index]
+    exit_price[is_open] = close[-1]
+    qty = position[entries]
+    pnl = qty * (exit_price - entry_price)
+    if fees is not None:
+        fees = np.asarray(fees, dtype=np.float64)
+        pnl -= fees[entries] + np.where(is_open, 0.0, fees[exit_index])
+    return {
+        'entry_index': entries.astype(np.int64),
+        'exit_index': exit_index,
+        'entry_price': entry_price,
+        'exit_price': exit_price,
+        'qty': qty,
+        'pnl': pnl,
+        'return_pct': pnl / (qty * entry_price) * 100,
+        'bars_held': exit_index - entries,
+        'open': is_open,
+    }
+
+
+class BacktestResult:
+    """
+    Everything a backtest produced: the per-bar arrays, the trade ledger and its performance metrics.
+
+    Metrics are computed with vectorized NumPy over the per-bar arrays on first
+    access and cached. Results round-trip through compressed .npz files (and
+    Parquet for the per-bar frame), and the metrics of many saved results can be
+    compared with load_metrics without loading their arrays.
+    """
+
+    def __init__(self, close, equity, position, trades, initial_balance=100000, timestamps=None, params=None,
+                 periods=None, fill_price=None, fees=None):
+        """
+        Parameters:
+        - close: per-bar closing prices.
+        - equity: per-bar account value (cash plus marked-to-market shares).
+        - position: per-bar shares held after the bar.
+        - trades: per-bar int8 trade markers (1 = buy, -1 = sell, 0 = none).
+        - initial_balance: the starting cash.
+        - timestamps: optional per-bar epoch nanoseconds, used to annualize the ratios.
+        - params: dict of the parameters the backtest ran with.
+        - periods: bars per year for annualizing (inferred from timestamps, else daily).
+        - fill_price: optional per-bar execution prices (NaN without a trade), default is the close.
+        - fees: optional per-bar commissions paid.
+        """
+        self.close = np.asarray(close, dtype=np.float64)
+        self.equity = np.asarray(equity, dtype=np.float64)
+        self.position = np.asarray(position, dtype=np.float64)
+        self.trades = np.asarray(trades, dtype=np.int8)
+        self.initial_balance = float(initial_balance)
+        self.timestamps = None if timestamps is None else np.asarray(timestamps, dtype=np.int64)
+        self.params = dict(params or {})
+        self.periods = float(periods) if periods is not None else periods_per_year(self.timestamps)
+        self.fill_price = None if fill_price is None else np.asarray(fill_price, dtype=np.float64)
+        self.fees = None if fees is None else np.asarray(fees, dtype=np.float64)
+        self._ledger = None
+        self._metrics = None
+
+    @classmethod
+    def from_run(cls, close, run, initial_balance=100000, timestamps=None, params=None):
+        """
+        Wrap a backtest.engine.BacktestRun.
+        """
+        return cls(close, run.equity, run.position, run.trades, initial_balance, timestamps, params,
+                   fill_price=run.fill_price, fees=run.fees)
+
+    @property
+    def final_balance(self):
+        return float(self.equity[-1])
+
+    @property
+    def returns(self):
+        return bar_returns(self.equity, self.initial_balance)
+
+    @property
+    def exposure(self):
+        """
+        Per-bar fraction of equity held in shares.
+        """
+        return self.position * self.close / self.equity
+
+    @property
+    def ledger(self):
+        if self._ledger is None:
+            self._ledger = trade_ledger(self.close, self.position, self.trades, self.fill_price, self.fees)
+        return self._ledger
+
+    def ledger_frame(self):
+        """
+        The trade ledger as a DataFrame, with entry/exit times if timestamps are known.
+        """
+        ledger = pd.DataFrame(self.ledger, columns=list(LEDGER_COLUMNS))
+        if self.timestamps is not None:
+            ledger.insert(0, 'entry_time', pd.to_datetime(self.timestamps[ledger['entry_index']], utc=True))
+            ledger.insert(1, 'exit_time', pd.to_datetime(self.timestamps[ledger['exit_index']], utc=True))
+        return ledger
+
+    def metrics(self):
+        """
+        Performance summary.
+
+        Returns:
+        - dict with final_balance, total_return_pct, sharpe, sortino, max_drawdown, win_rate,
+          trades (round trips), exposure (mean fraction invested), time_in_market, turnover
+          (traded notional over mean equity) and fees (total commissions).
+        """
+        if self._metrics is not None:
+            return self._metrics
+
+        pnl = self.ledger['pnl'][~self.ledger['open']]
+        traded = np.abs(np.diff(self.position, prepend=0.0)) * self.close
+
+        self._metrics = equity_metrics(self.equity, self.initial_balance, self.periods)
+        self._metrics.update({
+            'win_rate': float(np.mean(pnl > 0)) if len(pnl) else 0.0,
+            'trades': int(len(self.ledger['entry_index'])),
+            'exposure': float(self.exposure.mean()),
+            'time_in_market': float(np.mean(self.position > 0)),
+            'turnover': float(traded.sum() / self.equity.mean()),
+            'fees': float(self.fees.sum()) if self.fees is not None else 0.0,
+        })
+        return self._metrics
+
+    def to_frame(self):
+        """
+        The per-bar arrays as a DataFrame (indexed by time if timestamps are known).
+        """
+        index = None if self.timestamps is None else pd.to_datetime(self.timestamps, utc=True)
+        frame = pd.DataFrame({
+            'close': self.close,
+            'equity': self.equity,
+            'position': self.position,
+            'trades': self.trades,
+            'returns': self.returns,
+        }, index=index)
+        for name in ('fill_price', 'fees'):
+            if getattr(self, name) is not None:
+                frame[name] = getattr(self, name)
+        return frame
+
+    def save(self, path):
+        """
+        Save the per-bar arrays, parameters and metrics to a compressed .npz file.
+        """
+        header = {
+            'initial_balance': self.initial_balance,
+            'periods': self.periods,
+            'params': self.params,
+            'metrics': self.metrics(),
+        }
+        arrays = {'close': self.close, 'equity': self.equity, 'position': self.position, 'trades': self.trades}
+        for name in ('timestamps', 'fill_price', 'fees'):
+            if getattr(self, name) is not None:
+                arrays[name] = getattr(self, name)
+        np.savez_compressed(path, header=np.array(json.dumps(header, default=float)), **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as saved:
+            header = json.loads(str(saved['header']))
+            result = cls(saved['close'], saved['equity'], saved['position'], saved['trades'],
+                         header['initial_balance'], saved['timestamps'] if 'timestamps' in saved else None,
+                         header['params'], header['periods'],
+                         *(saved[name] if name in saved else None for name in ('fill_price', 'fees')))
+        result._metrics = header['metrics']
+        return result
+
+    def to_parquet(self, path):
+        """
+        Save the per-bar frame to Parquet (requires pyarrow or fastparquet), parameters and
+        metrics go into the file's metadata.
+        """
+        frame = self.to_frame()
+        frame.attrs = {'initial_balance': self.initial_balance, 'params': self.params, 'metrics': self.metrics()}
+        frame.to_parquet(path)
+
+
+def load_metrics(paths):
+    """
+    Compare saved results: read only the parameters and metrics of each .npz file.
+
+    Returns:
+    - pandas DataFrame with one row per file (parameters and metrics as columns).
+    """
+    rows = []
+    for path in paths:
+        with np.load(path) as saved:
+            header = json.loads(str(saved['header']))
+        rows.append(dict(header['params'], **header['metrics'], path=str(path)))
+    return pd.DataFrame(rows)
@@ -0,0 +1,194 @@
+import argparse
+import itertools
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from backtest.engine import run_backtest_arrays
+from backtest.results import BacktestResult
+from indicators.rsi import calculate_rsi, generate_signal_array
+
+SIGNAL_PARAMS = ['rsi_window', 'oversold', 'overbought', 'cooldown_period']
+RISK_PARAMS = ['stop_loss', 'take_profit', 'position_size']
+# BacktestResult metrics reported for every combination
+SWEEP_METRICS = ['max_drawdown', 'sharpe', 'sortino', 'win_rate', 'exposure', 'turnover']
+# Metrics results can be ranked by, and whether a lower value is better
+RANK_METRICS = {'final_balance': False, 'total_return_pct': False, 'sharpe': False, 'sortino': False,
+                'max_drawdown': True, 'win_rate': False}
+
+DEFAULT_GRID = {
+    'rsi_window': [14],
+    'oversold': [30],
+    'overbought': [70],
+    'cooldown_period': [5],
+    'stop_loss': [0.05],
+    'take_profit': [0.10],
+    'position_size': [0.1],
+}
+
+# Per-worker state, set up once by _init_worker
+_close = None
+_rsi_cache = {}
+
+
+def _init_worker(path):
+    global _close
+    _close = np.load(path, mmap_mode='r')
+    _rsi_cache.clear()
+
+
+def _run_signal_group(signal_params, risk_grid, initial_balance):
+    """
+    Evaluate every risk combination for one set of signal parameters. The RSI
+    for a window is computed once per worker and reused across groups.
+    """
+    window = signal_params['rsi_window']
+    rsi = _rsi_cache.get(window)
+    if rsi is None:
+        rsi = calculate_rsi(pd.Series(_close), window=window).to_numpy()
+        _rsi_cache[window] = rsi
+
+    # Match the scripts, which drop the RSI warm-up rows before generating signals
+    valid = ~np.isnan(rsi)
+    close = _close[valid]
+    signal = generate_signal_array(rsi[valid], cooldown_period=signal_params['cooldown_period'],
+                                   oversold=signal_params['oversold'],
+                                   overbought=signal_params['overbought'])
+
+    rows = []
+    for risk in risk_grid:
+        run = run_backtest_arrays(close, signal, initial_balance=initial_balance, **risk)
+        metrics = BacktestResult.from_run(close, run, initial_balance).metrics()
+        row = dict(signal_params, **risk)
+        row['final_balance'] = run.final_balance
+        row['return_pct'] = metrics['total_return_pct']
+        row['trades'] = int(np.count_nonzero(run.trades))
+        for name in SWEEP_METRICS:
+            row[name] = metrics[name]
+        rows.append(row)
+    return rows
+
+
+def _expand(grid, names):
+    values = [grid[name] for name in names]
+    return [dict(zip(names, combo)) for combo in itertools.product(*values)]
+
+
+def run_sweep(close, param_grid=None, initial_balance=100000, processes=None, rank_by='final_balance'):
+    """
+    Backtest every combination of a parameter grid in parallel.
+
+    Parameters:
+    - close: 1-D array-like of closing prices.
+    - param_grid: dict mapping parameter names (rsi_window, oversold, overbought, cooldown_period,
+      stop_loss, take_profit, position_size) to lists of values. Missing names use the defaults.
+    - initial_balance: Initial account balance for every run.
+    - processes: int, number of worker processes (default is all cores).
+    - rank_by: str, result column used to rank the combinations, best first (ascending for the
+      lower-is-better RANK_METRICS such as max_drawdown, descending otherwise).
+
+    Returns:
+    - pandas DataFrame with one ranked row per combination.
+    """
+    grid = dict(DEFAULT_GRID)
+    grid.update(param_grid or {})
+    unknown = set(grid) - set(SIGNAL_PARAMS) - set(RISK_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {sorted(unknown)}")
+
+    signal_grid = _expand(grid, SIGNAL_PARAMS)
+    risk_grid = _expand(grid, RISK_PARAMS)
+    processes = processes or os.cpu_count() or 1
+
+    # Workers memory-map the prices read-only instead of receiving a pickled copy
+    fd, path = tempfile.mkstemp(suffix='.npy')
+    os.close(fd)
+    try:
+        np.save(path, np.ascontiguousarray(close, dtype=np.float64))
+        rows = []
+        if processes == 1:
+            _init_worker(path)
+            for params in signal_grid:
+                rows.extend(_run_signal_group(params, risk_grid, initial_balance))
+        else:
+            with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                     initargs=(path,)) as pool:
+                futures = [pool.submit(_run_signal_group, params, risk_grid, initial_balance)
+                           for params in signal_grid]
+                for future in futures:
+                    rows.extend(future.result())
+    finally:
+        os.remove(path)
+
+    results = pd.DataFrame(rows).sort_values(rank_by, ascending=RANK_METRICS.get(rank_by, False), kind='stable')
+    results.insert(0, 'rank', np.arange(1, len(results) + 1))
+    return results.reset_index(drop=True)
+
+
+def parse_range(text, cast=float):
+    """
+    Parse a parameter range given as 'a,b,c' or 'start:stop:step' (stop inclusive).
+    """
+    if ':' in text:
+        start, stop, step = (cast(part) for part in text.split(':'))
+        count = int(round((stop - start) / step)) + 1
+        return [cast(start + k * step) for k in range(count)]
+    return [cast(part) for part in text.split(',')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grid-search the RSI strategy parameters.")
+    parser.add_argument('--symbol', default='AAPL')
+    parser.add_argument('--interval', default='1D')
+    parser.add_argument('--limit', type=int, default=1000)
+    parser.add_argument('--csv', help="Read prices from a CSV with a 'close' column instead of Alpaca.")
+    parser.add_argument('--rsi-window', default='14')
+    parser.add_argument('--oversold', default='30')
+    parser.add_argument('--overbought', default='70')
+    parser.add_argument('--cooldown-period', default='5')
+    parser.add_argument('--stop-loss', default='0.05')
+    parser.add_argument('--take-profit', default='0.10')
+    parser.add_argument('--position-size', default='0.1')
+    parser.add_argument('--initial-balance', type=float, default=100000)
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--output', default='sweep_results.csv')
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    if args.csv:
+        data = pd.read_csv(args.csv)
+    else:
+        from utils.alpaca_fetcher import fetch_alpaca_data
+        data = fetch_alpaca_data(args.symbol, interval=args.interval, limit=args.limit)
+    if data is None or data.empty:
+        print("No data fetched. Please check the symbol, interval, or Alpaca API settings.")
+        return
+
+    grid = {
+        'rsi_window': parse_range(args.rsi_window, int),
+        'oversold': parse_range(args.oversold),
+        'overbought': parse_range(args.overbought),
+        'cooldown_period': parse_range(args.cooldown_period, int),
+        'stop_loss': parse_range(args.stop_loss),
+        'take_profit': parse_range(args.take_profit),
+        'position_size': parse_range(args.position_size),
+    }
+    total = int(np.prod([len(values) for values in grid.values()]))
+    print(f"Sweeping {total} combinations over {len(data)} bars...")
+
+    start = time.perf_counter()
+    results = run_sweep(data['close'].to_numpy(), grid, initial_balance=args.initial_balance,
+                        processes=args.processes)
+    print(f"Finished in {time.perf_counter() - start:.2f}s")
+
+    results.to_csv(args.output, index=False)
+    print(f"Results written to {args.output}")
+    print(results.head(args.top).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from backtest.engine import run_backtest_arrays
+from backtest.results import BacktestResult, equity_metrics, periods_per_year
+from backtest.sweep import DEFAULT_GRID, RANK_METRICS, RISK_PARAMS, SIGNAL_PARAMS, _expand, parse_range
+from indicators.rsi import calculate_rsi, generate_signal_array
+
+# Out-of-sample metrics reported for every fold
+FOLD_METRICS = ['final_balance', 'total_return_pct', 'sharpe', 'sortino', 'max_drawdown', 'win_rate', 'trades',
+                'exposure', 'turnover']
+# Metrics that only need the equity curve, ranking by them skips the trade ledger
+EQUITY_METRICS = ['final_balance', 'total_return_pct', 'sharpe', 'sortino', 'max_drawdown']
+
+# Per-worker state, set up once by _init_worker
+_close = None
+_offsets = None
+_signal_cache = {}
+
+
+def fold_ranges(n, train_size, test_size, step=None, start=0, anchored=False):
+    """
+    Split n bars into consecutive walk-forward folds.
+
+    Parameters:
+    - n: int, the number of bars.
+    - train_size: int, bars in each in-sample (training) window.
+    - test_size: int, bars in each out-of-sample (test) window, right after its training window.
+    - step: int, bars the windows move forward per fold (default is test_size, so test windows tile).
+    - start: int, first bar of the first training window (e.g., past the indicator warm-up).
+    - anchored: bool, grow every training window from `start` instead of rolling it.
+
+    Returns:
+    - list of (train_start, train_end, test_start, test_end) index tuples, ends exclusive.
+    """
+    if train_size <= 0 or test_size <= 0:
+        raise ValueError("train_size and test_size must be positive.")
+    step = step or test_size
+    folds = []
+    train_start = start
+    while train_start + train_size + test_size <= n:
+        train_end = train_start + train_size
+        folds.append((start if anchored else train_start, train_end, train_end, train_end + test_size))
+        train_start += step
+    return folds
+
+
+def _init_worker(path, offsets):
+    global _close, _offsets
+    _close = np.load(path, mmap_mode='r')
+    _offsets = offsets
+    _signal_cache.clear()
+
+
+def _symbol_signals(column, signal_grid):
+    """
+    Close prices and one signal array per signal parameter set for a symbol, over its whole history.
+
+    The RSI of a window is computed once and every signal array is computed once, then all folds
+    slice them. The RSI only looks back, so a slice equals what the fold would compute itself
+    past the warm-up, while the cooldown state carries over from the bars before the fold.
+    """
+    if _signal_cache.get('column') != column:
+        _signal_cache.clear()
+        _signal_cache['column'] = column
+        close = np.asarray(_close[_offsets[column]:_offsets[column + 1]])
+        rsi = {}
+        signals = []
+        for params in signal_grid:
+            window = params['rsi_window']
+            if window not in rsi:
+                rsi[window] = calculate_rsi(pd.Series(close), window=window).to_numpy()
+            signals.append(generate_signal_array(rsi[window], cooldown_period=params['cooldown_period'],
+                                                 oversold=params['oversold'], overbought=params['overbought']))
+        _signal_cache['data'] = (close, signals)
+    return _signal_cache['data']
+
+
+def _score(close, run, initial_balance, periods, rank_by):
+    if rank_by == 'final_balance':
+        return run.final_balance
+    if rank_by in EQUITY_METRICS:
+        return equity_metrics(run.equity, initial_balance, periods)[rank_by]
+    return BacktestResult.from_run(close, run, initial_balance).metrics()[rank_by]
+
+
+def _ranks_higher(score, best, lower_is_better):
+    # NaN scores (e.g., no trades) lose to any number, ties keep the earlier combination
+    if np.isnan(best):
+        return not np.isnan(score)
+    return score < best if lower_is_better else score > best
+
+
+def _run_folds(column, folds, signal_grid, risk_grid, initial_balance, periods, rank_by):
+    """
+    Optimize on every fold's training window and evaluate the winner on its test window.
+    """
+    close, signals = _symbol_signals(column, signal_grid)
+    lower_is_better = RANK_METRICS[rank_by]
+    rows = []
+    for fold, (train_start, train_end, test_start, test_end) in folds:
+        train_close = close[train_start:train_end]
+        best = None
+        for signal_params, signal in zip(signal_grid, signals):
+            train_signal = signal[train_start:train_end]
+            for risk in risk_grid:
+                run = run_backtest_arrays(train_close, train_signal, initial_balance=initial_balance, **risk)
+                score = _score(train_close, run, initial_balance, periods, rank_by)
+                if best is None or _ranks_higher(score, best[0], lower_is_better):
+                    best = (score, signal_params, signal, risk)
+
+        score, signal_params, signal, risk = best
+        test_close = close[test_start:test_end]
+        run = run_backtest_arrays(test_close, signal[test_start:test_end], initial_balance=initial_balance, **risk)
+        result = BacktestResult(test_close, run.equity, run.position, run.trades, initial_balance,
+                                params=dict(signal_params, **risk), periods=periods)
+        metrics = result.metrics()
+        row = {'column': column, 'fold': fold, 'train_start': train_start, 'train_end': train_end,
+               'test_start': test_start, 'test_end': test_end}
+        row.update(signal_params)
+        row.update(risk)
+        row[f"train_{rank_by}"] = score
+        for name in FOLD_METRICS:
+            row[name] = metrics[name]
+        rows.append(row)
+    return rows
+
+
+def walk_forward(close, train_size, test_size, step=None, param_grid=None, anchored=False, timestamps=None,
+                 initial_balance=100000, processes=None, rank_by='sharpe'):
+    """
+    Walk-forward optimization of the RSI strategy: for every fold, pick the parameter combination
+    that ranks best on the training window and report how it does on the following test window.
+
+    Indicators and signals are computed once per symbol and signal parameter set and shared by all
+    folds. Symbols (and, for few symbols, chunks of folds) are evaluated in parallel worker
+    processes that memory-map the prices.
+
+    Parameters:
+    - close: 1-D array-like of closing prices, or dict of symbol -> 1-D array-like (lengths may differ).
+    - train_size: int, bars per training window.
+    - test_size: int, bars per out-of-sample test window.
+    - step: int, bars between folds (default is test_size).
+    - param_grid: dict of parameter name -> list of values, like backtest.sweep.run_sweep.
+    - anchored: bool, expanding training windows instead of rolling ones.
+    - timestamps: optional epoch-nanosecond timestamps (an array, or a dict like close), used to
+      annualize the ratios and to report the fold dates.
+    - initial_balance: Initial account balance of every training and test run.
+    - processes: int, number of worker processes (default is all cores).
+    - rank_by: str, metric the training windows are ranked by (one of RANK_METRICS, the lowest
+      max_drawdown and the highest of the others wins).
+
+    Returns:
+    - pandas DataFrame with one row per symbol and fold: the fold bounds, the chosen parameters,
+      the training score and the out-of-sample metrics.
+    """
+    grid = dict(DEFAULT_GRID)
+    grid.update(param_grid or {})
+    unknown = set(grid) - set(SIGNAL_PARAMS) - set(RISK_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown walk-forward parameters: {sorted(unknown)}")
+    if rank_by not in RANK_METRICS:
+        raise ValueError(f"rank_by must be one of {list(RANK_METRICS)}")
+
+    series = close if isinstance(close, dict) else {None: close}
+    symbols = list(series)
+    arrays = [np.ascontiguousarray(series[symbol], dtype=np.float64) for symbol in symbols]
+    if timestamps is not None and not isinstance(timestamps, dict):
+        timestamps = {None: timestamps}
+    signal_grid = _expand(grid, SIGNAL_PARAMS)
+    risk_grid = _expand(grid, RISK_PARAMS)
+    processes = processes or os.cpu_count() or 1
+
+    # Training windows start once the slowest RSI is defined
+    warm_up = max(grid['rsi_window'])
+    tasks = []
+    for column, values in enumerate(arrays):
+        stamps = None if timestamps is None else timestamps[symbols[column]]
+        periods = periods_per_year(stamps)
+        folds = list(enumerate(fold_ranges(len(values), train_size, test_size, step, warm_up, anchored)))
+        if not folds:
+            print(f"Not enough bars for a walk-forward fold of {symbols[column] or 'the series'} ({len(values)}).")
+            continue
+        # Split a symbol's folds only when there are fewer symbols than workers
+        chunks = max(1, min(len(folds), processes // len(arrays)))
+        for chunk in np.array_split(np.arange(len(folds)), chunks):
+            tasks.append((column, [folds[i] for i in chunk], periods))
+
+    offsets = np.zeros(len(arrays) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(values) for values in arrays])
+    fd, path = tempfile.mkstemp(suffix='.npy')
+    os.close(fd)
+    try:
+        np.save(path, np.concatenate(arrays) if arrays else np.empty(0))
+        rows = []
+        if processes == 1 or len(tasks) <= 1:
+            _init_worker(path, offsets)
+            for column, folds, periods in tasks:
+                rows.extend(_run_folds(column, folds, signal_grid, risk_grid, initial_balance, periods, rank_by))
+        else:
+            with ProcessPoolExecutor(max_workers=min(processes, len(tasks)), initializer=_init_worker,
+                                     initargs=(path, offsets)) as pool:
+                futures = [pool.submit(_run_folds, column, folds, signal_grid, risk_grid, initial_balance,
+                                       periods, rank_by)
+                           for column, folds, periods in tasks]
+                for future in futures:
+                    rows.extend(future.result())
+    finally:
+        os.remove(path)
+
+    report = pd.DataFrame(rows)
+    if report.empty:
+        return report
+    report.insert(0, 'symbol', [symbols[column] for column in report.pop('column')])
+    if timestamps is not None:
+        # Dates of the first and last bar of each window
+        for name, bound, shift in (('train_from', 'train_start', 0), ('train_to', 'train_end', 1),
+                                   ('test_from', 'test_start', 0), ('test_to', 'test_end', 1)):
+            stamps = [timestamps[symbol][index - shift] for symbol, index in zip(report['symbol'], report[bound])]
+            report[name] = pd.to_datetime(stamps, utc=True)
+    if symbols == [None]:
+        report = report.drop(columns='symbol')
+    return report
+
+
+def summarize(report):
+    """
+    Aggregate the out-of-sample results of a walk_forward report per symbol.
+
+    Returns:
+    - pandas DataFrame with the fold count, the compounded test return, the mean of the
+      per-fold metrics and the share of profitable folds.
+    """
+    group = report.groupby('symbol') if 'symbol' in report else report.groupby(lambda _: 'all')
+    summary = group.agg(folds=('fold', 'size'), mean_return_pct=('total_return_pct', 'mean'),
+                        mean_sharpe=('sharpe', 'mean'), worst_drawdown=('max_drawdown', 'max'),
+                        trades=('trades', 'sum'))
+    summary['compounded_return_pct'] = group['total_return_pct'].apply(
+        lambda returns: (np.prod(1 + returns / 100) - 1) * 100)
+    summary['profitable_folds'] = group['total_return_pct'].apply(lambda returns: float(np.mean(returns > 0)))
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Walk-forward optimization of the RSI strategy parameters.")
+    parser.add_argument('--symbols', default='AAPL', help="Comma-separated symbols.")
+    parser.add_argument('--interval', default='1D')
+    parser.add_argument('--limit', type=int, default=2000)
+    parser.add_argument('--csv', help="Read prices from a CSV with a 'close' column instead of Alpaca.")
+    parser.add_argument('--train', type=int, default=500, help="Bars per training window.")
+    parser.add_argument('--test', type=int, default=100, help="Bars per test window.")
+    parser.add_argument('--step', type=int, default=None, help="Bars between folds (default is --test).")
+    parser.add_argument('--anchored', action='store_true', help="Expanding instead of rolling training windows.")
+    parser.add_argument('--rsi-window', default='14')
+    parser.add_argument('--oversold', default='30')
+    parser.add_argument('--overbought', default='70')
+    parser.add_argument('--cooldown-period', default='5')
+    parser.add_argument('--stop-loss', default='0.05')
+    parser.add_argument('--take-profit', default='0.10')
+    parser.add_argument('--position-size', default='0.1')
+    parser.add_argument('--rank-by', default='sharpe', choices=list(RANK_METRICS))
+    parser.add_argument('--initial-balance', type=float, default=100000)
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--output', default='walk_forward_results.csv')
+    args = parser.parse_args()
+
+    close, timestamps = {}, {}
+    if args.csv:
+        data = {'csv': pd.read_csv(args.csv)}
+    else:
+        from utils.alpaca_fetcher import fetch_alpaca_data
+        data = {symbol: fetch_alpaca_data(symbol, interval=args.interval, limit=args.limit)
+                for symbol in args.symbols.split(',')}
+    for symbol, frame in data.items():
+        if frame is None or frame.empty:
+            print(f"No data fetched for {symbol}. Please check the symbol, interval, or Alpaca API settings.")
+            continue
+        close[symbol] = frame['close'].to_numpy()
+        if isinstance(frame.index, pd.DatetimeIndex):
+            from utils.bar_cache import to_epoch_ns
+            timestamps[symbol] = to_epoch_ns(frame.index)
+    if not close:
+        return
+
+    grid = {
+        'rsi_window': parse_range(args.rsi_window, int),
+        'oversold': parse_range(args.oversold),
+        'overbought': parse_range(args.overbought),
+        'cooldown_period': parse_range(args.cooldown_period, int),
+        'stop_loss': parse_range(args.stop_loss),
+        'take_profit': parse_range(args.take_profit),
+        'position_size': parse_range(args.position_size),
+    }
+    total = int(np.prod([len(values) for values in grid.values()]))
+    print(f"Walk-forward over {len(close)} symbol(s), {total} combinations per fold...")
+
+    start = time.perf_counter()
+    report = walk_forward(close, args.train, args.test, args.step, grid, anchored=args.anchored,
+                          timestamps=timestamps if len(timestamps) == len(close) else None,
+                          initial_balance=args.initial_balance, processes=args.processes, rank_by=args.rank_by)
+    print(f"Finished in {time.perf_counter() - start:.2f}s")
+    if report.empty:
+        return
+
+    report.to_csv(args.output, index=False)
+    print(f"Per-fold results written to {args.output}")
+    print(summarize(report).to_string())
+
+
+if __name__ == "__main__":
+    main()
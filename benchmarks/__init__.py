@@ -0,0 +1,2 @@
+# benchmarks/__init__.py
+# This file makes 'benchmarks' a package
\ No newline at end of file
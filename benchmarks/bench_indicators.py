@@ -0,0 +1,122 @@
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from indicators.registry import IndicatorSet, compute_indicators
+from indicators.rsi import calculate_rsi
+
+SPECS = ['sma', 'ema', 'rsi', 'wilder_rsi', 'macd', 'bollinger', 'atr']
+
+
+def synthetic_bars(n, seed=0):
+    """
+    Random-walk close/high/low arrays for benchmarking.
+    """
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, n)))
+    spread = close * rng.random(n) * 0.002
+    return close, close + spread, close - spread
+
+
+def pandas_indicators(close, high, low):
+    """
+    The same indicators written as separate full-history pandas computations (the current style).
+    """
+    series = pd.Series(close)
+    delta = series.diff().fillna(0)
+    gain = delta.clip(lower=0).ewm(alpha=1 / 14, adjust=False, min_periods=14).mean()
+    loss = (-delta).clip(lower=0).ewm(alpha=1 / 14, adjust=False, min_periods=14).mean()
+    macd = series.ewm(span=12, adjust=False).mean() - series.ewm(span=26, adjust=False).mean()
+    macd_signal = macd.ewm(span=9, adjust=False).mean()
+    mid = series.rolling(20).mean()
+    std = series.rolling(20).std(ddof=0)
+    previous = series.shift()
+    true_range = pd.concat([pd.Series(high - low), (pd.Series(high) - previous).abs(),
+                            (pd.Series(low) - previous).abs()], axis=1).max(axis=1)
+    return {
+        'sma_20': series.rolling(20).mean(),
+        'ema_20': series.ewm(span=20, adjust=False).mean(),
+        'rsi_14': calculate_rsi(series, window=14),
+        'wilder_rsi_14': 100 - 100 / (1 + gain / loss),
+        'macd_12_26_9': macd,
+        'macd_signal_12_26_9': macd_signal,
+        'macd_hist_12_26_9': macd - macd_signal,
+        'bb_mid_20': mid,
+        'bb_upper_20': mid + 2 * std,
+        'bb_lower_20': mid - 2 * std,
+        'atr_14': true_range.ewm(alpha=1 / 14, adjust=False, min_periods=14).mean(),
+    }
+
+
+def best_of(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def run_indicator_benchmark(bars=1_000_000, repeat=3, incremental_bars=100_000):
+    """
+    Time the pandas baseline, the registry's fused batch pass, and its per-bar incremental updates.
+
+    Returns:
+    - dict with the timings (seconds), the speedups and the largest difference from the baseline.
+    """
+    close, high, low = synthetic_bars(bars)
+
+    rsi_pandas, _ = best_of(lambda: calculate_rsi(pd.Series(close), window=14), repeat)
+    rsi_registry, _ = best_of(lambda: compute_indicators(['rsi'], close), repeat)
+    all_pandas, expected = best_of(lambda: pandas_indicators(close, high, low), repeat)
+    all_registry, columns = best_of(lambda: compute_indicators(SPECS, close, high, low), repeat)
+    max_difference = max(float(np.nanmax(np.abs(expected[name].to_numpy() - columns[name]))) for name in expected)
+
+    indicators = IndicatorSet(SPECS)
+    n = min(incremental_bars, bars)
+    start = time.perf_counter()
+    for i in range(n):
+        indicators.update(close[i], high[i], low[i])
+    incremental = (time.perf_counter() - start) / n
+
+    return {
+        'bars': bars,
+        'rsi_pandas': rsi_pandas,
+        'rsi_registry': rsi_registry,
+        'rsi_speedup': rsi_pandas / rsi_registry,
+        'all_pandas': all_pandas,
+        'all_registry': all_registry,
+        'all_speedup': all_pandas / all_registry,
+        'max_difference': max_difference,
+        'incremental_us_per_bar': incremental * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the indicator registry against the pandas indicators.")
+    parser.add_argument('--bars', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--incremental-bars', type=int, default=100_000)
+    parser.add_argument('--output', default=None, help="Write the results to a JSON file.")
+    args = parser.parse_args()
+
+    result = run_indicator_benchmark(args.bars, args.repeat, args.incremental_bars)
+    print(f"{result['bars']:,} bars")
+    print(f"RSI only:        pandas {result['rsi_pandas'] * 1000:8.1f} ms  "
+          f"registry {result['rsi_registry'] * 1000:8.1f} ms  ({result['rsi_speedup']:.1f}x)")
+    print(f"All {len(SPECS)} indicators: pandas {result['all_pandas'] * 1000:8.1f} ms  "
+          f"registry {result['all_registry'] * 1000:8.1f} ms  ({result['all_speedup']:.1f}x)")
+    print(f"Largest difference from pandas: {result['max_difference']:.2e}")
+    print(f"Incremental update of all {len(SPECS)} indicators: {result['incremental_us_per_bar']:.1f} us/bar")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
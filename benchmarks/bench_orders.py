@@ -0,0 +1,90 @@
+import argparse
+import json
+import time
+
+from live.mock_broker import MockBroker
+from live.orders import OrderManager
+
+
+def run_order_benchmark(orders=500, max_workers=8, latency=0.02, fill_delay=0.05, rate_limit=None,
+                        stream_updates=True, poll_interval=None):
+    """
+    Push a burst of market orders through an OrderManager against the mock broker.
+
+    Parameters:
+    - orders: int, the number of orders to submit.
+    - max_workers: int, the order manager's concurrency.
+    - latency: float, simulated seconds per REST request.
+    - fill_delay: float, simulated seconds from order acceptance to fill.
+    - rate_limit: int, broker requests per second before HTTP 429 (None is unlimited).
+    - stream_updates: bool, deliver fills as trade_updates events instead of relying on polling.
+    - poll_interval: float, the order manager's get_order polling interval (default 1s with
+      trade updates, 50 ms without).
+
+    Returns:
+    - dict with throughput (orders/second), the order manager's latency stats and broker request counts.
+    """
+    symbols = [f"SYM{i}" for i in range(50)]
+    broker = MockBroker(cash=1e12, prices={symbol: 100.0 for symbol in symbols}, latency=latency,
+                        fill_delay=fill_delay, rate_limit=rate_limit)
+    if poll_interval is None:
+        poll_interval = 1.0 if stream_updates else 0.05
+    manager = OrderManager(broker, max_workers=max_workers, poll_interval=poll_interval)
+    if stream_updates:
+        broker.subscribe(manager.on_trade_update)
+
+    start = time.perf_counter()
+    for i in range(orders):
+        manager.submit(symbols[i % len(symbols)], 'buy', 1, price=100.0)
+    queued = time.perf_counter()
+    if fill_delay > 0 and stream_updates:
+        # The mock broker only fills while it serves requests, keep one trickling in like a live loop would
+        while not manager.wait(timeout=fill_delay):
+            broker.process_fills()
+    manager.wait()
+    done = time.perf_counter()
+    manager.shutdown()
+
+    stats = manager.stats()
+    stats.update({
+        'max_workers': max_workers,
+        'enqueue_seconds': queued - start,
+        'total_seconds': done - start,
+        'throughput': orders / (done - start),
+        'broker_requests': broker.request_count,
+        'rate_limited': broker.rejected_count,
+    })
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark order throughput and latency against the mock broker.")
+    parser.add_argument('--orders', type=int, default=500)
+    parser.add_argument('--workers', default='1,4,16', help="Comma-separated concurrency levels to compare.")
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--fill-delay', type=float, default=0.05)
+    parser.add_argument('--rate-limit', type=int, default=None)
+    parser.add_argument('--poll', action='store_true', help="Track fills by polling instead of trade updates.")
+    parser.add_argument('--output', default=None, help="Write the results to a JSON file.")
+    args = parser.parse_args()
+
+    results = []
+    for workers in [int(w) for w in args.workers.split(',')]:
+        result = run_order_benchmark(args.orders, workers, args.latency, args.fill_delay, args.rate_limit,
+                                     stream_updates=not args.poll)
+        results.append(result)
+        print(f"workers {workers:3d}: {result['throughput']:8.1f} orders/s  "
+              f"enqueue {result['enqueue_seconds'] * 1000:6.1f} ms  "
+              f"submit p50 {result.get('submit_latency_p50', 0) * 1000:7.1f} ms  "
+              f"fill p50/p95 {result.get('fill_latency_p50', 0) * 1000:7.1f}/"
+              f"{result.get('fill_latency_p95', 0) * 1000:7.1f} ms  "
+              f"retries {result['retries']}  errors {result['errors']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules run as entry points, importing them must not start any work
+ENTRY_POINTS = [
+    'main_live',
+    'paper.main_rsi',
+    'paper.main_predictive_model',
+    'paper.test_loop',
+    'backtest.sweep',
+    'utils.fake_stream',
+]
+
+
+def measure_import(module, repeat=5):
+    """
+    Time a cold import of a module in fresh interpreters.
+
+    Parameters:
+    - module: str, dotted module name relative to the repository root.
+    - repeat: int, number of fresh interpreters to average over.
+
+    Returns:
+    - dict with the best and mean wall time (seconds), the slowest imports by cumulative time,
+      or the error if the import failed.
+    """
+    code = f"import {module}"
+    timings = []
+    importtime = ''
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT,
+                                capture_output=True, text=True)
+        timings.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'import failed'
+            return {'module': module, 'error': error}
+        importtime = result.stderr
+
+    # Lines look like 'import time:  self [us] | cumulative | imported package'
+    heaviest = []
+    for line in importtime.splitlines():
+        parts = line.split('|')
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2].strip()
+        if name.startswith('.') or not name:
+            continue
+        heaviest.append((int(parts[1]), name.strip()))
+    heaviest.sort(reverse=True)
+
+    return {
+        'module': module,
+        'best': min(timings),
+        'mean': sum(timings) / len(timings),
+        'heaviest': [(name, us / 1e6) for us, name in heaviest[:5]],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold import time of every entry point.")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--modules', default=','.join(ENTRY_POINTS))
+    parser.add_argument('--output', default=None, help="Write the results to a JSON file.")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        subprocess.run([sys.executable, '-c', 'pass'], capture_output=True)
+    interpreter = (time.perf_counter() - start) / args.repeat
+    print(f"Bare interpreter start: {interpreter * 1000:.0f} ms")
+
+    results = []
+    for module in args.modules.split(','):
+        result = measure_import(module, repeat=args.repeat)
+        results.append(result)
+        if 'error' in result:
+            print(f"{module:32s} FAILED: {result['error']}")
+            continue
+        heaviest = ', '.join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in result['heaviest'][:3])
+        print(f"{module:32s} best {result['best'] * 1000:7.0f} ms  mean {result['mean'] * 1000:7.0f} ms  "
+              f"[{heaviest}]")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'interpreter': interpreter, 'results': results}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+import argparse
+import contextlib
+import functools
+import io
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from backtest.backtesting import backtest_strategy
+from backtest.portfolio import run_portfolio_arrays
+from indicators.registry import compute_indicators
+from indicators.rsi import calculate_rsi, generate_signal_array, generate_signals
+from indicators.streaming import RSIStateTable, StreamingRSI
+from live.mock_broker import MockBroker
+from live.orders import OrderManager
+from live.portfolio import PortfolioState
+from utils.alpaca_client import set_api
+
+# Sizes per preset: single-symbol series lengths, and (bars, symbols) panels
+PRESETS = {
+    'quick': {'bars': [1_000, 100_000], 'panels': [(10_000, 1), (10_000, 50)], 'live_symbols': [1, 50]},
+    'full': {'bars': [1_000, 100_000, 1_000_000, 10_000_000],
+             'panels': [(100_000, 1), (100_000, 50), (20_000, 500)], 'live_symbols': [1, 50, 500]},
+}
+INDICATOR_SPECS = ['sma', 'ema', 'rsi', 'wilder_rsi', 'macd', 'bollinger', 'atr']
+
+
+def synthetic_ohlcv(bars, seed=0, start='2024-01-02 14:30', freq='1min'):
+    """
+    Deterministic random-walk OHLCV bars: the same size and seed always give the same series.
+
+    Returns:
+    - DataFrame with open, high, low, close and volume columns on a UTC DatetimeIndex.
+    """
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, bars)))
+    open_ = np.r_[close[0], close[:-1]]
+    wick = close * rng.random(bars) * 0.002
+    index = pd.date_range(start, periods=bars, freq=freq, tz='UTC')
+    return pd.DataFrame({
+        'open': open_,
+        'high': np.maximum(open_, close) + wick,
+        'low': np.minimum(open_, close) - wick,
+        'close': close,
+        'volume': rng.integers(100, 10_000, bars).astype(np.float64),
+    }, index=index)
+
+
+def synthetic_panel(bars, symbols, seed=0):
+    """
+    Deterministic close panel (bars x symbols) with RSI signals per symbol.
+
+    Returns:
+    - (close, signal) 2-D float64 and int8 arrays.
+    """
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, (bars, symbols)), axis=0))
+    signal = np.empty((bars, symbols), dtype=np.int8)
+    for i in range(symbols):
+        rsi = compute_indicators(['rsi'], close[:, i])['rsi_14']
+        signal[:, i] = generate_signal_array(rsi)
+    return close, signal
+
+
+def measure(function, repeat=3):
+    """
+    Time a callable (best of `repeat` runs) and record its peak traced memory in one extra run.
+
+    Returns:
+    - dict with 'seconds' and 'peak_bytes'.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    # NumPy and pandas report their buffers to tracemalloc, the inputs allocated before are not counted
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {'seconds': min(timings), 'peak_bytes': peak}
+
+
+def bench_pipeline(bars, repeat=3):
+    """
+    Time every stage of the single-symbol research pipeline on `bars` synthetic bars.
+
+    Returns:
+    - dict of stage name -> measurement.
+    """
+    data = synthetic_ohlcv(bars)
+    with_rsi = data.assign(RSI=calculate_rsi(data['close']))
+    with_signals = generate_signals(with_rsi.copy())
+    close, high, low = (data[column].to_numpy() for column in ('close', 'high', 'low'))
+
+    results = {
+        'calculate_rsi': measure(lambda: calculate_rsi(data['close']), repeat),
+        'generate_signals': measure(lambda: generate_signals(with_rsi.copy()), repeat),
+        'indicators': measure(lambda: compute_indicators(INDICATOR_SPECS, close, high, low), repeat),
+        'backtest_strategy': measure(lambda: backtest_strategy(with_signals), repeat),
+    }
+
+    try:
+        from models.predictive_model import preprocess_data
+        import sklearn  # noqa: F401, preprocess_data fits a scikit-learn scaler
+    except ImportError:
+        print("scikit-learn is not installed, skipping preprocess_data.")
+    else:
+        results['preprocess_data'] = measure(lambda: preprocess_data(data, window_size=60), repeat)
+
+    # Per-bar cost of the live incremental state, on at most 100k bars
+    closes = close[:100_000].tolist()
+
+    def stream():
+        state = StreamingRSI()
+        for value in closes:
+            state.update(value)
+
+    results['streaming_rsi'] = measure(stream, repeat)
+    results['streaming_rsi']['per_bar_us'] = results['streaming_rsi']['seconds'] / len(closes) * 1e6
+    return results
+
+
+def bench_inference(repeat=3, window_size=60, updates=200):
+    """
+    Per-bar latency of the live next-close predictor with an untrained LSTM (skipped without Keras).
+    """
+    try:
+        from models.artifacts import Predictor
+        from models.predictive_model import build_lstm_model
+        from sklearn.preprocessing import MinMaxScaler
+    except ImportError:
+        return None
+    try:
+        model = build_lstm_model((window_size, 1))
+    except ImportError:
+        print("Keras is not installed, skipping model inference.")
+        return None
+    closes = synthetic_ohlcv(window_size + updates)['close'].to_numpy()
+    scaler = MinMaxScaler().fit(closes.reshape(-1, 1))
+    predictor = Predictor(model, scaler, window_size)
+    predictor.seed(closes[:window_size])
+
+    def predict():
+        for value in closes[window_size:]:
+            predictor.update(value)
+
+    result = measure(predict, repeat)
+    result['per_bar_us'] = result['seconds'] / updates * 1e6
+    return result
+
+
+def bench_panel(bars, symbols, repeat=3):
+    """
+    Time the shared-cash portfolio backtest and the vectorized multi-symbol RSI state on a panel.
+    """
+    close, signal = synthetic_panel(bars, symbols)
+    steps = min(bars, 1_000)
+
+    def state_table():
+        table = RSIStateTable([f"SYM{i}" for i in range(symbols)])
+        idx = np.arange(symbols)
+        for t in range(steps):
+            table.update(idx, close[t])
+
+    return {
+        'portfolio_backtest': measure(lambda: run_portfolio_arrays(close, signal), repeat),
+        'rsi_state_table': measure(state_table, repeat),
+    }
+
+
+def bench_live_cycle(symbols, cycles=50, history=100):
+    """
+    Run the live trading cycle (fetch, RSI/signals, risk checks, order submission) against the mock broker.
+
+    A single symbol goes through main_live's polling path, several symbols through the
+    multi-symbol engine. A new bar is published for every symbol before each cycle.
+
+    Returns:
+    - measurement with the median and p95 cycle time over all cycles, and the broker request count.
+    """
+    import main_live
+    from live.engine import MultiSymbolEngine
+    from utils.bar_buffer import BarBuffer
+
+    names = [f"SYM{i}" for i in range(symbols)]
+    data = synthetic_ohlcv(history + cycles + 1, seed=1)['close'].to_numpy()
+    broker = MockBroker(cash=1e9, prices={name: data[0] for name in names})
+    # Bars are stamped one second apart up to now, inside every fetch window of the live code
+    base = (time.time_ns() // 1_000_000_000 - cycles - history - 2) * 1_000_000_000
+    for k in range(history):
+        for i, name in enumerate(names):
+            broker.add_bar(name, base + k * 1_000_000_000, data[k] * (1 + i * 0.001))
+
+    previous = set_api(broker)
+    portfolio = PortfolioState(broker)
+    orders = OrderManager(broker, portfolio=portfolio)
+    timings = []
+    try:
+        # The live path prints every decision, keep that out of the benchmark output
+        with contextlib.redirect_stdout(io.StringIO()):
+            portfolio.reconcile()
+            if symbols == 1:
+                bars = BarBuffer(500)
+                state = StreamingRSI()
+                state.seed(data[:history].tolist(), [base + k * 1_000_000_000 for k in range(history)])
+
+                def cycle():
+                    signal = main_live.process_live_data(names[0], state, bars=bars)
+                    if signal:
+                        main_live.execute_trade(names[0], signal, 1, price=state.prev_close, portfolio=portfolio,
+                                                orders=orders)
+            else:
+                engine = MultiSymbolEngine(broker, names, functools.partial(main_live.execute_trade,
+                                                                            portfolio=portfolio, orders=orders),
+                                           cooldown_period=0)
+                engine.seed()
+                cycle = engine.run_cycle
+
+            # The timed cycles run untraced, one more cycle is traced for the peak memory
+            for k in range(history, history + cycles + 1):
+                for i, name in enumerate(names):
+                    broker.add_bar(name, base + k * 1_000_000_000, data[k] * (1 + i * 0.001))
+                if k == history + cycles:
+                    tracemalloc.start()
+                    cycle()
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+                    break
+                start = time.perf_counter()
+                cycle()
+                timings.append(time.perf_counter() - start)
+            orders.wait(timeout=10)
+    finally:
+        orders.shutdown(wait=False)
+        if symbols > 1:
+            engine.pool.shutdown(wait=True)
+        set_api(previous)
+
+    timings = np.array(timings)
+    return {'seconds': float(np.median(timings)), 'p95_seconds': float(np.percentile(timings, 95)),
+            'peak_bytes': peak, 'broker_requests': broker.request_count}
+
+
+def run_suite(preset='quick', repeat=3, stages=None):
+    """
+    Run every benchmark of a preset.
+
+    Parameters:
+    - preset: str, 'quick' or 'full' (1k to 10M bars, up to 500 symbols).
+    - repeat: int, timed runs per measurement (the best is kept).
+    - stages: optional set of group names to run ('pipeline', 'inference', 'panel', 'live').
+
+    Returns:
+    - dict of benchmark key (e.g. 'calculate_rsi[bars=100000]') -> measurement.
+    """
+    sizes = PRESETS[preset]
+    stages = stages or {'pipeline', 'inference', 'panel', 'live'}
+    results = {}
+
+    def record(key, measurement):
+        results[key] = measurement
+        extra = f" p95 {measurement['p95_seconds'] * 1000:.2f} ms" if 'p95_seconds' in measurement else ''
+        print(f"{key:55s} {measurement['seconds'] * 1000:10.2f} ms  peak {measurement['peak_bytes'] / 2 ** 20:8.1f} MiB"
+              f"{extra}")
+
+    if 'pipeline' in stages:
+        for bars in sizes['bars']:
+            for stage, measurement in bench_pipeline(bars, repeat).items():
+                record(f"{stage}[bars={bars}]", measurement)
+    if 'inference' in stages:
+        measurement = bench_inference(repeat)
+        if measurement is not None:
+            record("lstm_predict[bars=200]", measurement)
+    if 'panel' in stages:
+        for bars, symbols in sizes['panels']:
+            for stage, measurement in bench_panel(bars, symbols, repeat).items():
+                record(f"{stage}[bars={bars},symbols={symbols}]", measurement)
+    if 'live' in stages:
+        for symbols in sizes['live_symbols']:
+            record(f"live_cycle[symbols={symbols}]", bench_live_cycle(symbols))
+    return results
+
+
+def compare(results, baseline, threshold=0.25, memory_threshold=0.5, min_seconds=0.001):
+    """
+    Find benchmarks that got slower (or use more memory) than the baseline by more than the thresholds.
+
+    Parameters:
+    - results, baseline: dicts of benchmark key -> measurement (keys missing from either are ignored).
+    - threshold: float, allowed fractional slowdown (0.25 = 25%).
+    - memory_threshold: float, allowed fractional growth of peak memory (None to ignore memory).
+    - min_seconds: float, timings below this are compared as this, so timer noise on tiny stages is ignored.
+
+    Returns:
+    - list of (key, metric, baseline value, current value) regressions.
+    """
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        if max(current['seconds'], min_seconds) > max(previous['seconds'], min_seconds) * (1 + threshold):
+            regressions.append((key, 'seconds', previous['seconds'], current['seconds']))
+        if (memory_threshold is not None
+                and current['peak_bytes'] > max(previous['peak_bytes'], 2 ** 20) * (1 + memory_threshold)):
+            regressions.append((key, 'peak_bytes', previous['peak_bytes'], current['peak_bytes']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite: indicators, signals, backtests, "
+                                                 "model inference and the live cycle against a mock broker.")
+    parser.add_argument('--preset', choices=list(PRESETS), default='quick')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--stages', default=None, help="Comma-separated: pipeline,inference,panel,live.")
+    parser.add_argument('--output', default=None, help="Write the results to a JSON file.")
+    parser.add_argument('--baseline', default=None, help="Compare with a results file and fail on regressions.")
+    parser.add_argument('--threshold', type=float, default=0.25, help="Allowed slowdown (0.25 = 25%%).")
+    parser.add_argument('--memory-threshold', type=float, default=0.5, help="Allowed peak memory growth.")
+    args = parser.parse_args()
+
+    stages = set(args.stages.split(',')) if args.stages else None
+    results = run_suite(args.preset, args.repeat, stages)
+
+    if args.output:
+        report = {
+            'meta': {'preset': args.preset, 'python': sys.version.split()[0], 'numpy': np.__version__,
+                     'pandas': pd.__version__, 'machine': platform.platform()},
+            'results': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold, args.memory_threshold)
+        for key, metric, before, after in regressions:
+            print(f"REGRESSION {key} {metric}: {before:.6g} -> {after:.6g} ({after / before - 1:+.0%})")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.baseline} (threshold {args.threshold:.0%}).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+import math
+
+import numpy as np
+
+try:
+    from scipy.signal import lfilter
+except ImportError:  # scipy is optional, exponential smoothing falls back to a Python loop
+    lfilter = None
+
+
+def diff(x):
+    """
+    First difference with the first bar counted as no change (like series.diff() then fillna(0)).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    delta = np.empty_like(x)
+    if len(x):
+        delta[0] = 0.0
+        np.subtract(x[1:], x[:-1], out=delta[1:])
+    return delta
+
+
+def rolling_sum(x, window, chunk=4096):
+    """
+    Trailing sum over `window` bars in O(n) from cumulative sums, NaN for the first window-1 bars.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full(len(x), np.nan)
+    # The cumulative sum restarts every chunk so its magnitude, and its rounding error, stays bounded
+    step = max(chunk, window)
+    for start in range(window - 1, len(x), step):
+        stop = min(start + step, len(x))
+        cumulative = np.concatenate(([0.0], np.cumsum(x[start - window + 1:stop])))
+        out[start:stop] = cumulative[window:] - cumulative[:-window]
+    return out
+
+
+def rolling_mean(x, window):
+    """
+    Trailing mean over `window` bars, matches series.rolling(window).mean().
+    """
+    return rolling_sum(x, window) / window
+
+
+def rolling_std(x, window, ddof=0, chunk=4096):
+    """
+    Trailing standard deviation over `window` bars (population by default).
+
+    Each window's variance is summed from its deviations around the window's own mean
+    (two passes, O(n * window)): sum(x^2) - sum(x)^2/n cancels away small variances of
+    price-sized values, and flat windows would not come out as exactly 0.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full(len(x), np.nan)
+    if len(x) < window:
+        return out
+    windows = np.lib.stride_tricks.sliding_window_view(x, window)
+    # Chunks bound the (rows, window) deviation matrix
+    for start in range(0, len(windows), chunk):
+        block = windows[start:start + chunk]
+        deviations = block - block.mean(axis=1, keepdims=True)
+        variance = np.einsum('ij,ij->i', deviations, deviations) / (window - ddof)
+        out[start + window - 1:start + window - 1 + len(block)] = np.sqrt(variance)
+    return out
+
+
+def ewm(x, alpha, min_periods=0):
+    """
+    Exponentially weighted mean, matches series.ewm(alpha=alpha, adjust=False, min_periods=min_periods).mean()
+    for series without NaNs.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    if not len(x):
+        return x.copy()
+    if lfilter is not None:
+        # y[t] = alpha * x[t] + (1 - alpha) * y[t-1], started so that y[0] = x[0]
+        out, _ = lfilter([alpha], [1.0, alpha - 1.0], x, zi=[(1.0 - alpha) * x[0]])
+    else:
+        values = x.tolist()
+        y = values[0]
+        smoothed = [0.0] * len(values)
+        for i, value in enumerate(values):
+            y += alpha * (value - y)
+            smoothed[i] = y
+        out = np.array(smoothed)
+    if min_periods > 1:
+        out[:min_periods - 1] = np.nan
+    return out
+
+
+def true_range(high, low, close):
+    """
+    True range: the largest of high-low and the gaps from the previous close. The first bar is high-low.
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    tr = high - low
+    if len(close) > 1:
+        previous = close[:-1]
+        tr[1:] = np.maximum(tr[1:], np.maximum(np.abs(high[1:] - previous), np.abs(low[1:] - previous)))
+    return tr
+
+
+def rsi_from_sums(gain, loss):
+    """
+    RSI from average (or summed) gains and losses: 100 when there are no losses, NaN when nothing moved.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100 - (100 / (1 + gain / loss))
+
+
+class Kernels:
+    """
+    Shared intermediate results for computing many indicators over one price buffer.
+
+    Every kernel (a difference, cumulative sum, rolling mean, exponential average,
+    ...) is computed once per series and parameter set and reused by every indicator
+    that asks for it, e.g. RSI(14) and Wilder RSI(14) share the gain/loss split,
+    SMA(20) and Bollinger(20) share the rolling mean, MACD variants share EMAs.
+    """
+
+    def __init__(self, close, high=None, low=None):
+        self.series = {'close': np.asarray(close, dtype=np.float64)}
+        if high is not None:
+            self.series['high'] = np.asarray(high, dtype=np.float64)
+        if low is not None:
+            self.series['low'] = np.asarray(low, dtype=np.float64)
+        self._cache = {}
+
+    def _memo(self, key, compute):
+        value = self._cache.get(key)
+        if value is None:
+            value = self._cache[key] = compute()
+        return value
+
+    def get(self, name):
+        """
+        A named series: close, high, low, delta, gains, losses, true_range or one added with put().
+        """
+        if name in self.series:
+            return self.series[name]
+        if name == 'delta':
+            return self._memo('delta', lambda: diff(self.series['close']))
+        if name == 'gains':
+            return self._memo('gains', lambda: np.maximum(self.get('delta'), 0.0))
+        if name == 'losses':
+            return self._memo('losses', lambda: np.maximum(-self.get('delta'), 0.0))
+        if name == 'true_range':
+            if 'high' not in self.series or 'low' not in self.series:
+                # Close-only data: the bar-to-bar move stands in for the range
+                return self._memo('true_range', lambda: np.abs(self.get('delta')))
+            return self._memo('true_range', lambda: true_range(self.series['high'], self.series['low'],
+                                                               self.series['close']))
+        raise KeyError(f"Unknown series: {name}")
+
+    def put(self, name, values):
+        """
+        Register a derived series (e.g., a MACD line) so later kernels can be applied to it.
+        """
+        self.series[name] = np.asarray(values, dtype=np.float64)
+
+    def rolling_mean(self, name, window):
+        return self._memo(('mean', name, window), lambda: rolling_mean(self.get(name), window))
+
+    def rolling_std(self, name, window, ddof=0):
+        return self._memo(('std', name, window, ddof), lambda: rolling_std(self.get(name), window, ddof))
+
+    def ewm(self, name, alpha, min_periods=0):
+        return self._memo(('ewm', name, alpha, min_periods), lambda: ewm(self.get(name), alpha, min_periods))
+
+
+class RollingWindow:
+    """
+    O(1) trailing sum over the last `window` values and an O(window) standard deviation,
+    the incremental counterparts of rolling_sum/rolling_std.
+
+    Values are stored relative to the first one seen, and the sum is re-added exactly
+    once per window so floating-point drift never accumulates. The standard deviation
+    is computed from the stored window around its own mean, like rolling_std.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.values = [0.0] * window
+        self.pos = 0
+        self.count = 0
+        self.total = 0.0
+        self.anchor = None
+
+    @property
+    def full(self):
+        return self.count >= self.window
+
+    def update(self, value):
+        if self.anchor is None:
+            self.anchor = value
+        value -= self.anchor
+        old = self.values[self.pos]
+        self.total += value - old
+        self.values[self.pos] = value
+        self.pos = (self.pos + 1) % self.window
+        if self.pos == 0:
+            self.total = math.fsum(self.values)
+        self.count += 1
+
+    def sum(self):
+        return self.total + self.anchor * min(self.count, self.window)
+
+    def mean(self):
+        return self.sum() / self.window if self.full else math.nan
+
+    def std(self, ddof=0):
+        if not self.full:
+            return math.nan
+        mean = math.fsum(self.values) / self.window
+        return math.sqrt(math.fsum((v - mean) ** 2 for v in self.values) / (self.window - ddof))
+
+
+class EWM:
+    """
+    O(1) exponentially weighted mean, the incremental counterpart of ewm().
+    """
+
+    def __init__(self, alpha, min_periods=0):
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self.value = math.nan
+        self.count = 0
+
+    def update(self, x):
+        self.value = x if self.count == 0 else self.value + self.alpha * (x - self.value)
+        self.count += 1
+        return self.value if self.count >= self.min_periods else math.nan
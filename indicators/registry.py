@@ -0,0 +1,263 @@
+import math
+
+from indicators.kernels import EWM, Kernels, RollingWindow, rsi_from_sums
+
+INDICATORS = {}
+
+
+def register(cls):
+    """
+    Class decorator adding an indicator to the registry under its `name`.
+
+    An indicator takes its parameters in __init__ and provides:
+    - outputs: list of output column names.
+    - batch(kernels): dict of output name -> array over the whole buffer, built from shared kernels.
+    - update(close, high=None, low=None): dict of output name -> value for one new bar, in O(1).
+    """
+    INDICATORS[cls.name] = cls
+    return cls
+
+
+def create(spec):
+    """
+    Build an indicator from an instance, a registered name, or a (name, params dict) pair.
+    """
+    if isinstance(spec, str):
+        return INDICATORS[spec]()
+    if isinstance(spec, tuple):
+        name, params = spec
+        return INDICATORS[name](**params)
+    return spec
+
+
+@register
+class SMA:
+    name = 'sma'
+
+    def __init__(self, window=20):
+        self.window = window
+        self.outputs = [f"sma_{window}"]
+        self._values = RollingWindow(window)
+
+    def batch(self, kernels):
+        return {self.outputs[0]: kernels.rolling_mean('close', self.window)}
+
+    def update(self, close, high=None, low=None):
+        self._values.update(close)
+        return {self.outputs[0]: self._values.mean()}
+
+
+@register
+class EMA:
+    name = 'ema'
+
+    def __init__(self, span=20):
+        self.span = span
+        self.alpha = 2.0 / (span + 1)
+        self.outputs = [f"ema_{span}"]
+        self._ema = EWM(self.alpha)
+
+    def batch(self, kernels):
+        return {self.outputs[0]: kernels.ewm('close', self.alpha)}
+
+    def update(self, close, high=None, low=None):
+        return {self.outputs[0]: self._ema.update(close)}
+
+
+@register
+class RSI:
+    """
+    RSI over simple rolling means of gains and losses, same values as calculate_rsi.
+    """
+    name = 'rsi'
+
+    def __init__(self, window=14):
+        self.window = window
+        self.outputs = [f"rsi_{window}"]
+        self._gains = RollingWindow(window)
+        self._losses = RollingWindow(window)
+        self._prev_close = None
+
+    def batch(self, kernels):
+        gain = kernels.rolling_mean('gains', self.window)
+        loss = kernels.rolling_mean('losses', self.window)
+        return {self.outputs[0]: rsi_from_sums(gain, loss)}
+
+    def update(self, close, high=None, low=None):
+        delta = 0.0 if self._prev_close is None else close - self._prev_close
+        self._prev_close = close
+        self._gains.update(max(delta, 0.0))
+        self._losses.update(max(-delta, 0.0))
+        if not self._gains.full:
+            return {self.outputs[0]: math.nan}
+        gain, loss = self._gains.sum(), self._losses.sum()
+        if loss == 0:
+            return {self.outputs[0]: math.nan if gain == 0 else 100.0}
+        return {self.outputs[0]: 100 - (100 / (1 + gain / loss))}
+
+
+@register
+class WilderRSI:
+    """
+    RSI over Wilder-smoothed gains and losses (exponential, alpha = 1/window).
+    """
+    name = 'wilder_rsi'
+
+    def __init__(self, window=14):
+        self.window = window
+        self.outputs = [f"wilder_rsi_{window}"]
+        self._gain = EWM(1.0 / window, min_periods=window)
+        self._loss = EWM(1.0 / window, min_periods=window)
+        self._prev_close = None
+
+    def batch(self, kernels):
+        gain = kernels.ewm('gains', 1.0 / self.window, self.window)
+        loss = kernels.ewm('losses', 1.0 / self.window, self.window)
+        return {self.outputs[0]: rsi_from_sums(gain, loss)}
+
+    def update(self, close, high=None, low=None):
+        delta = 0.0 if self._prev_close is None else close - self._prev_close
+        self._prev_close = close
+        gain = self._gain.update(max(delta, 0.0))
+        loss = self._loss.update(max(-delta, 0.0))
+        if math.isnan(gain):
+            return {self.outputs[0]: math.nan}
+        if loss == 0:
+            return {self.outputs[0]: math.nan if gain == 0 else 100.0}
+        return {self.outputs[0]: 100 - (100 / (1 + gain / loss))}
+
+
+@register
+class MACD:
+    name = 'macd'
+
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.fast, self.slow, self.signal = fast, slow, signal
+        suffix = f"{fast}_{slow}_{signal}"
+        self.outputs = [f"macd_{suffix}", f"macd_signal_{suffix}", f"macd_hist_{suffix}"]
+        self._fast = EWM(2.0 / (fast + 1))
+        self._slow = EWM(2.0 / (slow + 1))
+        self._signal = EWM(2.0 / (signal + 1))
+
+    def batch(self, kernels):
+        line_name = f"macd_line_{self.fast}_{self.slow}"
+        if line_name not in kernels.series:
+            kernels.put(line_name, kernels.ewm('close', 2.0 / (self.fast + 1))
+                        - kernels.ewm('close', 2.0 / (self.slow + 1)))
+        line = kernels.get(line_name)
+        signal = kernels.ewm(line_name, 2.0 / (self.signal + 1))
+        return dict(zip(self.outputs, (line, signal, line - signal)))
+
+    def update(self, close, high=None, low=None):
+        line = self._fast.update(close) - self._slow.update(close)
+        signal = self._signal.update(line)
+        return dict(zip(self.outputs, (line, signal, line - signal)))
+
+
+@register
+class Bollinger:
+    name = 'bollinger'
+
+    def __init__(self, window=20, num_std=2.0):
+        self.window = window
+        self.num_std = num_std
+        self.outputs = [f"bb_mid_{window}", f"bb_upper_{window}", f"bb_lower_{window}"]
+        self._values = RollingWindow(window)
+
+    def batch(self, kernels):
+        mid = kernels.rolling_mean('close', self.window)
+        band = self.num_std * kernels.rolling_std('close', self.window)
+        return dict(zip(self.outputs, (mid, mid + band, mid - band)))
+
+    def update(self, close, high=None, low=None):
+        self._values.update(close)
+        mid = self._values.mean()
+        band = self.num_std * self._values.std()
+        return dict(zip(self.outputs, (mid, mid + band, mid - band)))
+
+
+@register
+class ATR:
+    """
+    Average true range with Wilder smoothing. Without high/low the bar-to-bar move is the range.
+    """
+    name = 'atr'
+
+    def __init__(self, window=14):
+        self.window = window
+        self.outputs = [f"atr_{window}"]
+        self._atr = EWM(1.0 / window, min_periods=window)
+        self._prev_close = None
+
+    def batch(self, kernels):
+        return {self.outputs[0]: kernels.ewm('true_range', 1.0 / self.window, self.window)}
+
+    def update(self, close, high=None, low=None):
+        if high is None or low is None:
+            tr = 0.0 if self._prev_close is None else abs(close - self._prev_close)
+        else:
+            tr = high - low
+            if self._prev_close is not None:
+                tr = max(tr, abs(high - self._prev_close), abs(low - self._prev_close))
+        self._prev_close = close
+        return {self.outputs[0]: self._atr.update(tr)}
+
+
+def compute_indicators(specs, close, high=None, low=None):
+    """
+    Compute several indicators over one price buffer, sharing every common kernel.
+
+    Parameters:
+    - specs: list of indicators, registered names or (name, params dict) pairs,
+      e.g. ['rsi', ('ema', {'span': 50}), 'macd'].
+    - close: 1-D array-like of closing prices.
+    - high, low: optional 1-D array-likes, used by ATR.
+
+    Returns:
+    - dict of output column name -> NumPy array.
+    """
+    kernels = Kernels(close, high, low)
+    columns = {}
+    for spec in specs:
+        columns.update(create(spec).batch(kernels))
+    return columns
+
+
+class IndicatorSet:
+    """
+    A fixed set of indicators, computed in batch over history or updated bar by bar.
+    """
+
+    def __init__(self, specs):
+        self.indicators = [create(spec) for spec in specs]
+        self.outputs = [name for indicator in self.indicators for name in indicator.outputs]
+
+    def batch(self, close, high=None, low=None):
+        return compute_indicators(self.indicators, close, high, low)
+
+    def frame(self, data):
+        """
+        Return a copy of a bars DataFrame with every indicator output added as a column.
+        """
+        high = data['high'] if 'high' in data else None
+        low = data['low'] if 'low' in data else None
+        return data.assign(**self.batch(data['close'], high, low))
+
+    def update(self, close, high=None, low=None):
+        """
+        Advance every indicator by one bar in O(1).
+
+        Returns:
+        - dict of output column name -> value for this bar.
+        """
+        values = {}
+        for indicator in self.indicators:
+            values.update(indicator.update(close, high, low))
+        return values
+
+
+def available_indicators():
+    """
+    Registered indicator names.
+    """
+    return sorted(INDICATORS)
@@ -1,5 +1,5 @@
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 
 def calculate_rsi(series, window=14):
     """
@@ -25,25 +25,51 @@ def calculate_rsi(series, window=14):
 
     return rsi
 
-def generate_signals(data, cooldown_period=5):
+def generate_signal_array(rsi, cooldown_period=5, oversold=30, overbought=70):
+    """
+    Generate buy and sell signals from an RSI array in linear time.
+
+    Parameters:
+    - rsi: 1-D array-like of RSI values.
+    - cooldown_period: int, the number of periods to wait before generating a new signal.
+    - oversold: float, RSI level below which two consecutive bars trigger a buy.
+    - overbought: float, RSI level above which two consecutive bars trigger a sell.
+
+    Returns:
+    - numpy int8 array of signals (1 = buy, -1 = sell, 0 = no signal).
+    """
+    rsi = np.asarray(rsi, dtype=np.float64)
+
+    # Consecutive-bar threshold conditions, NaN never satisfies either
+    buy = rsi < oversold
+    sell = rsi > overbought
+    buy[1:] &= buy[:-1]
+    sell[1:] &= sell[:-1]
+    if len(rsi):
+        buy[0] = sell[0] = False
+
+    # Only the cooldown state machine is sequential, and it only visits candidate bars
+    signal = np.zeros(len(rsi), dtype=np.int8)
+    last_trade_index = -cooldown_period  # Initialize with a negative cooldown
+    for i in np.flatnonzero(buy | sell).tolist():
+        if i - last_trade_index >= cooldown_period:
+            signal[i] = 1 if buy[i] else -1
+            last_trade_index = i
+    return signal
+
+def generate_signals(data, cooldown_period=5, oversold=30, overbought=70):
     """
     Generate buy and sell signals based on RSI with consecutive conditions and cooldown.
 
     Parameters:
     - data: DataFrame containing 'close' prices and 'RSI'.
     - cooldown_period: int, the number of periods to wait before generating a new signal.
+    - oversold: float, RSI level that must be undercut on two consecutive bars to buy (default is 30).
+    - overbought: float, RSI level that must be exceeded on two consecutive bars to sell (default is 70).
 
     Returns:
     - Updated DataFrame with 'Signal' column.
     """
-    data['Signal'] = 0  # Default to no signal
-    last_trade_index = -cooldown_period  # Initialize with a negative cooldown
-
-    for i in range(len(data)):
-        if (data['RSI'].iloc[i] < 30 and data['RSI'].shift(1).iloc[i] < 30) and (i - last_trade_index >= cooldown_period):
-            data['Signal'].iloc[i] = 1  # Buy signal
-            last_trade_index = i
-        elif (data['RSI'].iloc[i] > 70 and data['RSI'].shift(1).iloc[i] > 70) and (i - last_trade_index >= cooldown_period):
-            data['Signal'].iloc[i] = -1  # Sell signal
-            last_trade_index = i
+    data['Signal'] = generate_signal_array(data['RSI'].to_numpy(), cooldown_period=cooldown_period,
+                                           oversold=oversold, overbought=overbought)
     return data
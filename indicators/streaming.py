@@ -0,0 +1,294 @@
+import json
+import math
+import os
+
+import numpy as np
+
+
+class StreamingRSI:
+    """
+    Incremental RSI plus the generate_signals state machine.
+
+    Each call to update() consumes one bar in O(1) time and gives the same RSI
+    and signal that calculate_rsi/generate_signals would give for that bar when
+    run over the full history (with the RSI warm-up rows dropped).
+    """
+
+    def __init__(self, window=14, cooldown_period=5, oversold=30, overbought=70):
+        self.window = window
+        self.cooldown_period = cooldown_period
+        self.oversold = oversold
+        self.overbought = overbought
+
+        self._gains = [0.0] * window
+        self._losses = [0.0] * window
+        self._pos = 0
+        self._count = 0
+        self._gain_sum = 0.0
+        self._loss_sum = 0.0
+
+        self.prev_close = None
+        self.prev_rsi = math.nan
+        self.rsi = math.nan
+        self.signal = 0
+        self.last_timestamp = None
+        # Number of valid-RSI bars since the last signal, starts as if one happened cooldown bars ago
+        self._since_signal = cooldown_period - 1
+
+    def update(self, close, timestamp=None):
+        """
+        Consume one bar.
+
+        Parameters:
+        - close: float, the bar's closing price.
+        - timestamp: int, optional bar timestamp (e.g., epoch nanoseconds), kept for resuming.
+
+        Returns:
+        - int signal for this bar (1 = buy, -1 = sell, 0 = no signal).
+        """
+        close = float(close)
+        # Like series.diff() followed by where(..., 0), the first bar counts as no change
+        delta = 0.0 if self.prev_close is None else close - self.prev_close
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        self.prev_close = close
+        if timestamp is not None:
+            self.last_timestamp = timestamp
+
+        pos = self._pos
+        self._gain_sum += gain - self._gains[pos]
+        self._loss_sum += loss - self._losses[pos]
+        self._gains[pos] = gain
+        self._losses[pos] = loss
+        self._pos = (pos + 1) % self.window
+        if self._pos == 0:
+            # Re-sum once per window so floating-point drift never accumulates
+            self._gain_sum = math.fsum(self._gains)
+            self._loss_sum = math.fsum(self._losses)
+        self._count += 1
+
+        self.signal = 0
+        if self._count < self.window:
+            self.rsi = math.nan
+            return self.signal
+
+        if self._loss_sum == 0:
+            self.rsi = math.nan if self._gain_sum == 0 else 100.0
+        else:
+            rs = self._gain_sum / self._loss_sum
+            self.rsi = 100 - (100 / (1 + rs))
+
+        # Bars without a valid RSI are dropped before signal generation, so they do not advance the state
+        if math.isnan(self.rsi):
+            return self.signal
+
+        self._since_signal += 1
+        if self._since_signal >= self.cooldown_period:
+            if self.rsi < self.oversold and self.prev_rsi < self.oversold:
+                self.signal = 1
+            elif self.rsi > self.overbought and self.prev_rsi > self.overbought:
+                self.signal = -1
+            if self.signal != 0:
+                self._since_signal = 0
+        self.prev_rsi = self.rsi
+        return self.signal
+
+    def seed(self, closes, timestamps=None):
+        """
+        Warm up the state from historical closes (oldest first).
+
+        Parameters:
+        - closes: iterable of closing prices.
+        - timestamps: optional iterable of matching bar timestamps.
+
+        Returns:
+        - int signal of the last bar consumed.
+        """
+        if timestamps is None:
+            for close in closes:
+                self.update(close)
+        else:
+            for close, timestamp in zip(closes, timestamps):
+                self.update(close, timestamp)
+        return self.signal
+
+    def to_dict(self):
+        """
+        Return the full state as a JSON-serializable dict.
+        """
+        return {
+            'window': self.window,
+            'cooldown_period': self.cooldown_period,
+            'oversold': self.oversold,
+            'overbought': self.overbought,
+            'gains': list(self._gains),
+            'losses': list(self._losses),
+            'pos': self._pos,
+            'count': self._count,
+            'prev_close': self.prev_close,
+            'prev_rsi': None if math.isnan(self.prev_rsi) else self.prev_rsi,
+            'rsi': None if math.isnan(self.rsi) else self.rsi,
+            'signal': self.signal,
+            'since_signal': self._since_signal,
+            'last_timestamp': self.last_timestamp,
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        """
+        Rebuild a StreamingRSI from the output of to_dict().
+        """
+        obj = cls(state['window'], state['cooldown_period'], state['oversold'], state['overbought'])
+        obj._gains = [float(v) for v in state['gains']]
+        obj._losses = [float(v) for v in state['losses']]
+        obj._pos = state['pos']
+        obj._count = state['count']
+        obj._gain_sum = math.fsum(obj._gains)
+        obj._loss_sum = math.fsum(obj._losses)
+        obj.prev_close = state['prev_close']
+        obj.prev_rsi = math.nan if state['prev_rsi'] is None else state['prev_rsi']
+        obj.rsi = math.nan if state['rsi'] is None else state['rsi']
+        obj.signal = state['signal']
+        obj._since_signal = state['since_signal']
+        obj.last_timestamp = state['last_timestamp']
+        return obj
+
+    def save(self, path):
+        """
+        Write the state to a JSON file atomically.
+        """
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a state previously written with save().
+        """
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+class RSIStateTable:
+    """
+    StreamingRSI state for many symbols at once, stored column-wise in NumPy arrays.
+
+    update() advances any subset of symbols by one bar each with whole-array
+    operations, so a cycle over hundreds of symbols costs a handful of vector ops
+    instead of one Python object update per symbol.
+    """
+
+    def __init__(self, symbols, window=14, cooldown_period=5, oversold=30, overbought=70):
+        self.symbols = list(symbols)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.window = window
+        self.cooldown_period = cooldown_period
+        self.oversold = oversold
+        self.overbought = overbought
+
+        n = len(self.symbols)
+        self.gains = np.zeros((n, window))
+        self.losses = np.zeros((n, window))
+        self.pos = np.zeros(n, dtype=np.int64)
+        self.count = np.zeros(n, dtype=np.int64)
+        self.gain_sum = np.zeros(n)
+        self.loss_sum = np.zeros(n)
+        self.prev_close = np.full(n, np.nan)
+        self.prev_rsi = np.full(n, np.nan)
+        self.rsi = np.full(n, np.nan)
+        self.signal = np.zeros(n, dtype=np.int8)
+        self.since_signal = np.full(n, cooldown_period - 1, dtype=np.int64)
+        self.last_timestamp = np.full(n, -1, dtype=np.int64)
+
+    def update(self, idx, close, timestamp=None):
+        """
+        Consume one bar for each of the given symbols.
+
+        Parameters:
+        - idx: int array of row indices (each symbol at most once).
+        - close: float array of closing prices, aligned with idx.
+        - timestamp: optional int64 array of bar timestamps (epoch nanoseconds).
+
+        Returns:
+        - int8 array of signals for the given rows (1 = buy, -1 = sell, 0 = no signal).
+        """
+        idx = np.asarray(idx, dtype=np.int64)
+        close = np.asarray(close, dtype=np.float64)
+
+        delta = close - self.prev_close[idx]
+        delta[np.isnan(delta)] = 0.0  # First bar of a symbol counts as no change
+        gain = np.where(delta > 0, delta, 0.0)
+        loss = np.where(delta < 0, -delta, 0.0)
+        self.prev_close[idx] = close
+        if timestamp is not None:
+            self.last_timestamp[idx] = timestamp
+
+        pos = self.pos[idx]
+        self.gain_sum[idx] += gain - self.gains[idx, pos]
+        self.loss_sum[idx] += loss - self.losses[idx, pos]
+        self.gains[idx, pos] = gain
+        self.losses[idx, pos] = loss
+        pos = (pos + 1) % self.window
+        self.pos[idx] = pos
+        wrapped = idx[pos == 0]
+        if len(wrapped):
+            # Re-sum once per window so floating-point drift never accumulates
+            self.gain_sum[wrapped] = self.gains[wrapped].sum(axis=1)
+            self.loss_sum[wrapped] = self.losses[wrapped].sum(axis=1)
+        self.count[idx] += 1
+
+        gain_sum = self.gain_sum[idx]
+        loss_sum = self.loss_sum[idx]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = 100 - (100 / (1 + gain_sum / loss_sum))
+        rsi[self.count[idx] < self.window] = np.nan
+        self.rsi[idx] = rsi
+
+        # Bars without a valid RSI do not advance the signal state, as in StreamingRSI
+        valid = ~np.isnan(rsi)
+        live = idx[valid]
+        rsi = rsi[valid]
+        prev_rsi = self.prev_rsi[live]
+        since = self.since_signal[live] + 1
+        ready = since >= self.cooldown_period
+        buy = ready & (rsi < self.oversold) & (prev_rsi < self.oversold)
+        sell = ready & ~buy & (rsi > self.overbought) & (prev_rsi > self.overbought)
+        signal = buy.astype(np.int8) - sell.astype(np.int8)
+        since[signal != 0] = 0
+        self.since_signal[live] = since
+        self.prev_rsi[live] = rsi
+
+        self.signal[idx] = 0
+        self.signal[live] = signal
+        return self.signal[idx]
+
+    def save(self, path):
+        """
+        Write the table to a compressed .npz file atomically.
+        """
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(
+            tmp_path, symbols=np.array(self.symbols),
+            params=np.array([self.window, self.cooldown_period, self.oversold, self.overbought], dtype=np.float64),
+            gains=self.gains, losses=self.losses, pos=self.pos, count=self.count,
+            prev_close=self.prev_close, prev_rsi=self.prev_rsi, rsi=self.rsi, signal=self.signal,
+            since_signal=self.since_signal, last_timestamp=self.last_timestamp,
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a table previously written with save().
+        """
+        with np.load(path) as f:
+            window, cooldown_period, oversold, overbought = f['params'].tolist()
+            table = cls(f['symbols'].tolist(), int(window), int(cooldown_period), oversold, overbought)
+            for name in ('gains', 'losses', 'pos', 'count', 'prev_close', 'prev_rsi', 'rsi', 'signal',
+                         'since_signal', 'last_timestamp'):
+                setattr(table, name, f[name].copy())
+        table.gain_sum = table.gains.sum(axis=1)
+        table.loss_sum = table.losses.sum(axis=1)
+        return table
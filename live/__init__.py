@@ -0,0 +1,2 @@
+# live/__init__.py
+# This file makes 'live' a package
\ No newline at end of file
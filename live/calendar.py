@@ -0,0 +1,188 @@
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from utils.bar_cache import to_epoch_ns
+
+MARKET_TZ = 'America/New_York'
+REGULAR_OPEN = '09:30'
+REGULAR_CLOSE = '16:00'
+CALENDAR_PATH = os.path.join('state', 'calendar.json')
+
+
+def weekday_sessions(start, end):
+    """
+    Static fallback calendar: regular 9:30-16:00 sessions on every weekday (holidays are not known).
+
+    Returns:
+    - list of [date, open, close] strings for the dates from start to end (inclusive).
+    """
+    dates = pd.bdate_range(start, end)
+    return [[date.strftime('%Y-%m-%d'), REGULAR_OPEN, REGULAR_CLOSE] for date in dates]
+
+
+def _session_row(day):
+    # Calendar entities parse their fields, raw responses (and mocks) carry the strings
+    if isinstance(day, dict):
+        return [str(day['date'])[:10], str(day['open'])[:5], str(day['close'])[:5]]
+    return [day.date.strftime('%Y-%m-%d'), day.open.strftime('%H:%M'), day.close.strftime('%H:%M')]
+
+
+class TradingCalendar:
+    """
+    Locally cached market calendar.
+
+    Sessions (date, open and close times, including early closes and holidays)
+    are fetched with one get_calendar call per day and kept on disk, so session
+    state, the next open and the next close are answered from NumPy arrays with
+    no network calls. Without an API (or if it fails) regular weekday sessions
+    are used.
+    """
+
+    def __init__(self, api=None, path=CALENDAR_PATH, days_back=7, days_ahead=30, refresh_every=86400, clock=None):
+        """
+        Parameters:
+        - api: Alpaca REST client, None to use the weekday fallback only.
+        - path: str, the on-disk cache (None to keep it in memory only).
+        - days_back, days_ahead: int, the calendar range fetched around today.
+        - refresh_every: int, seconds before the calendar is fetched again.
+        - clock: callable returning the current time in seconds (default time.time).
+        """
+        self.api = api
+        self.path = path
+        self.days_back = days_back
+        self.days_ahead = days_ahead
+        self.refresh_every = refresh_every
+        self.clock = clock or time.time
+        self.fetched_at = None
+        self.opens = np.empty(0)
+        self.closes = np.empty(0)
+        self.sessions = []
+        self._load()
+
+    def _load(self):
+        if self.path is None or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                cached = json.load(f)
+            self._set_sessions(cached['sessions'])
+            self.fetched_at = cached['fetched_at']
+        except (ValueError, KeyError) as e:
+            print(f"Ignoring unreadable calendar cache {self.path}: {e}")
+
+    def _set_sessions(self, sessions):
+        opens = pd.to_datetime([f"{date} {open_time}" for date, open_time, _ in sessions])
+        closes = pd.to_datetime([f"{date} {close_time}" for date, _, close_time in sessions])
+        self.opens = to_epoch_ns(opens.tz_localize(MARKET_TZ)) / 1e9
+        self.closes = to_epoch_ns(closes.tz_localize(MARKET_TZ)) / 1e9
+        order = np.argsort(self.opens)
+        self.opens, self.closes = self.opens[order], self.closes[order]
+        self.sessions = sessions
+
+    def refresh(self, now=None):
+        """
+        Fetch the calendar around today (one REST call) and cache it, falling back to weekday sessions.
+        """
+        now = self.clock() if now is None else now
+        today = pd.Timestamp(now, unit='s', tz='UTC').tz_convert(MARKET_TZ).date()
+        start, end = today - timedelta(days=self.days_back), today + timedelta(days=self.days_ahead)
+        sessions = None
+        if self.api is not None:
+            try:
+                sessions = [_session_row(day) for day in self.api.get_calendar(start.isoformat(), end.isoformat())]
+            except Exception as e:
+                print(f"Error fetching the market calendar, using regular weekday sessions: {e}")
+        if not sessions:
+            sessions = weekday_sessions(start, end)
+
+        self._set_sessions(sessions)
+        self.fetched_at = now
+        if self.path is not None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({'fetched_at': now, 'sessions': sessions}, f)
+            os.replace(tmp_path, self.path)
+
+    def _ensure(self, now):
+        # Refresh once per refresh_every, or early if now runs past the cached sessions
+        if (self.fetched_at is None or now - self.fetched_at >= self.refresh_every
+                or not len(self.closes) or now >= self.closes[-1]):
+            self.refresh(now)
+
+    def _session_index(self, now):
+        # Index of the first session that has not closed yet
+        self._ensure(now)
+        return int(np.searchsorted(self.closes, now, side='right'))
+
+    def is_open(self, now=None):
+        now = self.clock() if now is None else now
+        i = self._session_index(now)
+        return i < len(self.opens) and self.opens[i] <= now
+
+    def session(self, now=None):
+        """
+        The current session, or the next one when the market is closed.
+
+        Returns:
+        - (open, close) in epoch seconds, or None past the end of the calendar.
+        """
+        now = self.clock() if now is None else now
+        i = self._session_index(now)
+        if i >= len(self.opens):
+            return None
+        return float(self.opens[i]), float(self.closes[i])
+
+    def next_open(self, now=None):
+        """
+        Epoch seconds of the next session open after `now` (None past the end of the calendar).
+        """
+        now = self.clock() if now is None else now
+        self._ensure(now)
+        i = int(np.searchsorted(self.opens, now, side='right'))
+        return float(self.opens[i]) if i < len(self.opens) else None
+
+    def last_close(self, now=None):
+        """
+        Epoch seconds of the latest session close at or before `now` (None before the start of the calendar).
+        """
+        now = self.clock() if now is None else now
+        self._ensure(now)
+        i = int(np.searchsorted(self.closes, now, side='right')) - 1
+        return float(self.closes[i]) if i >= 0 else None
+
+    def next_close(self, now=None):
+        """
+        Epoch seconds of the current (or next) session close.
+        """
+        session = self.session(now)
+        return None if session is None else session[1]
+
+    def seconds_until_open(self, now=None):
+        """
+        0 while the market is open, otherwise the seconds until the next open.
+        """
+        now = self.clock() if now is None else now
+        if self.is_open(now):
+            return 0.0
+        next_open = self.next_open(now)
+        return None if next_open is None else next_open - now
+
+    def wait_until_open(self, sleep=time.sleep, max_sleep=3600):
+        """
+        Sleep until the market opens, at most max_sleep seconds per nap so a calendar refresh is picked up.
+        """
+        while True:
+            wait = self.seconds_until_open()
+            if wait is None:
+                wait = max_sleep
+            if wait <= 0:
+                return
+            next_open = datetime.fromtimestamp(self.clock() + wait).astimezone()
+            print(f"Market is CLOSED. Sleeping {wait / 60:.0f} min until the open at {next_open:%Y-%m-%d %H:%M %Z}.")
+            sleep(min(wait, max_sleep))
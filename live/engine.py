@@ -0,0 +1,182 @@
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from indicators.streaming import RSIStateTable
+from backtest.results import SECONDS_PER_SESSION
+from live.scheduler import INTERVAL_SECONDS
+from utils.alpaca_fetcher_live import map_timeframe
+from utils.bar_buffer import parse_bar_times
+from utils.metrics import METRICS
+
+
+class MultiSymbolEngine:
+    """
+    Live RSI trading over a whole symbol universe from a single process.
+
+    Each cycle fetches new bars for every symbol with batched multi-symbol
+    requests, advances all per-symbol RSI/signal states in one vectorized pass
+    (RSIStateTable), and submits the resulting orders concurrently on a bounded
+    thread pool.
+    """
+
+    def __init__(self, api, symbols, execute, interval='minute', qty=1, window=14, cooldown_period=5,
+                 catch_up=5, history=500, batch_size=100, max_workers=8, metrics=None):
+        """
+        Parameters:
+        - api: Alpaca REST client (or a compatible mock).
+        - symbols: list of str, the symbol universe.
+        - execute: callable(symbol, signal, qty, price), used to place each order at the last close.
+        - interval: str, the data interval ('minute', '15Min', '1H', '1D').
+        - qty: int, the number of shares to trade per order.
+        - window: int, the RSI window.
+        - cooldown_period: int, cooldown between signals (in bars) and between trades (in minutes).
+        - catch_up: int, how many bar intervals back to request while no symbol has a bar yet.
+        - history: int, the number of bars seeded per symbol, also bounds how far back a cycle replays.
+        - batch_size: int, the number of symbols per multi-symbol bars request.
+        - max_workers: int, the maximum number of concurrent bar requests and order submissions.
+        - metrics: utils.metrics.Metrics receiving the stage timings of every cycle (default is the shared one).
+        """
+        self.api = api
+        self.symbols = list(symbols)
+        self.execute = execute
+        self.interval = interval
+        self.timeframe = map_timeframe(interval)
+        self.qty = qty
+        self.cooldown_period = cooldown_period
+        self.catch_up = catch_up
+        self.history = history
+        self.batch_size = batch_size
+        self.table = RSIStateTable(self.symbols, window=window, cooldown_period=cooldown_period)
+        self.last_trade_time = np.full(len(self.symbols), -np.inf)
+        self.pool = ThreadPoolExecutor(max_workers=max_workers)
+        self.pending_orders = set()
+        self.metrics = metrics if metrics is not None else METRICS
+
+    def lookback(self, history):
+        """
+        Calendar time spanning `history` bars: whole trading sessions plus a weekend/holiday margin.
+        """
+        bars_per_session = max(1, int(SECONDS_PER_SESSION // INTERVAL_SECONDS[self.interval]))
+        sessions = math.ceil(history / bars_per_session)
+        return timedelta(days=math.ceil(sessions * 7 / 5) + 4)
+
+    def _fetch_batch(self, batch, start):
+        return list(self.api.get_bars_iter(batch, self.timeframe, start=start, raw=True))
+
+    def fetch_bars(self, start=None):
+        """
+        Fetch bars for the whole universe with batched multi-symbol requests.
+
+        Parameters:
+        - start: datetime, earliest bar to request (default is the oldest last bar of the seeded symbols,
+          at most the seed history back, so bars missed by a stall or an overrun cycle are replayed).
+
+        Returns:
+        - tuple of NumPy arrays (symbol_index, timestamp_ns, close).
+        """
+        if start is None:
+            now = datetime.now(timezone.utc)
+            seeded = self.table.last_timestamp[self.table.last_timestamp >= 0]
+            if len(seeded):
+                start = max(datetime.fromtimestamp(int(seeded.min()) / 1e9, tz=timezone.utc),
+                            now - self.lookback(self.history))
+            else:
+                start = now - timedelta(seconds=INTERVAL_SECONDS[self.interval] * self.catch_up)
+        start = start.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+        batches = [self.symbols[i:i + self.batch_size] for i in range(0, len(self.symbols), self.batch_size)]
+        bars = []
+        for result in self.pool.map(lambda batch: self._fetch_batch(batch, start), batches):
+            bars.extend(result)
+        if not bars:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+
+        index = self.table.index
+        symbol_index = np.fromiter((index[bar['S']] for bar in bars), dtype=np.int64, count=len(bars))
+        timestamps = parse_bar_times(bar['t'] for bar in bars)
+        close = np.fromiter((bar['c'] for bar in bars), dtype=np.float64, count=len(bars))
+        return symbol_index, timestamps, close
+
+    def seed(self, history=None):
+        """
+        Warm up every symbol's state from recent history (default is self.history bars).
+        """
+        start = datetime.now(timezone.utc) - self.lookback(self.history if history is None else history)
+        self.evaluate(*self.fetch_bars(start=start))
+
+    def evaluate(self, symbol_index, timestamps, close):
+        """
+        Feed bars not seen yet into the state table, oldest first, in one pass per bar depth.
+
+        Returns:
+        - int8 array with the newest signal of every symbol (0 where no new bar arrived).
+        """
+        latest = np.zeros(len(self.symbols), dtype=np.int8)
+        new = timestamps > self.table.last_timestamp[symbol_index]
+        symbol_index, timestamps, close = symbol_index[new], timestamps[new], close[new]
+        if not len(symbol_index):
+            return latest
+
+        order = np.lexsort((timestamps, symbol_index))
+        symbol_index, timestamps, close = symbol_index[order], timestamps[order], close[order]
+
+        # Depth of each bar within its symbol, every round advances each symbol by at most one bar
+        starts = np.flatnonzero(np.r_[True, symbol_index[1:] != symbol_index[:-1]])
+        counts = np.diff(np.r_[starts, len(symbol_index)])
+        depth = np.arange(len(symbol_index)) - np.repeat(starts, counts)
+        for d in range(int(depth.max()) + 1):
+            rows = depth == d
+            latest[symbol_index[rows]] = self.table.update(symbol_index[rows], close[rows], timestamps[rows])
+        return latest
+
+    def submit(self, signals):
+        """
+        Submit orders for every symbol with a non-zero signal outside its cooldown.
+
+        Returns:
+        - list of symbols an order was submitted for.
+        """
+        now = time.time()
+        ready = (signals != 0) & (now - self.last_trade_time >= self.cooldown_period * 60)
+        submitted = []
+        for i in np.flatnonzero(ready).tolist():
+            symbol = self.symbols[i]
+            self.last_trade_time[i] = now
+            future = self.pool.submit(self.execute, symbol, int(signals[i]), self.qty, float(self.table.prev_close[i]))
+            self.pending_orders.add(future)
+            future.add_done_callback(self.pending_orders.discard)
+            submitted.append(symbol)
+        return submitted
+
+    def run_cycle(self):
+        """
+        Run one fetch/evaluate/submit cycle.
+
+        Returns:
+        - dict with the cycle's bar count, submitted symbols and stage timings (seconds).
+        """
+        start = time.perf_counter()
+        bars = self.fetch_bars()
+        fetched = time.perf_counter()
+        signals = self.evaluate(*bars)
+        evaluated = time.perf_counter()
+        submitted = self.submit(signals)
+        done = time.perf_counter()
+        # Signals come out of the same vectorized pass as the RSI, so both are timed as 'indicator'
+        self.metrics.observe('fetch', fetched - start, mode='universe')
+        self.metrics.observe('indicator', evaluated - fetched, mode='universe')
+        self.metrics.observe('dispatch', done - evaluated, mode='universe')
+        self.metrics.inc('bars', len(bars[0]))
+        self.metrics.inc('signals', int(np.count_nonzero(signals)))
+        return {
+            'bars': len(bars[0]),
+            'submitted': submitted,
+            'fetch': fetched - start,
+            'evaluate': evaluated - fetched,
+            'submit': done - evaluated,
+            'total': done - start,
+        }
@@ -0,0 +1,255 @@
+import bisect
+import itertools
+import threading
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pandas as pd
+
+from live.calendar import weekday_sessions
+
+
+class MockAPIError(Exception):
+    """
+    Error raised by MockBroker, shaped like alpaca_trade_api.rest.APIError (has status_code).
+    """
+
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class MockBroker:
+    """
+    In-process stand-in for the Alpaca REST client, for offline order throughput and latency tests.
+
+    Implements the calls the live code uses (account, positions, orders, latest trade, clock,
+    calendar, and raw bars published with add_bar) with configurable request latency, fill delay, slippage and a requests-per-second rate limit
+    that answers HTTP 429 like Alpaca does. Market orders fill at the last set price once their
+    fill delay has passed; fills are also pushed to trade_updates-style subscribers.
+    """
+
+    def __init__(self, cash=100000, prices=None, latency=0.0, fill_delay=0.0, slippage=0.0, rate_limit=None,
+                 clock=None):
+        """
+        Parameters:
+        - cash: float, starting cash.
+        - prices: dict of symbol -> last price.
+        - latency: float, seconds every request sleeps, simulating the network round trip.
+        - fill_delay: float, seconds between accepting a market order and filling it (0 fills on submit).
+        - slippage: float, fractional price move against the order on every fill.
+        - rate_limit: int, requests per second above which requests fail with status 429 (None is unlimited).
+        - clock: callable returning the current time in seconds (default time.time), e.g. a simulated clock.
+        """
+        self.cash = float(cash)
+        self.prices = dict(prices or {})
+        self.latency = latency
+        self.fill_delay = fill_delay
+        self.slippage = slippage
+        self.rate_limit = rate_limit
+        self.clock = clock or time.time
+        self.market_open = True
+        self.positions = {}  # symbol -> {'qty': float, 'avg_entry_price': float}
+        self.orders = {}  # order id -> SimpleNamespace, Alpaca order fields
+        self.client_ids = {}  # client_order_id -> order id
+        self.open_ids = []  # ids of orders waiting to fill, oldest first
+        self.subscribers = []
+        self.bars = {}  # symbol -> raw bar dicts, oldest first
+        self.bar_times = {}  # symbol -> bar timestamps (epoch nanoseconds), aligned with bars
+        self.request_count = 0
+        self.rejected_count = 0
+        self._ids = itertools.count(1)
+        self._window_start = 0.0
+        self._window_requests = 0
+        self._lock = threading.RLock()
+
+    def _request(self):
+        # Every REST call pays the latency, counts against the rate limit and advances pending fills
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.request_count += 1
+            if self.rate_limit is not None:
+                now = time.monotonic()
+                if now - self._window_start >= 1.0:
+                    self._window_start = now
+                    self._window_requests = 0
+                self._window_requests += 1
+                if self._window_requests > self.rate_limit:
+                    self.rejected_count += 1
+                    raise MockAPIError('too many requests', 429)
+            self.process_fills()
+
+    def subscribe(self, callback):
+        """
+        Register a callable(update) receiving trade_updates-style dicts for every fill.
+        """
+        self.subscribers.append(callback)
+
+    def set_price(self, symbol, price):
+        with self._lock:
+            self.prices[symbol] = float(price)
+
+    def process_fills(self):
+        """
+        Fill every open market order whose fill delay has passed.
+        """
+        updates = []
+        with self._lock:
+            now = self.clock()
+            still_open = []
+            for order_id in self.open_ids:
+                order = self.orders[order_id]
+                if order.status != 'new':
+                    continue
+                if now < order.fill_at:
+                    still_open.append(order_id)
+                    continue
+                updates.append(self._fill(order, now))
+            self.open_ids = still_open
+        for update in updates:
+            for callback in self.subscribers:
+                callback(update)
+
+    def _fill(self, order, now):
+        qty = float(order.qty)
+        direction = 1 if order.side == 'buy' else -1
+        price = self.prices[order.symbol] * (1 + direction * self.slippage)
+        position = self.positions.setdefault(order.symbol, {'qty': 0.0, 'avg_entry_price': 0.0})
+        if order.side == 'buy':
+            total = position['qty'] + qty
+            position['avg_entry_price'] = (position['qty'] * position['avg_entry_price'] + qty * price) / total
+            position['qty'] = total
+        else:
+            position['qty'] -= qty
+        if position['qty'] <= 0:
+            del self.positions[order.symbol]
+        self.cash -= direction * qty * price
+
+        order.status = 'filled'
+        order.filled_qty = str(qty)
+        order.filled_avg_price = str(price)
+        order.filled_at = now
+        return {'event': 'fill', 'qty': str(qty), 'price': str(price), 'timestamp': now, 'order': vars(order).copy()}
+
+    def get_account(self):
+        self._request()
+        with self._lock:
+            equity = self.cash + sum(position['qty'] * self.prices.get(symbol, position['avg_entry_price'])
+                                     for symbol, position in self.positions.items())
+            return SimpleNamespace(cash=str(self.cash), equity=str(equity), buying_power=str(self.cash))
+
+    def list_positions(self):
+        self._request()
+        with self._lock:
+            return [SimpleNamespace(symbol=symbol, qty=str(position['qty']),
+                                    avg_entry_price=str(position['avg_entry_price']))
+                    for symbol, position in self.positions.items()]
+
+    def get_position(self, symbol):
+        self._request()
+        with self._lock:
+            position = self.positions.get(symbol)
+            if position is None:
+                raise MockAPIError('position does not exist', 404)
+            return SimpleNamespace(symbol=symbol, qty=str(position['qty']),
+                                   avg_entry_price=str(position['avg_entry_price']))
+
+    def list_orders(self, status='open', **kwargs):
+        self._request()
+        with self._lock:
+            if status == 'open':
+                return [SimpleNamespace(**vars(self.orders[order_id])) for order_id in self.open_ids
+                        if self.orders[order_id].status == 'new']
+            return [SimpleNamespace(**vars(order)) for order in self.orders.values()
+                    if status == 'all' or order.status != 'new']
+
+    def get_order(self, order_id):
+        self._request()
+        with self._lock:
+            if order_id not in self.orders:
+                raise MockAPIError('order not found', 404)
+            return SimpleNamespace(**vars(self.orders[order_id]))
+
+    def get_order_by_client_order_id(self, client_order_id):
+        self._request()
+        with self._lock:
+            order_id = self.client_ids.get(client_order_id)
+            if order_id is None:
+                raise MockAPIError('order not found', 404)
+            return SimpleNamespace(**vars(self.orders[order_id]))
+
+    def submit_order(self, symbol, qty, side, type='market', time_in_force='gtc', client_order_id=None, **kwargs):
+        self._request()
+        with self._lock:
+            if symbol not in self.prices:
+                raise MockAPIError(f'no price for {symbol}', 422)
+            if client_order_id is not None and client_order_id in self.client_ids:
+                raise MockAPIError('client_order_id must be unique', 422)
+            now = self.clock()
+            order = SimpleNamespace(id=str(next(self._ids)), client_order_id=client_order_id, symbol=symbol,
+                                    qty=str(qty), side=side, type=type, time_in_force=time_in_force, status='new',
+                                    filled_qty='0', filled_avg_price=None, submitted_at=now, filled_at=None,
+                                    fill_at=now + self.fill_delay)
+            self.orders[order.id] = order
+            if client_order_id is not None:
+                self.client_ids[client_order_id] = order.id
+            self.open_ids.append(order.id)
+        if self.fill_delay <= 0:
+            self.process_fills()
+        with self._lock:
+            return SimpleNamespace(**vars(order))
+
+    def cancel_order(self, order_id):
+        self._request()
+        with self._lock:
+            order = self.orders.get(order_id)
+            if order is not None and order.status == 'new':
+                order.status = 'canceled'
+
+    def get_latest_trade(self, symbol):
+        self._request()
+        with self._lock:
+            return SimpleNamespace(symbol=symbol, price=self.prices[symbol])
+
+    def get_clock(self):
+        self._request()
+        return SimpleNamespace(is_open=self.market_open, next_open=None, next_close=None)
+
+    def add_bar(self, symbol, timestamp, close, open=None, high=None, low=None, volume=0):
+        """
+        Publish a bar (timestamp in epoch nanoseconds) for get_bars_iter and make its close the symbol's price.
+        """
+        bar = {
+            't': datetime.fromtimestamp(timestamp / 1e9, tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'o': close if open is None else open, 'h': close if high is None else high,
+            'l': close if low is None else low, 'c': close, 'v': volume,
+        }
+        with self._lock:
+            self.bars.setdefault(symbol, []).append(bar)
+            self.bar_times.setdefault(symbol, []).append(timestamp)
+            self.prices[symbol] = float(close)
+
+    def get_bars_iter(self, symbol, timeframe=None, start=None, end=None, limit=None, raw=True, **kwargs):
+        """
+        Published bars of one or more symbols from `start`, the newest `limit` per symbol (raw dicts with 'S').
+        """
+        self._request()
+        symbols = [symbol] if isinstance(symbol, str) else symbol
+        start_ns = None if start is None else pd.Timestamp(start).value
+        result = []
+        with self._lock:
+            for name in symbols:
+                times = self.bar_times.get(name, [])
+                first = 0 if start_ns is None else bisect.bisect_left(times, start_ns)
+                if limit is not None:
+                    first = max(first, len(times) - limit)
+                result.extend(dict(bar, S=name) for bar in self.bars.get(name, [])[first:])
+        return iter(result)
+
+    def get_calendar(self, start=None, end=None):
+        self._request()
+        # Regular weekday sessions, the same shape as the raw calendar response
+        return [{'date': date, 'open': open_time, 'close': close_time}
+                for date, open_time, close_time in weekday_sessions(start, end)]
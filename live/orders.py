@@ -0,0 +1,315 @@
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+from live.portfolio import CLOSED_STATUSES, _field
+from utils.metrics import METRICS
+
+
+def is_retryable(error):
+    """
+    Whether a REST error is worth retrying: rate limits (HTTP 429) and server-side failures.
+    """
+    status_code = getattr(error, 'status_code', None)
+    if status_code is None:
+        message = str(error).lower()
+        return '429' in message or 'too many requests' in message or 'rate limit' in message
+    return status_code == 429 or status_code >= 500
+
+
+def is_duplicate_order(error):
+    """
+    Whether submit_order was refused because an order with the same client_order_id already exists.
+    """
+    return getattr(error, 'status_code', None) == 422 and 'client_order_id' in str(error).lower()
+
+
+class OrderManager:
+    """
+    Submit orders off the trading loop and track them through to fill.
+
+    Submissions run on a bounded thread pool, retrying rate-limited and server
+    errors with exponential backoff and jitter. Every attempt for an order sends
+    the same client_order_id, so a retry after a request the broker did accept
+    finds that order instead of placing a second one. Accepted orders are tracked by a
+    single background thread, from trade_updates events when they are streamed
+    in (on_trade_update) or by polling get_order otherwise. When an order
+    completes its record carries the actual fill price and the submit/fill
+    latencies, and on_fill is called with it.
+    """
+
+    def __init__(self, api, max_workers=4, max_retries=5, backoff=0.25, max_backoff=8.0, poll_interval=1.0,
+                 timeout=300, on_fill=None, portfolio=None, history=10000, metrics=None):
+        """
+        Parameters:
+        - api: Alpaca REST client (or live.mock_broker.MockBroker).
+        - max_workers: int, the maximum number of concurrent order requests.
+        - max_retries: int, retries per request on rate-limit/server errors.
+        - backoff: float, the first retry delay in seconds, doubled on every retry.
+        - max_backoff: float, the longest retry delay in seconds.
+        - poll_interval: float, seconds between get_order polls of an order without stream updates.
+        - timeout: float, seconds after which an unfinished order stops being tracked.
+        - on_fill: callable(record), called for every order that (partially) filled when it completes.
+        - portfolio: live.portfolio.PortfolioState kept current with every order snapshot seen.
+        - history: int, the number of completed order records kept for stats().
+        - metrics: utils.metrics.Metrics receiving submit/fill latencies and order counts (default is the shared one).
+        """
+        self.api = api
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.on_fill = on_fill
+        self.portfolio = portfolio
+        self.completed = deque(maxlen=history)
+        self.metrics = metrics if metrics is not None else METRICS
+        self.pool = ThreadPoolExecutor(max_workers=max_workers)
+        self.queued = {}  # id(record) -> record, submitted but not accepted yet
+        self.tracked = {}  # order id -> (record, future)
+        self.snapshots = {}  # order id -> newest streamed order snapshot not processed yet
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._tracker = threading.Thread(target=self._track_loop, daemon=True)
+        self._tracker.start()
+
+    def call(self, method, *args, **kwargs):
+        """
+        Call an API method, retrying with exponential backoff and jitter while the error is retryable.
+
+        Returns:
+        - (result, attempts)
+        """
+        delay = self.backoff
+        for attempt in range(self.max_retries + 1):
+            try:
+                return method(*args, **kwargs), attempt + 1
+            except Exception as e:
+                if attempt == self.max_retries or not is_retryable(e):
+                    raise
+                time.sleep(delay * (1 + random.random()))
+                delay = min(delay * 2, self.max_backoff)
+
+    def submit(self, symbol, side, qty, price=None):
+        """
+        Queue a market order. Returns immediately.
+
+        Parameters:
+        - symbol: str, the stock symbol.
+        - side: str, 'buy' or 'sell'.
+        - qty: int, the number of shares.
+        - price: float, the expected price (e.g., the last bar close), used to measure slippage.
+
+        Returns:
+        - concurrent.futures.Future resolving to the order record once the order is done.
+        """
+        record = {
+            'symbol': symbol,
+            'side': side,
+            'qty': qty,
+            'expected_price': price,
+            'order_id': None,
+            'client_order_id': uuid.uuid4().hex,
+            'status': 'queued',
+            'attempts': 0,
+            'filled_qty': 0.0,
+            'fill_price': None,
+            'queued_at': time.time(),
+            'accepted_at': None,
+            'completed_at': None,
+            'last_checked': 0.0,
+        }
+        future = Future()
+        with self._lock:
+            self.queued[id(record)] = record
+        self.pool.submit(self._submit, record, future)
+        return future
+
+    def _submit_order(self, record):
+        try:
+            return self.api.submit_order(symbol=record['symbol'], qty=record['qty'], side=record['side'],
+                                         type='market', time_in_force='gtc',
+                                         client_order_id=record['client_order_id'])
+        except Exception as e:
+            # An earlier attempt reached the broker even though its response was lost
+            if not is_duplicate_order(e):
+                raise
+            return self.api.get_order_by_client_order_id(record['client_order_id'])
+
+    def _submit(self, record, future):
+        try:
+            order, record['attempts'] = self.call(self._submit_order, record)
+        except Exception as e:
+            print(f"Order for {record['symbol']} failed: {e}")
+            record['status'] = 'error'
+            record['error'] = str(e)
+            with self._lock:
+                self.queued.pop(id(record), None)
+            self._finish(record, future)
+            return
+
+        record['order_id'] = _field(order, 'id')
+        record['accepted_at'] = time.time()
+        record['status'] = _field(order, 'status')
+        with self._lock:
+            self.queued.pop(id(record), None)
+            self.tracked[record['order_id']] = (record, future)
+        self._observe(record, future, order)
+        self._wake.set()
+
+    def on_trade_update(self, update):
+        """
+        Feed an Alpaca trade_updates event (from the websocket stream or MockBroker.subscribe).
+        """
+        if self.portfolio is not None:
+            self.portfolio.on_trade_update(update)
+        order = _field(update, 'order')
+        if order is None:
+            return
+        with self._lock:
+            self.snapshots[_field(order, 'id')] = order
+        self._wake.set()
+
+    def has_pending(self, symbol, side=None):
+        """
+        Whether an order for the symbol (and side) is queued or still open.
+        """
+        with self._lock:
+            records = list(self.queued.values()) + [record for record, _ in self.tracked.values()]
+        return any(record['symbol'] == symbol and (side is None or record['side'] == side) for record in records)
+
+    def _observe(self, record, future, order):
+        if self.portfolio is not None:
+            self.portfolio.apply_order(order, record['expected_price'])
+        record['last_checked'] = time.time()
+        record['status'] = _field(order, 'status')
+        record['filled_qty'] = float(_field(order, 'filled_qty') or 0)
+        if _field(order, 'filled_avg_price') is not None:
+            record['fill_price'] = float(_field(order, 'filled_avg_price'))
+        if record['status'] in CLOSED_STATUSES:
+            with self._lock:
+                if self.tracked.pop(record['order_id'], None) is None:
+                    return  # Already finished from another snapshot
+            self._finish(record, future)
+
+    def _finish(self, record, future):
+        record['completed_at'] = time.time()
+        record['submit_latency'] = None
+        if record['accepted_at'] is not None:
+            record['submit_latency'] = record['accepted_at'] - record['queued_at']
+        record['fill_latency'] = record['completed_at'] - record['queued_at'] if record['filled_qty'] else None
+        record['slippage'] = None
+        if record['fill_price'] is not None and record['expected_price']:
+            direction = 1 if record['side'] == 'buy' else -1
+            record['slippage'] = direction * (record['fill_price'] / record['expected_price'] - 1)
+        self.completed.append(record)
+        self.metrics.inc('orders', status=record['status'])
+        if record['attempts'] > 1:
+            self.metrics.inc('order_retries', record['attempts'] - 1)
+        if record['submit_latency'] is not None:
+            self.metrics.observe('submit', record['submit_latency'])
+        if record['fill_latency'] is not None:
+            self.metrics.observe('fill', record['fill_latency'])
+        if record['filled_qty'] and self.on_fill is not None:
+            try:
+                self.on_fill(record)
+            except Exception as e:
+                print(f"Error in fill callback for {record['symbol']}: {e}")
+        future.set_result(record)
+
+    def _poll(self, order_id):
+        try:
+            return self.call(self.api.get_order, order_id)[0]
+        except Exception as e:
+            print(f"Error polling order {order_id}: {e}")
+            return None
+
+    def _track_loop(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            with self._lock:
+                snapshots, self.snapshots = self.snapshots, {}
+                tracked = list(self.tracked.items())
+
+            now = time.time()
+            stale = []
+            for order_id, (record, future) in tracked:
+                if order_id in snapshots:
+                    self._observe(record, future, snapshots[order_id])
+                elif now - record['accepted_at'] >= self.timeout:
+                    print(f"Order {order_id} for {record['symbol']} still {record['status']} after "
+                          f"{self.timeout}s. No longer tracking it.")
+                    with self._lock:
+                        if self.tracked.pop(order_id, None) is None:
+                            continue
+                    record['status'] = 'timeout'
+                    self._finish(record, future)
+                elif now - record['last_checked'] >= self.poll_interval:
+                    stale.append((order_id, record, future))
+
+            # Orders without stream updates are polled concurrently on the order pool
+            polled = self.pool.map(self._poll, [order_id for order_id, _, _ in stale])
+            for (order_id, record, future), order in zip(stale, polled):
+                if order is not None:
+                    self._observe(record, future, order)
+
+            # An update can beat submit_order's response, keep it until its order is tracked
+            tracked_ids = {order_id for order_id, _ in tracked}
+            with self._lock:
+                if self.queued:
+                    for order_id, order in snapshots.items():
+                        if order_id not in tracked_ids:
+                            self.snapshots.setdefault(order_id, order)
+
+    def wait(self, timeout=None):
+        """
+        Block until every queued and tracked order is done (or timeout seconds pass).
+
+        Returns:
+        - bool, whether all orders finished.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            with self._lock:
+                if not self.queued and not self.tracked:
+                    return True
+            if deadline is not None and time.time() >= deadline:
+                return False
+            time.sleep(0.01)
+
+    def stats(self):
+        """
+        Summarize completed orders: counts, and submit/fill latency percentiles in seconds.
+        """
+        records = list(self.completed)
+        summary = {
+            'orders': len(records),
+            'filled': sum(record['status'] == 'filled' for record in records),
+            'errors': sum(record['status'] == 'error' for record in records),
+            'retries': sum(max(record['attempts'] - 1, 0) for record in records),
+        }
+        for key in ('submit_latency', 'fill_latency'):
+            values = np.array([record[key] for record in records if record.get(key) is not None])
+            if values.size:
+                summary[f"{key}_mean"] = float(values.mean())
+                summary[f"{key}_p50"] = float(np.percentile(values, 50))
+                summary[f"{key}_p95"] = float(np.percentile(values, 95))
+                summary[f"{key}_max"] = float(values.max())
+        return summary
+
+    def shutdown(self, wait=True):
+        """
+        Stop tracking and shut the order pool down.
+        """
+        if wait:
+            self.wait(timeout=self.timeout)
+        self._stopped.set()
+        self._wake.set()
+        self.pool.shutdown(wait=wait)
@@ -0,0 +1,195 @@
+import threading
+import time
+
+# Order statuses (and trade_updates events) after which nothing more fills
+CLOSED_STATUSES = ('filled', 'canceled', 'expired', 'rejected', 'done_for_day')
+
+
+def _field(obj, name, default=None):
+    # Alpaca entities expose fields as attributes, raw stream/REST payloads as dict keys
+    if isinstance(obj, dict):
+        return obj.get(name, default)
+    return getattr(obj, name, default)
+
+
+class PortfolioState:
+    """
+    Local cache of cash, positions and open orders.
+
+    Seeded once with bulk REST calls, kept current from order responses, fills and
+    trade-update events, and reconciled in bulk every reconcile_every seconds, so
+    trade decisions need no network calls of their own.
+    """
+
+    def __init__(self, api, reconcile_every=300, clock=None):
+        """
+        Parameters:
+        - api: Alpaca REST client (or a compatible mock).
+        - reconcile_every: int, seconds between bulk reconciliations with the broker.
+        - clock: callable returning the current time in seconds (default time.time), e.g. a simulated clock.
+        """
+        self.api = api
+        self.reconcile_every = reconcile_every
+        self.clock = clock or time.time
+        self.cash = 0.0
+        self.equity = 0.0
+        self.buying_power = 0.0
+        self.positions = {}  # symbol -> {'qty': float, 'avg_entry_price': float}
+        self.open_orders = {}  # order id -> {'symbol': str, 'side': str, 'qty': float}
+        self.last_prices = {}
+        self.last_reconcile = None
+        self._fills = {}  # order id -> (filled qty, filled cost) already applied
+        self._lock = threading.RLock()
+
+    def reconcile(self):
+        """
+        Replace the cached state with the broker's: one account, one positions and one orders call.
+        """
+        account = self.api.get_account()
+        positions = self.api.list_positions()
+        orders = self.api.list_orders(status='open')
+        with self._lock:
+            self.cash = float(account.cash)
+            self.equity = float(account.equity)
+            self.buying_power = float(account.buying_power)
+            self.positions = {
+                position.symbol: {'qty': float(position.qty), 'avg_entry_price': float(position.avg_entry_price)}
+                for position in positions
+            }
+            self.open_orders = {
+                order.id: {'symbol': order.symbol, 'side': order.side,
+                           'qty': float(order.qty) - float(order.filled_qty or 0)}
+                for order in orders
+            }
+            # Positions already include what these orders filled so far
+            for order in orders:
+                filled_qty = float(order.filled_qty or 0)
+                self._fills[order.id] = (filled_qty, filled_qty * float(order.filled_avg_price or 0))
+            self.last_reconcile = self.clock()
+
+    seed = reconcile
+
+    def maybe_reconcile(self, now=None):
+        """
+        Reconcile if the last reconciliation is older than reconcile_every seconds.
+
+        Returns:
+        - bool, whether a reconciliation ran.
+        """
+        now = self.clock() if now is None else now
+        if self.last_reconcile is not None and now - self.last_reconcile < self.reconcile_every:
+            return False
+        self.reconcile()
+        return True
+
+    def update_price(self, symbol, price):
+        self.last_prices[symbol] = float(price)
+
+    def position_qty(self, symbol):
+        position = self.positions.get(symbol)
+        return 0.0 if position is None else position['qty']
+
+    def has_open_order(self, symbol, side=None):
+        return any(order['symbol'] == symbol and (side is None or order['side'] == side)
+                   for order in self.open_orders.values())
+
+    def market_value(self):
+        """
+        Estimated value of all positions at the last seen prices (average entry price if none).
+        """
+        return sum(position['qty'] * self.last_prices.get(symbol, position['avg_entry_price'])
+                   for symbol, position in self.positions.items())
+
+    def on_order_submitted(self, order, price=None):
+        """
+        Record an order returned by submit_order, applying any part that already filled.
+        """
+        self.apply_order(order, price)
+
+    def apply_order(self, order, price=None):
+        """
+        Bring an order snapshot (REST order or trade_updates payload) into the cache.
+
+        Fills are tracked per order from the cumulative filled_qty/filled_avg_price, so
+        seeing the same order again (a poll after a stream update, say) only applies
+        what filled since.
+
+        Parameters:
+        - order: Alpaca order entity or dict.
+        - price: float, fill price to assume if the order carries no average fill price.
+        """
+        order_id = _field(order, 'id')
+        symbol = _field(order, 'symbol')
+        side = _field(order, 'side')
+        qty = float(_field(order, 'qty') or 0)
+        filled_qty = float(_field(order, 'filled_qty') or 0)
+        status = _field(order, 'status')
+
+        # The stream thread and the order tracker can both see the same fill, so the check and the
+        # update happen under one (reentrant) lock acquisition
+        with self._lock:
+            seen_qty, seen_cost = self._fills.get(order_id, (0.0, 0.0))
+            if filled_qty > seen_qty:
+                avg_price = float(_field(order, 'filled_avg_price') or price)
+                cost = filled_qty * avg_price
+                self.apply_fill(symbol, side, filled_qty - seen_qty, (cost - seen_cost) / (filled_qty - seen_qty))
+                self._fills[order_id] = (filled_qty, cost)
+
+            if status in CLOSED_STATUSES or filled_qty >= qty:
+                self.open_orders.pop(order_id, None)
+            else:
+                self.open_orders[order_id] = {'symbol': symbol, 'side': side, 'qty': qty - filled_qty}
+
+    def apply_fill(self, symbol, side, qty, price, order_id=None, order_done=False):
+        """
+        Apply a (partial) fill to cash and positions.
+
+        Parameters:
+        - symbol: str, the filled symbol.
+        - side: str, 'buy' or 'sell'.
+        - qty: float, the quantity filled by this fill.
+        - price: float, the fill price.
+        - order_id: str, the order the fill belongs to, its remaining quantity is reduced.
+        - order_done: bool, the order has no quantity left open.
+        """
+        qty = float(qty)
+        price = float(price)
+        with self._lock:
+            position = self.positions.setdefault(symbol, {'qty': 0.0, 'avg_entry_price': 0.0})
+            if side == 'buy':
+                total = position['qty'] + qty
+                if total > 0:
+                    position['avg_entry_price'] = (position['qty'] * position['avg_entry_price'] + qty * price) / total
+                position['qty'] = total
+                self.cash -= qty * price
+                self.buying_power -= qty * price
+            else:
+                position['qty'] -= qty
+                self.cash += qty * price
+                self.buying_power += qty * price
+            if position['qty'] <= 0:
+                del self.positions[symbol]
+
+            order = self.open_orders.get(order_id)
+            if order is not None:
+                order['qty'] -= qty
+                if order_done or order['qty'] <= 0:
+                    del self.open_orders[order_id]
+        self.last_prices[symbol] = price
+
+    def on_trade_update(self, update):
+        """
+        Apply an Alpaca trade_updates event (fill, partial_fill, canceled, expired, rejected, ...).
+        """
+        event = _field(update, 'event')
+        order = _field(update, 'order') or {}
+        order_id = _field(order, 'id')
+        if _field(order, 'filled_qty') is not None:
+            # The payload carries the order's cumulative fill, apply it idempotently
+            self.apply_order(order, _field(update, 'price'))
+        elif event in ('fill', 'partial_fill'):
+            self.apply_fill(_field(order, 'symbol'), _field(order, 'side'), _field(update, 'qty'),
+                            _field(update, 'price'), order_id=order_id, order_done=event == 'fill')
+        if event in CLOSED_STATUSES:
+            with self._lock:
+                self.open_orders.pop(order_id, None)
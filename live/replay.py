@@ -0,0 +1,106 @@
+from collections import namedtuple
+
+import numpy as np
+
+from indicators.streaming import StreamingRSI
+from live.mock_broker import MockBroker
+from live.portfolio import PortfolioState
+from utils.alpaca_client import set_api
+from utils.bar_cache import to_epoch_ns
+
+ReplayRun = namedtuple('ReplayRun', ['final_equity', 'equity', 'signals', 'orders'])
+
+
+class SimClock:
+    """
+    Simulated clock driven by the replayed bar timestamps instead of wall time.
+
+    Callable like time.time, so it plugs into MockBroker and PortfolioState.
+    """
+
+    def __init__(self, start=0.0):
+        self.now = float(start)
+
+    def __call__(self):
+        return self.now
+
+    def advance_to(self, timestamp):
+        """
+        Move the clock forward to `timestamp` (seconds), never backwards.
+        """
+        if timestamp > self.now:
+            self.now = float(timestamp)
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def replay(data, symbol, execute, qty=1, window=14, cooldown_period=5, initial_cash=100000, slippage=0.0,
+           reconcile_every=300, verbose=False):
+    """
+    Push historical bars one at a time through the live strategy and execution path.
+
+    Each bar advances a simulated clock, feeds the same StreamingRSI state the live
+    loops use, applies the live trade cooldown on the simulated clock, and calls
+    `execute` exactly like run_stream_trading does, against a MockBroker that fills
+    market orders immediately at the bar close. No sleeping and no network, so it
+    runs as fast as the strategy code does.
+
+    Parameters:
+    - data: pandas DataFrame with a 'close' column and a DatetimeIndex, oldest first.
+    - symbol: str, the stock symbol being replayed.
+    - execute: callable(symbol, signal, qty, price=..., portfolio=...), e.g. main_live.execute_trade.
+      It reaches the broker through utils.alpaca_client.get_api(), which serves the mock broker
+      for the duration of the replay.
+    - qty: int, the number of shares to trade per order.
+    - window: int, the RSI window.
+    - cooldown_period: int, cooldown between signals (in bars) and between trades (in minutes).
+    - initial_cash: float, the simulated account's starting cash.
+    - slippage: float, fractional price move against every fill.
+    - reconcile_every: int, simulated seconds between portfolio reconciliations with the broker.
+    - verbose: bool, print every bar's RSI and signal.
+
+    Returns:
+    - ReplayRun with the final equity, the per-bar equity and signal arrays, and the broker's orders.
+    """
+    close = data['close'].to_numpy(dtype=np.float64)
+    timestamps = to_epoch_ns(data.index)
+    n = len(close)
+    equity = np.empty(n)
+    signals = np.zeros(n, dtype=np.int8)
+
+    clock = SimClock(timestamps[0] / 1e9 if n else 0.0)
+    broker = MockBroker(cash=initial_cash, slippage=slippage, clock=clock)
+    portfolio = PortfolioState(broker, reconcile_every=reconcile_every, clock=clock)
+    state = StreamingRSI(window=window, cooldown_period=cooldown_period)
+    last_trade_time = None
+
+    previous_api = set_api(broker)
+    try:
+        portfolio.seed()
+        for i, (timestamp, price) in enumerate(zip(timestamps.tolist(), close.tolist())):
+            clock.advance_to(timestamp / 1e9)
+            broker.set_price(symbol, price)
+            portfolio.update_price(symbol, price)
+
+            signal = state.update(price, timestamp)
+            signals[i] = signal
+            if verbose:
+                print(f"Simulated RSI: {state.rsi:.2f}, Signal: {signal}")
+
+            if signal != 0:
+                if last_trade_time is not None and clock.now - last_trade_time < cooldown_period * 60:
+                    if verbose:
+                        print("Cooldown period active. Skipping trade...")
+                else:
+                    execute(symbol, signal, qty, price=price, portfolio=portfolio)
+                    last_trade_time = clock.now
+
+            portfolio.maybe_reconcile()
+            equity[i] = portfolio.cash + portfolio.market_value()
+    finally:
+        set_api(previous_api)
+
+    orders = [vars(order).copy() for order in broker.orders.values()]
+    final_equity = float(equity[-1]) if n else float(initial_cash)
+    return ReplayRun(final_equity, equity, signals, orders)
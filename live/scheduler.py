@@ -0,0 +1,142 @@
+import math
+import time
+from collections import deque, namedtuple
+
+import numpy as np
+
+INTERVAL_SECONDS = {'minute': 60, '15Min': 900, '1H': 3600, '1D': 86400}
+
+Tick = namedtuple('Tick', ['boundary', 'scheduled', 'woke', 'lag', 'skipped'])
+
+
+class BarScheduler:
+    """
+    Wakes a live loop once per bar, right after each bar boundary of the interval.
+
+    Boundaries are multiples of the interval in epoch seconds (12:00, 12:15, ... for
+    '15Min'), and each wake-up is the boundary plus a small settle delay for the bar
+    to be published. Sleeping to an absolute time means the cycle's processing time
+    never shifts the schedule. If a cycle overruns one or more whole bars, the missed
+    wake-ups are skipped and the loop resumes at the latest boundary (the bars
+    themselves are still fetched, the signal state catches up from its last timestamp).
+
+    Daily bars do not end on the epoch grid (midnight UTC, when the market is
+    always closed): with a calendar, their boundaries are the session closes.
+    """
+
+    def __init__(self, interval='minute', settle=2.0, offset=0.0, history=100, clock=None, sleep=None,
+                 calendar=None):
+        """
+        Parameters:
+        - interval: str, the bar interval ('minute', '15Min', '1H', '1D').
+        - settle: float, seconds to wait after a boundary before the bar is fetched.
+        - offset: float, seconds the boundaries are shifted from the epoch grid.
+        - history: int, how many recent cycles are kept for stats().
+        - clock: callable returning the current time in seconds (default time.time).
+        - sleep: callable sleeping for a number of seconds (default time.sleep).
+        - calendar: live.calendar.TradingCalendar, daily boundaries are then its session closes.
+        """
+        if interval not in INTERVAL_SECONDS:
+            raise ValueError(f"Unsupported interval: {interval}")
+        self.interval = interval
+        self.period = INTERVAL_SECONDS[interval]
+        self.settle = settle
+        self.offset = offset
+        self.clock = clock or time.time
+        self.sleep = sleep or time.sleep
+        self.calendar = calendar if self.period >= 86400 else None
+        self.next_boundary = None
+        self.skipped = 0
+        self.lags = deque(maxlen=history)
+        self.durations = deque(maxlen=history)
+
+    def boundary_before(self, now):
+        """
+        The latest bar boundary whose settle delay has passed at `now`.
+        """
+        if self.calendar is not None:
+            close = self.calendar.last_close(now - self.settle)
+            if close is not None:
+                return close
+        return math.floor((now - self.settle - self.offset) / self.period) * self.period + self.offset
+
+    def boundary_after(self, boundary):
+        """
+        The bar boundary following `boundary`.
+        """
+        if self.calendar is not None:
+            close = self.calendar.next_close(boundary)
+            if close is not None:
+                return close
+        return boundary + self.period
+
+    def _boundaries_between(self, first, last):
+        # Boundaries in [first, last), the bars a late cycle skips
+        if self.calendar is not None:
+            return int(np.count_nonzero((self.calendar.closes >= first) & (self.calendar.closes < last)))
+        return int(round((last - first) / self.period))
+
+    def reset(self):
+        """
+        Forget the schedule, e.g., after sleeping through a market close, so the idle time is not counted as missed bars.
+        """
+        self.next_boundary = None
+
+    def wait(self):
+        """
+        Sleep until the next bar boundary plus the settle delay.
+
+        Returns:
+        - Tick(boundary, scheduled, woke, lag, skipped): the boundary being processed, the
+          scheduled and actual wake-up times, the lag between them (seconds) and how many
+          boundaries were skipped because the previous cycle overran.
+        """
+        now = self.clock()
+        latest = self.boundary_before(now)
+        if self.next_boundary is None:
+            boundary, skipped = self.boundary_after(latest), 0
+        elif self.next_boundary <= latest:
+            # Already late for at least one boundary: run now for the latest one, skip those in between
+            boundary = latest
+            skipped = self._boundaries_between(self.next_boundary, latest)
+        else:
+            boundary, skipped = self.next_boundary, 0
+        if skipped:
+            self.skipped += skipped
+            print(f"Cycle overran the bar interval, skipping {skipped} missed {self.interval} bar(s).")
+
+        scheduled = boundary + self.settle
+        while now < scheduled:
+            self.sleep(scheduled - now)
+            now = self.clock()
+        self.next_boundary = self.boundary_after(boundary)
+
+        tick = Tick(boundary, scheduled, now, now - scheduled, skipped)
+        self.lags.append(tick.lag)
+        return tick
+
+    def complete(self, tick):
+        """
+        Record the end of the cycle started by `tick`.
+
+        Returns:
+        - float, seconds from the scheduled wake-up to now (wake-up lag plus processing time).
+        """
+        duration = self.clock() - tick.scheduled
+        self.durations.append(duration)
+        return duration
+
+    def stats(self):
+        """
+        Returns:
+        - dict with the mean and max wake-up lag and cycle time (seconds) over recent cycles, and the total skipped bars.
+        """
+        lags, durations = list(self.lags), list(self.durations)
+        return {
+            'cycles': len(durations),
+            'mean_lag': sum(lags) / len(lags) if lags else 0.0,
+            'max_lag': max(lags, default=0.0),
+            'mean_cycle': sum(durations) / len(durations) if durations else 0.0,
+            'max_cycle': max(durations, default=0.0),
+            'skipped': self.skipped,
+        }
@@ -1,6 +1,17 @@
-from utils.alpaca_fetcher_live import fetch_live_data
-from indicators.rsi import calculate_rsi, generate_signals
-from alpaca_trade_api.rest import REST
+from utils.alpaca_fetcher_live import fetch_live_bars
+from indicators.streaming import StreamingRSI, RSIStateTable
+from live.calendar import TradingCalendar
+from live.orders import OrderManager
+from live.portfolio import PortfolioState
+from live.scheduler import BarScheduler, INTERVAL_SECONDS
+from utils.alpaca_client import get_api, set_api
+from utils.bar_buffer import BarBuffer
+from utils.metrics import METRICS
+import argparse
+import asyncio
+import functools
+import os
+import threading
 import time
 
 import logging
@@ -18,10 +29,21 @@ logging.basicConfig(
 def log_trade(symbol, action, qty, price):
     logging.info(f"{action.upper()} | {symbol} | Qty: {qty} | Price: ${price:.2f}")
 
-# Alpaca API initialization
-api = REST(ALPACA_API_KEY, ALPACA_SECRET_KEY, base_url=BASE_URL)
+def log_fill(record):
+    """
+    Log an order's actual fill (an OrderManager on_fill callback).
+    """
+    expected = record['expected_price']
+    logging.info(f"{record['side'].upper()} | {record['symbol']} | Qty: {record['filled_qty']:g} | "
+                 f"Price: ${record['fill_price']:.2f} | Expected: ${expected or 0:.2f} | "
+                 f"Latency: {record['fill_latency'] * 1000:.0f} ms | Status: {record['status']}")
+    print(f"{record['side'].upper()} {record['filled_qty']:g} {record['symbol']} filled at ${record['fill_price']:.2f} "
+          f"in {record['fill_latency'] * 1000:.0f} ms.")
 
-def execute_trade(symbol, signal, qty=1):
+# Streaming indicator state is persisted here so restarts resume where they left off
+STATE_DIR = 'state'
+
+def execute_trade(symbol, signal, qty=1, price=None, portfolio=None, orders=None):
     """
     Execute a trade (buy/sell) based on the signal.
 
@@ -29,31 +51,39 @@ def execute_trade(symbol, signal, qty=1):
     - symbol: str, the stock symbol to trade (e.g., 'AAPL').
     - signal: int, the trading signal (1 = buy, -1 = sell, 0 = no action).
     - qty: int, the number of shares to trade.
+    - price: float, the latest known price (e.g., the last bar close), used with a portfolio cache.
+    - portfolio: live.portfolio.PortfolioState, when given the trade is decided from the cached
+      account/position state and only the order submission touches the network.
+    - orders: live.orders.OrderManager, when given (with a portfolio) the order is queued and this
+      returns at once; the fill is tracked and logged by the order manager.
     """
+    if portfolio is not None:
+        return execute_trade_cached(symbol, signal, qty, price, portfolio, orders)
+
     try:
         if signal == 1:  # Buy signal
 
             # Get account balance
-            account = api.get_account()
+            account = get_api().get_account()
             cash = float(account.cash)
 
                 # Check if already holding the stock
             try:
-                position = api.get_position(symbol)
+                position = get_api().get_position(symbol)
                 print(f"Already holding {position.qty} shares of {symbol}. Skipping buy.")
                 return
             except:
                 pass  # No position found, okay to continue
 
             # Check existing position and balance logic...
-            price = api.get_latest_trade(symbol).price
+            price = get_api().get_latest_trade(symbol).price
             cost = price * qty
             if cash < cost:
                 print(f"Not enough cash to buy {qty} shares of {symbol}. Needed: ${cost:.2f}")
                 return
 
             print(f"Placing BUY order for {qty} shares of {symbol} at approx. ${price:.2f}")
-            api.submit_order(
+            get_api().submit_order(
                 symbol=symbol,
                 qty=qty,
                 side="buy",
@@ -66,13 +96,13 @@ def execute_trade(symbol, signal, qty=1):
         elif signal == -1:
             try:
                 # Check if you own any shares of the symbol
-                position = api.get_position(symbol)
+                position = get_api().get_position(symbol)
                 qty = int(position.qty)
 
                 if qty > 0:
-                    price = api.get_latest_trade(symbol).price
+                    price = get_api().get_latest_trade(symbol).price
                     print(f"Placing SELL order for {qty} shares of {symbol} at approx. ${price:.2f}")
-                    api.submit_order(
+                    get_api().submit_order(
                         symbol=symbol,
                         qty=qty,
                         side="sell",
@@ -91,41 +121,207 @@ def execute_trade(symbol, signal, qty=1):
     except Exception as e:
         print(f"Error executing trade for {symbol}: {e}")
 
-def is_market_open():
+def check_trade(symbol, signal, qty, price, portfolio, orders=None):
+    """
+    Pre-trade checks against the local portfolio cache (no network calls).
+
+    Returns:
+    - (side, qty) of the order to place, or None if the trade is skipped.
+    """
+    if signal == 1:  # Buy signal
+        if (portfolio.position_qty(symbol) > 0 or portfolio.has_open_order(symbol, 'buy')
+                or (orders is not None and orders.has_pending(symbol, 'buy'))):
+            print(f"Already holding or buying {symbol}. Skipping buy.")
+            return None
+
+        cost = price * qty
+        if portfolio.cash < cost:
+            print(f"Not enough cash to buy {qty} shares of {symbol}. Needed: ${cost:.2f}")
+            return None
+        return 'buy', qty
+
+    if signal == -1:
+        qty = int(portfolio.position_qty(symbol))
+        if (qty <= 0 or portfolio.has_open_order(symbol, 'sell')
+                or (orders is not None and orders.has_pending(symbol, 'sell'))):
+            print(f"No position to sell for {symbol}. Skipping sell order.")
+            return None
+        return 'sell', qty
+
+    print(f"No trade executed for {symbol}. Signal: {signal}")
+    return None
+
+def execute_trade_cached(symbol, signal, qty, price, portfolio, orders=None):
     """
-    Check if the market is currently open.
+    Execute a trade using the local portfolio cache for the cash, position and price checks,
+    queueing it on the order manager if one is given.
     """
     try:
-        clock = api.get_clock()
-        if clock.is_open:
-            print(f"Market is OPEN (Next Close: {clock.next_close}).")
-            return True
-        else:
-            print(f"Market is CLOSED (Next Open: {clock.next_open}).")
-            return False
+        if price is None:
+            price = portfolio.last_prices.get(symbol)
+        if price is None:
+            price = get_api().get_latest_trade(symbol).price
+        portfolio.update_price(symbol, price)
+
+        with METRICS.span('risk'):
+            trade = check_trade(symbol, signal, qty, price, portfolio, orders)
+        if trade is None:
+            return
+        side, qty = trade
+
+        print(f"Placing {side.upper()} order for {qty} shares of {symbol} at approx. ${price:.2f}")
+        if orders is not None:
+            # Submit and fill latencies are recorded by the order manager
+            orders.submit(symbol, side, qty, price)
+            return
+        with METRICS.span('submit'):
+            order = get_api().submit_order(symbol=symbol, qty=qty, side=side, type="market", time_in_force="gtc")
+        portfolio.on_order_submitted(order, price)
+        print(f"{side.upper()} order placed successfully for {symbol}.")
+        log_trade(symbol, side, qty, price)
+
     except Exception as e:
-        print(f"Error checking market hours: {e}")
-        return False
+        print(f"Error executing trade for {symbol}: {e}")
+
+def signal_state_path(symbol, interval='minute'):
+    """
+    Path of the persisted RSI/signal state for a symbol and interval.
+    """
+    return os.path.join(STATE_DIR, f"{symbol}_{interval}_rsi.json")
+
+def load_signal_state(symbol, interval='minute', window=14, cooldown_period=5, history=500, bars=None):
+    """
+    Resume the streaming RSI/signal state from disk, or seed it from recent history.
+
+    Parameters:
+    - symbol: str, the stock symbol.
+    - interval: str, the data interval ('minute', '15Min').
+    - window: int, the RSI window.
+    - cooldown_period: int, the number of bars to wait between signals.
+    - history: int, the number of bars used to seed a fresh state.
+    - bars: BarBuffer of the symbol's recent bars, seeds a fresh state (fetched into when empty).
 
-def process_live_data(symbol, interval='minute', window=14):
+    Returns:
+    - StreamingRSI state.
     """
-    Fetch live data, calculate RSI, and generate signals.
+    path = signal_state_path(symbol, interval)
+    if os.path.exists(path):
+        state = StreamingRSI.load(path)
+        if state.window == window and state.cooldown_period == cooldown_period:
+            print(f"Resumed signal state for {symbol} from {path}.")
+            return state
+        print(f"Saved signal state for {symbol} uses different parameters. Reseeding...")
+
+    state = StreamingRSI(window=window, cooldown_period=cooldown_period)
+    if bars is None:
+        bars = BarBuffer(history)
+    if not len(bars):
+        columns = fetch_live_bars(symbol, interval=interval, limit=history)
+        if columns is not None:
+            bars.extend(columns)
+    if len(bars):
+        state.seed(bars['close'].tolist(), bars['timestamp'].tolist())
+        print(f"Seeded signal state for {symbol} from {len(bars)} bars.")
+    return state
+
+def process_live_data(symbol, state, interval='minute', catch_up=5, predictor=None, bars=None):
+    """
+    Fetch the most recent bars and feed the ones not seen yet into the signal state.
+
+    Parameters:
+    - symbol: str, the stock symbol.
+    - state: StreamingRSI, the symbol's RSI/signal state (updated in place).
+    - interval: str, the data interval ('minute', '15Min').
+    - catch_up: int, the number of recent bars to fetch, covers ticks that were missed. After a longer
+      gap (a restart from saved state, an outage) every bar since the state's last one is fetched.
+    - predictor: optional models.artifacts.Predictor, fed every new bar.
+    - bars: BarBuffer the new bars are appended to.
+
+    Returns:
+    - int signal of the newest bar, or None if no new bar arrived.
     """
-    data = fetch_live_data(symbol, interval=interval, limit=window + 1)
-    if data is None or data.empty:
+    with METRICS.span('fetch', mode='poll'):
+        columns = fetch_live_bars(symbol, interval=interval, limit=catch_up)
+        if (columns is not None and len(columns['timestamp']) and state.last_timestamp is not None
+                and columns['timestamp'][0] > state.last_timestamp):
+            # None of the recent bars was seen before, so bars may be missing in between: replay from the
+            # state's last bar rather than skip them and trade on a corrupted RSI/cooldown state
+            print(f"Catching up {symbol} from its last processed bar...")
+            columns = fetch_live_bars(symbol, interval=interval, limit=None, start=state.last_timestamp)
+    if columns is None or not len(columns['timestamp']):
         print(f"No live data available for {symbol}.")
         return None
+    if bars is not None:
+        bars.extend(columns)
+
+    latest_signal = None
+    new_closes = []
+    # StreamingRSI produces the RSI and the signal in one O(1) step, so both are timed as 'indicator'
+    with METRICS.span('indicator', mode='poll'):
+        for timestamp, close in zip(columns['timestamp'].tolist(), columns['close'].tolist()):
+            if state.last_timestamp is not None and timestamp <= state.last_timestamp:
+                continue
+            latest_signal = state.update(close, timestamp)
+            new_closes.append(close)
+    METRICS.inc('bars', len(new_closes), mode='poll')
+    if predictor is not None and new_closes:
+        with METRICS.span('predict', mode='poll'):
+            for close in new_closes:
+                predictor.update(close)
+
+    if latest_signal is not None:
+        if latest_signal != 0:
+            METRICS.inc('signals', mode='poll')
+        print(f"Latest RSI and Signal for {symbol}: RSI={state.rsi:.2f}, Signal={latest_signal}")
+        if predictor is not None:
+            print(f"Predicted next close for {symbol}: ${predictor.prediction:.2f}")
+    return latest_signal
+
+def load_predictor(symbol, interval='minute', bars=None):
+    """
+    Load the newest saved model for a symbol and warm its input window from recent bars.
 
-    # Calculate RSI and generate signals
-    data['RSI'] = calculate_rsi(data['close'], window=window)
-    data.dropna(subset=['RSI'], inplace=True)
-    data = generate_signals(data.copy(), cooldown_period=5)
+    Parameters:
+    - bars: BarBuffer of the symbol's recent bars, used instead of a fetch when it holds a full window.
 
-    print(f"Latest RSI and Signal for {symbol}:")
-    print(data[['close', 'RSI', 'Signal']].tail())
-    return data
+    Returns:
+    - Predictor, or None if no model has been saved for the symbol.
+    """
+    from models.artifacts import Predictor
+
+    predictor = Predictor.from_store(symbol, interval)
+    if predictor is None:
+        print(f"No saved model for {symbol} ({interval}). Running without predictions.")
+        return None
+    if bars is not None and len(bars) >= predictor.window_size:
+        predictor.seed(bars['close'][-predictor.window_size:].tolist())
+        return predictor
+    columns = fetch_live_bars(symbol, interval=interval, limit=predictor.window_size)
+    if columns is not None and len(columns['close']):
+        predictor.seed(columns['close'].tolist())
+    return predictor
+
+def record_cycle(tick, cycle, mode, metrics_path=None):
+    """
+    Record a scheduled cycle's wake-up lag and duration, and export the metrics if a path is given.
+    """
+    METRICS.observe('cycle', cycle, mode=mode)
+    METRICS.set('wakeup_lag_seconds', tick.lag, mode=mode)
+    if tick.skipped:
+        METRICS.inc('skipped_bars', tick.skipped, mode=mode)
+    if metrics_path is not None:
+        METRICS.write(metrics_path)
+
+def print_portfolio(portfolio):
+    """
+    Print the cached account state (no network calls).
+    """
+    equity = portfolio.cash + portfolio.market_value()
+    print(f"Equity (est.): ${equity:.2f}, Cash: ${portfolio.cash:.2f}, Buying Power: ${portfolio.buying_power:.2f}, "
+          f"Open orders: {len(portfolio.open_orders)}")
 
-def run_live_trading(symbol, interval='minute', qty=1, cooldown_period=5):
+def run_live_trading(symbol, interval='minute', qty=1, cooldown_period=5, predictor=None, portfolio=None,
+                     orders=None, calendar=None, settle=2.0, metrics_path=None, bars=None, wait_for_open=True):
     """
     Run the live trading loop to fetch data, generate signals, and execute trades.
 
@@ -134,60 +330,333 @@ def run_live_trading(symbol, interval='minute', qty=1, cooldown_period=5):
     - interval: str, the data interval ('minute', '15Min').
     - qty: int, the number of shares to trade per order.
     - cooldown_period: int, the cooldown period between trades (in minutes).
+    - predictor: optional models.artifacts.Predictor for next-close predictions.
+    - portfolio: PortfolioState to trade against (default is a new one seeded from the broker).
+    - orders: OrderManager to submit orders through (default is a new one, tracking fills by polling).
+    - calendar: TradingCalendar answering market hours locally (default is a new one).
+    - settle: float, seconds after each bar boundary before the new bar is fetched.
+    - metrics_path: str, file the stage metrics are written to after every cycle (Prometheus text format).
+    - bars: BarBuffer of the symbol's recent bars (default is a new one holding 500 bars).
+    - wait_for_open: bool, wait for the market to open before the first cycle.
     """
     print(f"Starting live trading for {symbol}...")
 
-    # Wait until the market is open
-    while not is_market_open():
-        print("Waiting for the market to open...")
-        time.sleep(60)  # Check every 1 minute
+    # Recent bars live in one preallocated buffer that every cycle appends to, no DataFrame per fetch
+    if bars is None:
+        bars = BarBuffer(500)
+    # Resume or seed the incremental RSI/signal state once, instead of recomputing every tick
+    state = load_signal_state(symbol, interval=interval, cooldown_period=cooldown_period, bars=bars)
+    os.makedirs(STATE_DIR, exist_ok=True)
+    state_path = signal_state_path(symbol, interval)
+
+    # Market hours come from the cached calendar, not a get_clock call per minute
+    if calendar is None:
+        calendar = TradingCalendar(get_api())
+    if wait_for_open:
+        calendar.wait_until_open()
+
+    # Account, positions and open orders are fetched once and then kept current locally
+    if portfolio is None:
+        portfolio = PortfolioState(get_api())
+        portfolio.seed()
+    if orders is None:
+        orders = OrderManager(get_api(), portfolio=portfolio, on_fill=log_fill)
 
     # Keep track of last trade to enforce cooldown
     last_trade_time = None
+    # Cycles start right after each bar of the interval closes, however long the previous cycle took
+    scheduler = BarScheduler(interval, settle=settle, calendar=calendar)
 
     while True:
         try:
-            # Fetch and process live data
-            data = process_live_data(symbol, interval=interval)
-            if data is not None and not data.empty:
-                # Get the latest signal
-                latest_signal = data['Signal'].iloc[-1]
+            tick = scheduler.wait()
+            # Sleep through the close, nights and weekends instead of polling for bars. A bar is processed
+            # if the market was open just before its boundary, so the session's last bar (and the daily bar,
+            # whose boundary is the close) still counts.
+            if not calendar.is_open(tick.boundary - 1):
+                calendar.wait_until_open()
+                scheduler.reset()
+                continue
+
+            # Fetch new bars and update the signal state
+            latest_signal = process_live_data(symbol, state, interval=interval, predictor=predictor, bars=bars)
+            if latest_signal is not None:
+                state.save(state_path)
                 print(f"Latest Signal for {symbol}: {latest_signal}")
 
                 # Enforce cooldown period between trades
                 current_time = time.time()
                 if last_trade_time is not None and current_time - last_trade_time < cooldown_period * 60:
                     print("Cooldown period active. Skipping trade...")
-                    time.sleep(60)
-                    continue
+                else:
+                    # Execute the trade based on the signal
+                    execute_trade(symbol, latest_signal, qty, price=state.prev_close, portfolio=portfolio,
+                                  orders=orders)
+                    last_trade_time = current_time
 
-                # Execute the trade based on the signal
-                execute_trade(symbol, latest_signal, qty)
-                last_trade_time = current_time
+                    portfolio.maybe_reconcile()
+                    print_portfolio(portfolio)
 
-                account = api.get_account()
-                print(f"Equity: ${account.equity}, Cash: ${account.cash}, Buying Power: ${account.buying_power}")
-                
             else:
-                print("No live data or signals available. Retrying in 1 minute...")
+                print("No new bars or signals available. Retrying at the next bar...")
+
+            cycle = scheduler.complete(tick)
+            record_cycle(tick, cycle, 'poll', metrics_path)
+            print(f"Bar {datetime.fromtimestamp(tick.boundary):%H:%M}: woke {tick.lag * 1000:.0f} ms late, "
+                  f"done {cycle * 1000:.0f} ms after the scheduled wake-up.")
+
+        except KeyboardInterrupt:
+            print("Live trading stopped by user.")
+            orders.shutdown(wait=False)
+            break
+        except Exception as e:
+            # The scheduler retries at the next bar boundary
+            METRICS.inc('errors', mode='poll')
+            print(f"Error in live trading loop: {e}")
+
+def run_stream_trading(symbol, interval='minute', qty=1, cooldown_period=5, data_stream_url=None,
+                       stale_after=300, wait_for_open=True, predictor=None, metrics_path=None, api=None,
+                       trade_updates=True, bar_hook=None):
+    """
+    Event-driven live trading: run the RSI/signal/execute pipeline as soon as a bar arrives
+    on Alpaca's websocket stream, falling back to the polling loop if the stream goes quiet.
 
-            # Wait for the next interval
-            time.sleep(60)
+    Parameters:
+    - symbol: str, the stock symbol to trade.
+    - interval: str, the data interval, the bar stream only delivers 'minute' bars.
+    - qty: int, the number of shares to trade per order.
+    - cooldown_period: int, the cooldown period between trades (in minutes).
+    - data_stream_url: str, market data stream URL (default is Alpaca's, point it at utils/fake_stream.py offline).
+    - stale_after: int, seconds without a bar before falling back to polling.
+    - wait_for_open: bool, wait for the market to open before subscribing.
+    - predictor: optional models.artifacts.Predictor for next-close predictions.
+    - metrics_path: str, file the stage metrics are written to every few seconds (Prometheus text format).
+    - api: broker REST client for the calendar, account state and orders (default is the shared Alpaca
+      client, a live.mock_broker.MockBroker runs stream mode offline).
+    - trade_updates: bool, track fills from the trade_updates stream, else by polling the orders.
+    - bar_hook: optional callable(bar) called with every streamed bar (e.g., to move a mock broker's price).
+    """
+    if interval != 'minute':
+        print(f"Bar stream only delivers minute bars, polling {interval} bars instead.")
+        return run_live_trading(symbol, interval=interval, qty=qty, cooldown_period=cooldown_period,
+                                predictor=predictor, metrics_path=metrics_path, wait_for_open=wait_for_open)
+
+    from alpaca_trade_api.stream import Stream
+
+    print(f"Starting streaming live trading for {symbol}...")
+    bars = BarBuffer(500)
+    state = load_signal_state(symbol, interval=interval, cooldown_period=cooldown_period, bars=bars)
+    os.makedirs(STATE_DIR, exist_ok=True)
+    state_path = signal_state_path(symbol, interval)
+
+    if api is None:
+        api = get_api()
+    calendar = TradingCalendar(api)
+    if wait_for_open:
+        calendar.wait_until_open()
+
+    portfolio = PortfolioState(api)
+    portfolio.seed()
+    # Fills arrive as trade updates on the stream, polling is only a fallback
+    orders = OrderManager(api, portfolio=portfolio, on_fill=log_fill, poll_interval=30 if trade_updates else 1.0)
+
+    stream = Stream(ALPACA_API_KEY, ALPACA_SECRET_KEY, base_url=BASE_URL, data_stream_url=data_stream_url)
+    last_bar_time = time.time()
+    last_trade_time = None
+    fell_back = threading.Event()
+
+    async def on_trade_update(update):
+        orders.on_trade_update(update)
+
+    async def on_bar(bar):
+        nonlocal last_bar_time, last_trade_time
+        last_bar_time = time.time()
+        if bar_hook is not None:
+            bar_hook(bar)
+        portfolio.update_price(symbol, bar.close)
+        if time.time() - portfolio.last_reconcile >= portfolio.reconcile_every:
+            asyncio.get_running_loop().run_in_executor(None, portfolio.reconcile)
+        if state.last_timestamp is not None and bar.timestamp <= state.last_timestamp:
+            return
+
+        bars.append(bar.timestamp, open=bar.open, high=bar.high, low=bar.low, close=bar.close, volume=bar.volume)
+        with METRICS.span('indicator', mode='stream'):
+            signal = state.update(bar.close, bar.timestamp)
+        METRICS.inc('bars', mode='stream')
+        state.save(state_path)
+        print(f"Bar for {symbol}: close={bar.close:.2f}, RSI={state.rsi:.2f}, Signal={signal}")
+        if predictor is not None:
+            with METRICS.span('predict', mode='stream'):
+                prediction = predictor.update(bar.close)
+            print(f"Predicted next close for {symbol}: ${prediction:.2f}")
+        if signal == 0:
+            return
+        METRICS.inc('signals', mode='stream')
+
+        current_time = time.time()
+        if last_trade_time is not None and current_time - last_trade_time < cooldown_period * 60:
+            print("Cooldown period active. Skipping trade...")
+            return
+        last_trade_time = current_time
+
+        # Decided from the cached state and queued on the order manager, the stream never waits on REST
+        execute_trade(symbol, signal, qty, price=bar.close, portfolio=portfolio, orders=orders)
+
+    def watchdog():
+        nonlocal last_bar_time
+        while not fell_back.is_set():
+            time.sleep(5)
+            if metrics_path is not None:
+                METRICS.write(metrics_path)
+            if not calendar.is_open():
+                # No bars are expected while the market is closed
+                last_bar_time = time.time()
+            elif time.time() - last_bar_time > stale_after:
+                print(f"No bars received for {stale_after}s. Falling back to polling...")
+                fell_back.set()
+                stream.stop()
+
+    stream.subscribe_bars(on_bar, symbol)
+    if trade_updates:
+        stream.subscribe_trade_updates(on_trade_update)
+    threading.Thread(target=watchdog, daemon=True).start()
+    stream.run()
+
+    if fell_back.is_set():
+        orders.poll_interval = 1.0
+        run_live_trading(symbol, interval=interval, qty=qty, cooldown_period=cooldown_period, predictor=predictor,
+                         portfolio=portfolio, orders=orders, calendar=calendar, metrics_path=metrics_path, bars=bars,
+                         wait_for_open=wait_for_open)
+    else:
+        fell_back.set()  # Stops the watchdog
+        orders.shutdown()  # Lets in-flight orders settle before the pool stops
+        print("Streaming live trading stopped.")
+
+def run_universe_trading(symbols, interval='minute', qty=1, cooldown_period=5, max_workers=8, settle=2.0,
+                         metrics_path=None, wait_for_open=True):
+    """
+    Trade a whole symbol universe from one process with batched bar requests and concurrent orders.
 
+    Parameters:
+    - symbols: list of str, the stock symbols to trade.
+    - interval: str, the data interval ('minute', '15Min').
+    - qty: int, the number of shares to trade per order.
+    - cooldown_period: int, the cooldown period between trades (in minutes).
+    - max_workers: int, the maximum number of concurrent requests and orders.
+    - settle: float, seconds after each bar boundary before the new bars are fetched.
+    - metrics_path: str, file the stage metrics are written to after every cycle (Prometheus text format).
+    - wait_for_open: bool, wait for the market to open before the first cycle.
+    """
+    from live.engine import MultiSymbolEngine
+
+    portfolio = PortfolioState(get_api())
+    orders = OrderManager(get_api(), max_workers=max_workers, portfolio=portfolio, on_fill=log_fill)
+    engine = MultiSymbolEngine(get_api(), symbols, functools.partial(execute_trade, portfolio=portfolio, orders=orders),
+                               interval=interval, qty=qty,
+                               cooldown_period=cooldown_period, max_workers=max_workers)
+
+    os.makedirs(STATE_DIR, exist_ok=True)
+    state_path = os.path.join(STATE_DIR, f"universe_{interval}_rsi.npz")
+    if os.path.exists(state_path):
+        table = RSIStateTable.load(state_path)
+        if table.symbols == engine.symbols and table.cooldown_period == cooldown_period:
+            engine.table = table
+            print(f"Resumed signal state for {len(symbols)} symbols from {state_path}.")
+    if engine.table.count.max() == 0:
+        engine.seed()
+        print(f"Seeded signal state for {len(symbols)} symbols.")
+
+    calendar = TradingCalendar(get_api())
+    if wait_for_open:
+        calendar.wait_until_open()
+
+    portfolio.seed()
+    print(f"Starting live trading for {len(symbols)} symbols...")
+    scheduler = BarScheduler(interval, settle=settle, calendar=calendar)
+    while True:
+        try:
+            tick = scheduler.wait()
+            if not calendar.is_open(tick.boundary - 1):
+                calendar.wait_until_open()
+                scheduler.reset()
+                continue
+            stats = engine.run_cycle()
+            engine.table.save(state_path)
+            portfolio.maybe_reconcile()
+            print(f"Cycle: {stats['bars']} new bars, {len(stats['submitted'])} orders, "
+                  f"{len(orders.tracked)} awaiting fill, {stats['total'] * 1000:.1f} ms, "
+                  f"woke {tick.lag * 1000:.0f} ms late")
+            record_cycle(tick, scheduler.complete(tick), 'universe', metrics_path)
         except KeyboardInterrupt:
             print("Live trading stopped by user.")
+            orders.shutdown(wait=False)
             break
         except Exception as e:
+            # The scheduler retries at the next bar boundary
+            METRICS.inc('errors', mode='universe')
             print(f"Error in live trading loop: {e}")
-            time.sleep(60)  # Retry after 1 minute
+    engine.pool.shutdown(wait=True)
 
 def main():
-    symbol = 'AAPL'
-    interval = 'minute'
+    parser = argparse.ArgumentParser(description="Live RSI trading on Alpaca.")
+    parser.add_argument('--mode', choices=['stream', 'poll'], default='stream',
+                        help="React to streamed bars, or poll the REST API once per bar.")
+    parser.add_argument('--stream-url', default=None,
+                        help="Market data stream URL, e.g. http://127.0.0.1:8765 for utils/fake_stream.py.")
+    parser.add_argument('--no-wait', action='store_true', help="Do not wait for the market to open.")
+    parser.add_argument('--mock-broker', action='store_true',
+                        help="Trade against the in-process mock broker instead of Alpaca, e.g. offline with "
+                             "--stream-url pointing at utils/fake_stream.py.")
+    parser.add_argument('--model', action='store_true',
+                        help="Load the newest saved LSTM model for the symbol and print next-close predictions.")
+    parser.add_argument('--interval', default='minute', choices=list(INTERVAL_SECONDS),
+                        help="Bar interval, the polling loops run once per bar.")
+    parser.add_argument('--symbols', default='AAPL',
+                        help="Comma-separated symbols, more than one runs the multi-symbol engine.")
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help="Serve stage latency metrics for Prometheus at http://127.0.0.1:PORT/metrics.")
+    parser.add_argument('--metrics-file', default=None,
+                        help="Write stage latency metrics to this file (Prometheus text format).")
+    parser.add_argument('--debug', action='store_true',
+                        help="Log debug output (e.g., every fetched bar frame) to the console and the log file.")
+    args = parser.parse_args()
+
+    if args.debug:
+        logging.getLogger().setLevel(logging.DEBUG)
+        logging.getLogger().addHandler(logging.StreamHandler())
+    if args.metrics_port is not None:
+        METRICS.serve(args.metrics_port)
+        print(f"Serving metrics at http://127.0.0.1:{args.metrics_port}/metrics")
+
+    symbols = [symbol.strip().upper() for symbol in args.symbols.split(',') if symbol.strip()]
+    symbol = symbols[0]
+    interval = args.interval
     qty = 5      # Number of shares to trade
     cooldown_period = 5  # Cooldown period between trades (in minutes)
 
-    run_live_trading(symbol, interval=interval, qty=qty, cooldown_period=cooldown_period)
+    broker = None
+    if args.mock_broker:
+        from live.mock_broker import MockBroker
+
+        # Every REST call of the live code (bars, account, orders, calendar) goes to the mock
+        broker = MockBroker()
+        set_api(broker)
+
+    if len(symbols) > 1:
+        run_universe_trading(symbols, interval=interval, qty=qty, cooldown_period=cooldown_period,
+                             metrics_path=args.metrics_file, wait_for_open=not args.no_wait)
+        return
+
+    predictor = load_predictor(symbol, interval) if args.model else None
+    if args.mode == 'stream':
+        # The mock broker fills at the streamed closes and has no trade_updates stream, its fills are polled
+        run_stream_trading(symbol, interval=interval, qty=qty, cooldown_period=cooldown_period,
+                           data_stream_url=args.stream_url, wait_for_open=not args.no_wait, predictor=predictor,
+                           metrics_path=args.metrics_file, api=broker, trade_updates=broker is None,
+                           bar_hook=None if broker is None else lambda bar: broker.set_price(symbol, bar.close))
+    else:
+        run_live_trading(symbol, interval=interval, qty=qty, cooldown_period=cooldown_period, predictor=predictor,
+                         metrics_path=args.metrics_file, wait_for_open=not args.no_wait)
 
 if __name__ == "__main__":
     main()
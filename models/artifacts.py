@@ -0,0 +1,229 @@
+import hashlib
+import json
+import os
+import pickle
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from models.predictive_model import preprocess_data, train_predictive_model, window_batches
+
+MODEL_STORE = 'model_store'
+
+
+def hyperparams_hash(hyperparams):
+    """
+    Short, stable hash of a hyperparameter dict, used in artifact version names.
+    """
+    encoded = json.dumps(hyperparams, sort_keys=True, default=list).encode()
+    return hashlib.sha1(encoded).hexdigest()[:8]
+
+
+def _data_range(data):
+    return data.index[0].isoformat(), data.index[-1].isoformat()
+
+
+def save_model_artifact(model, scaler, symbol, interval, data, hyperparams, root=MODEL_STORE, fine_tuned_from=None):
+    """
+    Save a trained model and its fitted scaler, versioned by symbol, data range and hyperparameters.
+
+    Parameters:
+    - model: Trained LSTM model.
+    - scaler: Scaler used to normalize the data.
+    - symbol: str, the stock symbol the model was trained on.
+    - interval: str, the data interval ('minute', '1D', etc.).
+    - data: pandas DataFrame the model was trained on (its index gives the data range).
+    - hyperparams: dict, the training hyperparameters (window_size, feature_columns, epochs, ...).
+    - root: str, directory holding the model store.
+    - fine_tuned_from: str, path of the artifact this model was fine-tuned from (kept in the metadata,
+      outside the hashed hyperparameters, so fine-tuned versions are found by the same lookup).
+
+    Returns:
+    - str, path of the saved artifact directory.
+    """
+    data_start, data_end = _data_range(data)
+    version = f"{data_start[:10].replace('-', '')}-{data_end[:10].replace('-', '')}-{hyperparams_hash(hyperparams)}"
+    path = os.path.join(root, symbol.upper(), interval, version)
+    os.makedirs(path, exist_ok=True)
+
+    model.save(os.path.join(path, 'model.h5'))
+    with open(os.path.join(path, 'scaler.pkl'), 'wb') as f:
+        pickle.dump(scaler, f)
+    meta = {
+        'symbol': symbol.upper(),
+        'interval': interval,
+        'data_start': data_start,
+        'data_end': data_end,
+        'rows': len(data),
+        'hyperparams': hyperparams,
+        'hyperparams_hash': hyperparams_hash(hyperparams),
+        'fine_tuned_from': fine_tuned_from,
+        'created_at': time.time(),
+    }
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2, default=list)
+
+    print(f"Saved model artifact to {path}")
+    return path
+
+
+def list_model_artifacts(symbol, interval, hyperparams=None, root=MODEL_STORE):
+    """
+    List saved artifacts for a symbol and interval, newest data first.
+
+    Returns:
+    - list of (path, meta) tuples, filtered to matching hyperparameters if given.
+    """
+    base = os.path.join(root, symbol.upper(), interval)
+    if not os.path.isdir(base):
+        return []
+    wanted = None if hyperparams is None else hyperparams_hash(hyperparams)
+    artifacts = []
+    for version in os.listdir(base):
+        meta_path = os.path.join(base, version, 'meta.json')
+        if not os.path.exists(meta_path):
+            continue
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if wanted is None or meta['hyperparams_hash'] == wanted:
+            artifacts.append((os.path.join(base, version), meta))
+    artifacts.sort(key=lambda item: (item[1]['data_end'], item[1]['created_at']), reverse=True)
+    return artifacts
+
+
+def load_model_artifact(symbol, interval, hyperparams=None, root=MODEL_STORE, path=None):
+    """
+    Load the newest matching artifact (or the one at `path`).
+
+    Returns:
+    - (model, scaler, meta), or None if no artifact matches.
+    """
+    if path is None:
+        artifacts = list_model_artifacts(symbol, interval, hyperparams, root)
+        if not artifacts:
+            return None
+        path = artifacts[0][0]
+
+    from tensorflow.keras.models import load_model
+
+    model = load_model(os.path.join(path, 'model.h5'))
+    with open(os.path.join(path, 'scaler.pkl'), 'rb') as f:
+        scaler = pickle.load(f)
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+    return model, scaler, meta
+
+
+def fine_tune(model, scaler, data, window_size=60, feature_columns=('close',), target_column='close',
+              batch_size=32, epochs=2):
+    """
+    Continue training a model on new bars, keeping the scaler it was trained with.
+
+    Parameters:
+    - data: pandas DataFrame with the new bars plus at least window_size bars of history before them.
+    """
+    try:
+        X, y, _ = preprocess_data(data, window_size, feature_columns, target_column, scaler=scaler)
+    except ValueError:
+        return model
+    model.fit(window_batches(X, y, np.arange(len(y)), batch_size),
+              steps_per_epoch=int(np.ceil(len(y) / batch_size)), epochs=epochs)
+    return model
+
+
+def train_or_load(symbol, interval, data, window_size=60, feature_columns=('close',), target_column='close',
+                  batch_size=32, epochs=20, fine_tune_epochs=2, root=MODEL_STORE):
+    """
+    Warm-start a model: load the newest matching artifact, fine-tune it on bars newer than its
+    training range, and only train from scratch when no artifact exists.
+
+    Returns:
+    - model, scaler
+    """
+    hyperparams = {
+        'window_size': window_size,
+        'feature_columns': list(feature_columns),
+        'target_column': target_column,
+        'batch_size': batch_size,
+        'epochs': epochs,
+    }
+    artifacts = list_model_artifacts(symbol, interval, hyperparams, root)
+    if not artifacts:
+        print(f"No saved model for {symbol} ({interval}). Training from scratch...")
+        model, scaler = train_predictive_model(data, window_size, feature_columns, target_column,
+                                               batch_size=batch_size, epochs=epochs)
+        save_model_artifact(model, scaler, symbol, interval, data, hyperparams, root)
+        return model, scaler
+
+    path = artifacts[0][0]
+    model, scaler, meta = load_model_artifact(symbol, interval, root=root, path=path)
+    new_rows = int((data.index > pd.Timestamp(meta['data_end'])).sum())
+    if new_rows == 0:
+        print(f"Loaded model for {symbol} ({interval}) trained through {meta['data_end']}.")
+        return model, scaler
+
+    print(f"Fine-tuning model for {symbol} ({interval}) on {new_rows} new bars...")
+    model = fine_tune(model, scaler, data.iloc[-(new_rows + window_size):], window_size, feature_columns,
+                      target_column, batch_size=batch_size, epochs=fine_tune_epochs)
+    save_model_artifact(model, scaler, symbol, interval, data, hyperparams, root, fine_tuned_from=path)
+    return model, scaler
+
+
+class Predictor:
+    """
+    Long-lived, in-process next-close predictor for the live loop (close-only models).
+
+    Keeps the last window_size scaled closes in a ring buffer and calls the model
+    directly on a preallocated input, avoiding model.predict's per-call setup.
+    """
+
+    def __init__(self, model, scaler, window_size=60):
+        self.model = model
+        self.scaler = scaler
+        self.window_size = window_size
+        self.window = deque(maxlen=window_size)
+        self.prediction = np.nan
+        self._input = np.zeros((1, window_size, 1), dtype=np.float32)
+        # MinMaxScaler is element-wise, keep its coefficients to scale one value without sklearn overhead
+        self._scale = float(scaler.scale_[0])
+        self._min = float(scaler.min_[0])
+
+    @classmethod
+    def from_store(cls, symbol, interval, window_size=60, root=MODEL_STORE):
+        """
+        Load the newest close-only artifact for a symbol and interval, or return None if there is none.
+
+        Artifacts trained on other features are skipped, the predictor only feeds scaled closes.
+        """
+        artifacts = [(path, meta) for path, meta in list_model_artifacts(symbol, interval, root=root)
+                     if meta['hyperparams'].get('feature_columns', ['close']) == ['close']
+                     and meta['hyperparams'].get('target_column', 'close') == 'close']
+        if not artifacts:
+            return None
+        model, scaler, meta = load_model_artifact(symbol, interval, root=root, path=artifacts[0][0])
+        return cls(model, scaler, meta['hyperparams'].get('window_size', window_size))
+
+    def seed(self, closes):
+        """
+        Fill the window from historical closes (oldest first).
+        """
+        for close in closes:
+            self.window.append(float(close) * self._scale + self._min)
+
+    def update(self, close):
+        """
+        Add one close and predict the next one.
+
+        Returns:
+        - float predicted next close, NaN until the window is full.
+        """
+        self.window.append(float(close) * self._scale + self._min)
+        if len(self.window) < self.window_size:
+            self.prediction = np.nan
+            return self.prediction
+        self._input[0, :, 0] = self.window
+        scaled = float(np.asarray(self.model(self._input, training=False)).reshape(-1)[0])
+        self.prediction = (scaled - self._min) / self._scale
+        return self.prediction
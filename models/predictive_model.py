@@ -1,30 +1,67 @@
 import numpy as np
 import pandas as pd
-from keras.models import Sequential
-from keras.layers import LSTM, Dense
-from sklearn.preprocessing import MinMaxScaler
-from sklearn.model_selection import train_test_split
 
-def preprocess_data(data, window_size=60):
+# Keras/TensorFlow and scikit-learn take seconds to import, so they are imported where they are used
+
+def preprocess_data(data, window_size=60, feature_columns=('close',), target_column='close', scaler=None):
     """
     Prepares stock data for training an LSTM model.
 
     Parameters:
     - data: pandas DataFrame, stock price data (e.g., 'close' prices).
     - window_size: int, number of previous time steps to use for prediction.
+    - feature_columns: sequence of str, columns used as model inputs (e.g., OHLCV, 'RSI').
+      Rows with a missing value in any feature column are dropped.
+    - target_column: str, the column to predict, must be one of feature_columns.
+    - scaler: an already fitted scaler to reuse (e.g., when fine-tuning), a new one is fitted if None.
+
+    Raises:
+    - ValueError if there are no more complete rows than window_size.
 
     Returns:
-    - X, y: Feature and target datasets for the model.
+    - X, y: Feature and target datasets for the model. X is a read-only strided view of shape
+      (samples, window_size, features) over the scaled data, so no window is copied.
+    - scaler: Scaler fitted on the feature columns.
     """
-    scaler = MinMaxScaler(feature_range=(0, 1))
-    scaled_data = scaler.fit_transform(data['close'].values.reshape(-1, 1))
+    feature_columns = list(feature_columns)
+    target_index = feature_columns.index(target_column)
+    values = data[feature_columns].dropna().to_numpy(dtype=np.float64)
+    if len(values) <= window_size:
+        raise ValueError("Insufficient data for training. Check the dataset and window size.")
+
+    if scaler is None:
+        from sklearn.preprocessing import MinMaxScaler
 
-    X, y = [], []
-    for i in range(window_size, len(scaled_data)):
-        X.append(scaled_data[i-window_size:i, 0])
-        y.append(scaled_data[i, 0])
+        scaler = MinMaxScaler(feature_range=(0, 1))
+        scaled_data = scaler.fit_transform(values)
+    else:
+        scaled_data = scaler.transform(values)
 
-    return np.array(X), np.array(y), scaler
+    # Sample k is rows k..k+window_size-1 and its target is row k+window_size
+    X = np.lib.stride_tricks.sliding_window_view(scaled_data[:-1], window_size, axis=0)
+    X = X.transpose(0, 2, 1)
+    y = scaled_data[window_size:, target_index]
+
+    return X, y, scaler
+
+def window_batches(X, y, indices, batch_size=32, shuffle=True, seed=42):
+    """
+    Endlessly yield (X_batch, y_batch) pairs for model.fit, copying only one batch of windows at a time.
+
+    Parameters:
+    - X, y: Feature and target datasets from preprocess_data.
+    - indices: array of sample indices to draw from (e.g., the training split).
+    - batch_size: int, number of samples per batch.
+    - shuffle: bool, reshuffle the indices every epoch.
+    - seed: int, random seed for shuffling.
+    """
+    rng = np.random.default_rng(seed)
+    indices = np.asarray(indices)
+    while True:
+        order = rng.permutation(indices) if shuffle else indices
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            yield np.ascontiguousarray(X[batch]), y[batch]
 
 def build_lstm_model(input_shape):
     """
@@ -36,6 +73,9 @@ def build_lstm_model(input_shape):
     Returns:
     - model: Compiled Keras LSTM model.
     """
+    from keras.models import Sequential
+    from keras.layers import LSTM, Dense
+
     model = Sequential()
     model.add(LSTM(units=50, return_sequences=True, input_shape=input_shape))
     model.add(LSTM(units=50, return_sequences=False))
@@ -44,41 +84,85 @@ def build_lstm_model(input_shape):
     model.compile(optimizer='adam', loss='mean_squared_error')
     return model
 
-def train_predictive_model(data, window_size=60):
+def train_predictive_model(data, window_size=60, feature_columns=('close',), target_column='close',
+                           batch_size=32, epochs=20):
     """
     Trains an LSTM model on the provided stock data.
 
     Parameters:
     - data: pandas DataFrame, stock price data (e.g., 'close' prices).
     - window_size: int, number of previous time steps to use for prediction.
+    - feature_columns: sequence of str, columns used as model inputs.
+    - target_column: str, the column to predict.
+    - batch_size: int, number of samples per training batch.
+    - epochs: int, number of training epochs.
 
     Returns:
     - model: Trained LSTM model.
     - scaler: Scaler used to normalize the data.
     """
-    X, y, scaler = preprocess_data(data, window_size)
+    X, y, scaler = preprocess_data(data, window_size, feature_columns, target_column)
 
     # Check for empty inputs
     if X.size == 0 or y.size == 0:
         raise ValueError("Insufficient data for training. Check the dataset and window size.")
 
-    X = X.reshape(X.shape[0], X.shape[1], 1)  # Reshape for LSTM input
-
-    # Split data into training and testing sets
     from sklearn.model_selection import train_test_split
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
-    # Build and train the LSTM model
-    from tensorflow.keras.models import Sequential
-    from tensorflow.keras.layers import LSTM, Dense
+    # Split sample indices rather than the samples, the windows stay a view over the scaled data
+    train_idx, test_idx = train_test_split(np.arange(len(y)), test_size=0.2, random_state=42)
 
-    model = Sequential()
-    model.add(LSTM(units=50, return_sequences=True, input_shape=(X_train.shape[1], 1)))
-    model.add(LSTM(units=50, return_sequences=False))
-    model.add(Dense(units=25))
-    model.add(Dense(units=1))
-
-    model.compile(optimizer='adam', loss='mean_squared_error')
-    model.fit(X_train, y_train, batch_size=32, epochs=20, validation_data=(X_test, y_test))
+    # Build and train the LSTM model, batches are streamed from the window view
+    model = build_lstm_model((window_size, X.shape[2]))
+    model.fit(
+        window_batches(X, y, train_idx, batch_size),
+        steps_per_epoch=int(np.ceil(len(train_idx) / batch_size)),
+        epochs=epochs,
+        validation_data=window_batches(X, y, test_idx, batch_size, shuffle=False),
+        validation_steps=int(np.ceil(len(test_idx) / batch_size)),
+    )
 
     return model, scaler
+
+def predict_prices(model, scaler, data, window_size=60, batch_size=1024, feature_columns=('close',),
+                   target_column='close'):
+    """
+    Predict the target of every bar from the preceding window, in large batches.
+
+    Parameters:
+    - model: Trained LSTM model.
+    - scaler: Scaler used to normalize the data.
+    - data: pandas DataFrame, stock price data (e.g., 'close' prices).
+    - window_size: int, number of previous time steps used for each prediction.
+    - batch_size: int, number of windows per inference batch.
+    - feature_columns: sequence of str, the model's input columns, as in preprocess_data.
+    - target_column: str, the column the model predicts.
+
+    Returns:
+    - numpy array of predicted values aligned with data, NaN for the first window_size bars
+      (and for windows with a missing feature value).
+    """
+    feature_columns = list(feature_columns)
+    target_index = feature_columns.index(target_column)
+    values = data[feature_columns].to_numpy(dtype=np.float64)
+    predictions = np.full(len(values), np.nan)
+    if len(values) <= window_size:
+        return predictions
+
+    # The scaler is element-wise, so scaling the series once equals scaling every window
+    scaled = scaler.transform(values)
+
+    # Window k covers bars k..k+window_size-1 and predicts bar k+window_size (zero-copy view)
+    windows = np.lib.stride_tricks.sliding_window_view(scaled[:-1], window_size, axis=0).transpose(0, 2, 1)
+    predicted = np.empty(len(windows))
+    for start in range(0, len(windows), batch_size):
+        # Only one batch of windows is materialized at a time
+        batch = np.ascontiguousarray(windows[start:start + batch_size])
+        predicted[start:start + len(batch)] = np.asarray(model.predict_on_batch(batch)).reshape(-1)
+
+    # Invert the scaling of the target column only, the other columns of the matrix are placeholders
+    unscaled = np.zeros((len(predicted), len(feature_columns)))
+    unscaled[:, target_index] = predicted
+    predictions[window_size:] = scaler.inverse_transform(unscaled)[:, target_index]
+    return predictions
+
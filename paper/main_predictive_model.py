@@ -1,13 +1,13 @@
-from utils.alpaca_fetcher import fetch_alpaca_data
+from utils.alpaca_fetcher import fetch_cached_data
 from indicators.rsi import calculate_rsi, generate_signals
 from backtest.backtesting import backtest_strategy
-from models.predictive_model import train_predictive_model
-import matplotlib.pyplot as plt
+from models.predictive_model import predict_prices
+from models.artifacts import train_or_load
 
 def main():
     # Step 1: Fetch Data
-    print("Fetching data from Alpaca...")
-    data = fetch_alpaca_data('TSLA', interval='1D', limit=10000)
+    print("Fetching data from Alpaca (through the local bar cache)...")
+    data = fetch_cached_data('TSLA', interval='1D', limit=10000)
 
     # Check if data is empty
     if data is None or data.empty:
@@ -29,20 +29,13 @@ def main():
         return
 
     # Step 2: Train Predictive Model
-    print("Training predictive model...")
-    model, scaler = train_predictive_model(data, window_size=60)
-    print("Predictive model trained successfully.")
+    print("Loading or training predictive model...")
+    model, scaler = train_or_load('TSLA', '1D', data, window_size=60)
+    print("Predictive model ready.")
 
     # Step 3: Add Predictions to the DataFrame
     print("Adding predictions...")
-    predictions = []
-    for i in range(60, len(data)):
-        input_data = data['close'].values[i-60:i]
-        scaled_data = scaler.transform(input_data.reshape(-1, 1)).reshape(1, 60, 1)
-        predicted_price = scaler.inverse_transform(model.predict(scaled_data))[0][0]
-        predictions.append(predicted_price)
-
-    data['Predicted_Close'] = [None] * 60 + predictions
+    data['Predicted_Close'] = predict_prices(model, scaler, data, window_size=60)
     print(data[['close', 'Predicted_Close']].tail())
 
     # Step 4: Calculate RSI and Generate Signals
@@ -55,8 +48,12 @@ def main():
 
     # Step 5: Backtest the Strategy
     print("Backtesting the strategy...")
-    final_balance = backtest_strategy(data, initial_balance=100000, stop_loss=0.05, take_profit=0.10, position_size=0.1)
+    result = backtest_strategy(data, initial_balance=100000, stop_loss=0.05, take_profit=0.10, position_size=0.1)
+    final_balance = result.final_balance
     print(f"Final Balance after backtesting: ${final_balance:.2f}")
+    metrics = result.metrics()
+    print(f"Sharpe: {metrics['sharpe']:.2f}, Max Drawdown: {metrics['max_drawdown']:.2%}, "
+          f"Win Rate: {metrics['win_rate']:.2%}, Trades: {metrics['trades']}")
 
     # Step 6: Visualize Results
     print("Visualizing results...")
@@ -66,6 +63,8 @@ def plot_results(data):
     """
     Plot the closing prices, RSI, buy/sell signals, and predicted prices.
     """
+    import matplotlib.pyplot as plt
+
     # Plot closing prices with buy/sell signals
     plt.figure(figsize=(12, 8))
     plt.subplot(2, 1, 1)
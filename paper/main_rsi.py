@@ -1,14 +1,13 @@
-from utils.alpaca_fetcher import fetch_alpaca_data
+from utils.alpaca_fetcher import fetch_cached_data
 from indicators.rsi import calculate_rsi, generate_signals
 from backtest.backtesting import backtest_strategy
-import matplotlib.pyplot as plt
 
 def main():
     symbol = 'AAPL'
     interval = '1D'
 
-    print("Fetching data from Alpaca...")
-    data = fetch_alpaca_data(symbol, interval=interval, limit=100)
+    print("Fetching data from Alpaca (through the local bar cache)...")
+    data = fetch_cached_data(symbol, interval=interval, limit=100)
     if data is None or data.empty:
         print("No data fetched. Please check the symbol, interval, or Alpaca API settings.")
         return
@@ -31,11 +30,17 @@ def main():
     print(data[['close', 'RSI', 'Signal']].tail())
 
     print("Backtesting the strategy...")
-    final_balance = backtest_strategy(data, initial_balance=100000, stop_loss=0.05, take_profit=0.10, position_size=0.1)
+    result = backtest_strategy(data, initial_balance=100000, stop_loss=0.05, take_profit=0.10, position_size=0.1)
+    final_balance = result.final_balance
 
     print(f"Final Balance after backtesting: ${final_balance:.2f}")
+    metrics = result.metrics()
+    print(f"Sharpe: {metrics['sharpe']:.2f}, Max Drawdown: {metrics['max_drawdown']:.2%}, "
+          f"Win Rate: {metrics['win_rate']:.2%}, Trades: {metrics['trades']}")
 
     print("Visualizing results...")
+    import matplotlib.pyplot as plt
+
     plt.figure(figsize=(12, 6))
     plt.plot(data.index, data['close'], label='Close Price', color='blue')
     plt.plot(data.index, data['RSI'], label='RSI', color='orange')
@@ -1,86 +1,64 @@
-from utils.alpaca_fetcher_live import fetch_live_data
-from indicators.rsi import calculate_rsi, generate_signals
-from alpaca_trade_api.rest import REST, TimeFrame, TimeFrameUnit
+from utils.alpaca_fetcher import fetch_cached_data
+from indicators.rsi import calculate_rsi, generate_signal_array
+from live.replay import replay
+from main_live import execute_trade
+import argparse
+import logging
 import time
 
-# Alpaca API initialization
-ALPACA_API_KEY = "Insert Key"
-ALPACA_SECRET_KEY = "Insert Secret Key"
-BASE_URL = "https://paper-api.alpaca.markets/v2"  # Switch to live API for live trading
-api = REST(ALPACA_API_KEY, ALPACA_SECRET_KEY, base_url=BASE_URL)
+import numpy as np
 
-def execute_trade(symbol, signal, qty=1):
-    if signal == 1:
-        print(f"Placing BUY order for {symbol}...")
-        # Simulate order
-    elif signal == -1:
-        print(f"Placing SELL order for {symbol}...")
-        # Simulate order
-    else:
-        print(f"No action taken for {symbol}. Signal: {signal}")
+def check_signal_parity(data, signals, window=14, cooldown_period=5):
+    """
+    Compare the replayed (streaming) signals with the batch RSI/signal pipeline used by the backtests.
 
-def fetch_historical_data(symbol, interval='1D', limit=100):
-    try:
-        if interval == 'minute':
-            timeframe = TimeFrame.Minute
-        elif interval == '15Min':
-            timeframe = TimeFrame(15, TimeFrameUnit.Minute)
-        elif interval == '1D':
-            timeframe = TimeFrame.Day
-        else:
-            raise ValueError(f"Unsupported interval: {interval}")
-
-        print(f"Fetching historical data for {symbol} | Interval: {interval} | Limit: {limit}")
-        bars = api.get_bars(symbol, timeframe, limit=limit)
-        data = bars.df
+    Returns:
+    - int, the number of bars where the two disagree.
+    """
+    rsi = calculate_rsi(data['close'], window=window).to_numpy()
+    valid = ~np.isnan(rsi)
+    batch = generate_signal_array(rsi[valid], cooldown_period=cooldown_period)
+    return int(np.count_nonzero(batch != signals[valid]))
 
-        if not data.empty:
-            data.index = data.index.tz_convert('America/New_York')
-            print(f"Fetched {len(data)} rows for {symbol}")
-        else:
-            print("Fetched dataframe is empty.")
-
-        return data
-    except Exception as e:
-        print(f"Error fetching historical data for {symbol}: {e}")
-        return None
-
-def simulate_trading(symbol, interval='1D', window=14, qty=1, cooldown_period=5):
+def simulate_trading(symbol, interval='1D', window=14, qty=1, cooldown_period=5, limit=100, verbose=True):
+    """
+    Replay historical bars through the live strategy and execution code against a simulated broker.
+    """
     print(f"Starting simulated trading for {symbol}...")
 
-    data = fetch_historical_data(symbol, interval=interval, limit=100)
+    data = fetch_cached_data(symbol, interval=interval, limit=limit)
     if data is None or data.empty:
         print(f"No historical data available for {symbol}.")
-        return
-
-    last_trade_time = None
-
-    for i in range(window, len(data)):
-        live_data = data.iloc[:i + 1]
-        live_data['RSI'] = calculate_rsi(live_data['close'], window=window)
-        live_data = generate_signals(live_data.copy(), cooldown_period=cooldown_period)
-
-        latest_signal = live_data['Signal'].iloc[-1]
-        print(f"Simulated RSI: {live_data['RSI'].iloc[-1]}, Signal: {latest_signal}")
-
-        current_time = time.time()
-        if last_trade_time is not None and current_time - last_trade_time < cooldown_period * 60:
-            print("Cooldown period active. Skipping trade...")
-            time.sleep(1)
-            continue
-
-        execute_trade(symbol, latest_signal, qty)
-        last_trade_time = current_time
+        return None
 
-        time.sleep(1)
+    # Simulated orders must not end up in the live trade log
+    logging.disable(logging.INFO)
+    try:
+        start = time.perf_counter()
+        run = replay(data, symbol, execute_trade, qty=qty, window=window, cooldown_period=cooldown_period,
+                     verbose=verbose)
+        elapsed = time.perf_counter() - start
+    finally:
+        logging.disable(logging.NOTSET)
+
+    mismatches = check_signal_parity(data, run.signals, window=window, cooldown_period=cooldown_period)
+    print(f"Replayed {len(data)} bars in {elapsed:.2f}s ({len(data) / max(elapsed, 1e-9):,.0f} bars/s).")
+    print(f"Orders: {len(run.orders)}, Final equity: ${run.final_equity:.2f}")
+    print(f"Signal parity with the batch pipeline: {'OK' if mismatches == 0 else f'{mismatches} mismatches'}")
+    return run
 
 def main():
-    symbol = 'AAPL'
-    interval = '1D'
-    qty = 10
-    cooldown_period = 5
-
-    simulate_trading(symbol, interval=interval, qty=qty, cooldown_period=cooldown_period)
+    parser = argparse.ArgumentParser(description="Replay historical bars through the live trading code.")
+    parser.add_argument('--symbol', default='AAPL')
+    parser.add_argument('--interval', default='1D')
+    parser.add_argument('--limit', type=int, default=100, help="Number of bars to replay.")
+    parser.add_argument('--qty', type=int, default=10)
+    parser.add_argument('--cooldown', type=int, default=5)
+    parser.add_argument('--quiet', action='store_true', help="Do not print every bar.")
+    args = parser.parse_args()
+
+    simulate_trading(args.symbol, interval=args.interval, qty=args.qty, cooldown_period=args.cooldown,
+                     limit=args.limit, verbose=not args.quiet)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,38 @@
+import threading
+
+_api = None
+_lock = threading.Lock()
+
+
+def get_api():
+    """
+    Return the process-wide Alpaca REST client, constructing it on first use.
+
+    The client (and alpaca_trade_api itself) is only imported and built when a
+    caller actually needs it, so importing the trading modules stays cheap.
+
+    Returns:
+    - alpaca_trade_api REST client configured from key/config.py.
+    """
+    global _api
+    if _api is None:
+        with _lock:
+            if _api is None:
+                from alpaca_trade_api.rest import REST
+                from key.config import ALPACA_API_KEY, ALPACA_SECRET_KEY, BASE_URL
+
+                _api = REST(ALPACA_API_KEY, ALPACA_SECRET_KEY, base_url=BASE_URL)
+    return _api
+
+
+def set_api(api):
+    """
+    Replace the shared client, e.g. with a mock broker for offline runs.
+
+    Returns:
+    - the client it replaced (None if none was built yet), so callers can restore it.
+    """
+    global _api
+    with _lock:
+        previous, _api = _api, api
+    return previous
@@ -1,15 +1,14 @@
-from alpaca_trade_api.rest import REST, TimeFrame, TimeFrameUnit
+import pandas as pd
 
-# Alpaca credentials
-ALPACA_API_KEY = "Insert Key"
-ALPACA_SECRET_KEY = "Insert Secret Key"
-BASE_URL = "https://paper-api.alpaca.markets/v2"
+from utils.alpaca_client import get_api
+from utils.bar_cache import BarCache, COLUMNS, to_epoch_ns
 
-# Initialize Alpaca API
-api = REST(ALPACA_API_KEY, ALPACA_SECRET_KEY, base_url=BASE_URL)
+HISTORY_START = '2016-01-01T00:00:00Z'  # Earliest market data Alpaca serves
 
 
 def map_timeframe(interval):
+    from alpaca_trade_api.rest import TimeFrame, TimeFrameUnit
+
     if interval == 'minute':
         return TimeFrame.Minute
     elif interval == '15Min':
@@ -39,7 +38,7 @@ def fetch_alpaca_data(symbol, interval='minute', limit=500):
         timeframe = map_timeframe(interval)
 
         # Fetch bars
-        bars = api.get_bars(symbol, timeframe, limit=limit)
+        bars = get_api().get_bars(symbol, timeframe, limit=limit)
         data = bars.df
 
         # Convert to market timezone
@@ -50,3 +49,76 @@ def fetch_alpaca_data(symbol, interval='minute', limit=500):
     except Exception as e:
         print(f"Error fetching data for {symbol} with interval '{interval}': {e}")
         return None
+
+
+def bar_columns(data):
+    """
+    Split a bars DataFrame into the cache's columns (epoch nanosecond 'timestamp' plus the OHLCV fields).
+    """
+    columns = {column: data[column].to_numpy() for column in data.columns if column in COLUMNS}
+    columns['timestamp'] = to_epoch_ns(data.index)
+    return columns
+
+
+def fetch_cached_data(symbol, interval='minute', limit=500, cache=None):
+    """
+    Fetch historical data through the local bar cache, downloading only bars newer than the cached ones
+    and, when `limit` asks for more than is cached (or the cache is cold), the older bars missing in front
+    of them. Once the broker runs out of older bars the cache remembers it and stops asking.
+
+    Parameters:
+    - symbol: str, the stock symbol (e.g., 'AAPL', 'TSLA').
+    - interval: str, the data interval ('minute', '15Min', '1D', etc.).
+    - limit: int, the number of data points to return (None returns everything cached).
+    - cache: BarCache, the cache to use (default is ./data_cache). With cache.offline set the network is never used.
+
+    Returns:
+    - pandas DataFrame containing the newest `limit` cached bars.
+    """
+    cache = cache or BarCache()
+    last_timestamp = cache.last_timestamp(symbol, interval)
+
+    if cache.offline:
+        if last_timestamp is None:
+            print(f"No cached data for {symbol} ({interval}) and offline mode is on.")
+        return cache.to_frame(symbol, interval, limit=limit)
+
+    timeframe = map_timeframe(interval)
+    if last_timestamp is not None:
+        try:
+            # Top up from the newest cached bar, already cached rows are skipped on append
+            start = pd.Timestamp(last_timestamp, tz='UTC').strftime('%Y-%m-%dT%H:%M:%SZ')
+            data = get_api().get_bars(symbol, timeframe, start=start).df
+            if not data.empty:
+                added = cache.append(symbol, interval, bar_columns(data))
+                print(f"Cached {added} new bars for {symbol} ({interval}).")
+        except Exception as e:
+            print(f"Error topping up cached data for {symbol} with interval '{interval}': {e}")
+
+    # A cold cache is filled the same way as a short one: the newest bars before the oldest cached one
+    last_timestamp = cache.last_timestamp(symbol, interval)
+    missing = None if limit is None else limit - cache.rows(symbol, interval)
+    wanted = last_timestamp is None if missing is None else missing > 0
+    if wanted and not cache.history_exhausted(symbol, interval):
+        try:
+            from alpaca_trade_api.rest import Sort
+
+            end = None
+            if last_timestamp is not None:
+                # The oldest cached bar comes back too and is skipped by prepend
+                first_timestamp = int(cache.read(symbol, interval)['timestamp'][0])
+                end = pd.Timestamp(first_timestamp, tz='UTC').strftime('%Y-%m-%dT%H:%M:%SZ')
+            request_limit = None if missing is None else missing + (last_timestamp is not None)
+            data = get_api().get_bars(symbol, timeframe, start=HISTORY_START, end=end, limit=request_limit,
+                                      sort=Sort.Desc).df
+            added = 0
+            if not data.empty:
+                added = cache.prepend(symbol, interval, bar_columns(data.sort_index()))
+                print(f"Cached {added} bars of history for {symbol} ({interval}).")
+            # Fewer bars than asked for means the broker has nothing older, do not ask again
+            if cache.rows(symbol, interval) and (missing is None or added < missing):
+                cache.mark_history_exhausted(symbol, interval)
+        except Exception as e:
+            print(f"Error backfilling cached data for {symbol} with interval '{interval}': {e}")
+
+    return cache.to_frame(symbol, interval, limit=limit)
@@ -1,14 +1,11 @@
-from alpaca_trade_api.rest import REST, TimeFrame, TimeFrameUnit
-import pandas as pd
+import logging
 
-# Alpaca credentials
-ALPACA_API_KEY = "Insert Key"
-ALPACA_SECRET_KEY = "Insert Secret Key"
-BASE_URL = "https://paper-api.alpaca.markets/v2"
+import pandas as pd
 
+from utils.alpaca_client import get_api
+from utils.bar_buffer import bar_columns
 
-# Initialize Alpaca API
-api = REST(ALPACA_API_KEY, ALPACA_SECRET_KEY, base_url=BASE_URL)
+logger = logging.getLogger(__name__)
 
 def map_timeframe(interval):
     """
@@ -20,6 +17,8 @@ def map_timeframe(interval):
     Returns:
     - TimeFrame object.
     """
+    from alpaca_trade_api.rest import TimeFrame, TimeFrameUnit
+
     if interval == 'minute':
         return TimeFrame.Minute
     elif interval == '15Min':
@@ -48,21 +47,50 @@ def fetch_live_data(symbol, interval='minute', limit=1):
         timeframe = map_timeframe(interval)
 
         # Fetch the latest bars
-        bars = api.get_bars(symbol, timeframe, limit=limit)
+        bars = get_api().get_bars(symbol, timeframe, limit=limit)
         data = bars.df
 
         # Convert to New York timezone
         if not data.empty:
             data.index = data.index.tz_convert('America/New_York')
 
-        print(f"Fetched live data for {symbol} ({interval}):")
-        print(data.tail())  # Show the most recent bars for debug
+        # Formatting the frame is the expensive part, so it only happens when debug logging is on
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Fetched live data for {symbol} ({interval}):\n{data.tail()}")
         return data
 
     except Exception as e:
         print(f"Error fetching live data for {symbol}: {e}")
         return pd.DataFrame()
 
+def fetch_live_bars(symbol, interval='minute', limit=1, start=None):
+    """
+    Fetch the latest bars as NumPy columns, without building a DataFrame.
+
+    Parameters:
+    - symbol: str, the stock symbol (e.g., 'AAPL').
+    - interval: str, the data interval ('minute', '15Min', etc.).
+    - limit: int, the number of bars to fetch (default: 1), None for every bar since start.
+    - start: int, optional epoch nanoseconds of the earliest bar to fetch.
+
+    Returns:
+    - dict of column name -> 1-D array (int64 epoch-nanosecond 'timestamp', float64 prices), oldest first,
+      or None on error. Feed it to a utils.bar_buffer.BarBuffer.
+    """
+    try:
+        if start is not None:
+            start = pd.Timestamp(start, unit='ns', tz='UTC').strftime('%Y-%m-%dT%H:%M:%SZ')
+        bars = list(get_api().get_bars_iter(symbol, map_timeframe(interval), start=start, limit=limit, raw=True))
+        columns = bar_columns(bars)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Fetched {len(bars)} live bars for {symbol} ({interval}), last close: "
+                         f"{columns['close'][-1] if len(bars) else None}")
+        return columns
+
+    except Exception as e:
+        print(f"Error fetching live bars for {symbol}: {e}")
+        return None
+
 def fetch_latest_trade(symbol):
     """
     Fetch the latest trade information for a symbol.
@@ -74,8 +102,8 @@ def fetch_latest_trade(symbol):
     - dict containing the latest trade data.
     """
     try:
-        trade = api.get_latest_trade(symbol)
-        print(f"Latest trade for {symbol}: {trade}")
+        trade = get_api().get_latest_trade(symbol)
+        logger.debug("Latest trade for %s: %s", symbol, trade)
         return trade
     except Exception as e:
         print(f"Error fetching latest trade for {symbol}: {e}")
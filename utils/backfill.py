@@ -0,0 +1,349 @@
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from utils.bar_buffer import bar_columns
+from utils.bar_cache import BarCache, COLUMNS, DTYPES
+
+DATA_URL = 'https://data.alpaca.markets'
+TIMEFRAMES = {'minute': '1Min', '15Min': '15Min', '1H': '1Hour', '1D': '1Day'}
+RECORD = np.dtype([(column, DTYPES[column]) for column in COLUMNS])
+
+
+def chunk_ranges(start, end, chunk_days=7):
+    """
+    Split [start, end) into consecutive chunks of at most chunk_days.
+
+    Returns:
+    - list of (start, end) UTC Timestamps.
+    """
+    start = pd.Timestamp(start)
+    end = pd.Timestamp(end)
+    start = start.tz_localize('UTC') if start.tz is None else start.tz_convert('UTC')
+    end = end.tz_localize('UTC') if end.tz is None else end.tz_convert('UTC')
+    step = pd.Timedelta(days=chunk_days)
+    chunks = []
+    while start < end:
+        chunks.append((start, min(start + step, end)))
+        start += step
+    return chunks
+
+
+def page_records(bars):
+    """
+    Convert one page of Alpaca bar dicts to a RECORD array (missing fields are NaN).
+    """
+    records = np.empty(len(bars), dtype=RECORD)
+    if not len(bars):
+        return records
+    for column, values in bar_columns(bars).items():
+        records[column] = values
+    return records
+
+
+class RateLimiter:
+    """
+    Throttle shared by all download threads.
+
+    Requests are spaced to stay under `rate` per `per` seconds, and when the server
+    reports the quota as spent (X-RateLimit-Remaining: 0, or HTTP 429) every thread
+    waits until its X-RateLimit-Reset time.
+    """
+
+    def __init__(self, rate=200, per=60.0):
+        self.interval = per / rate if rate else 0.0
+        self._next = 0.0
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Block until the caller may send a request.
+        """
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next, self._paused_until)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def pause(self, seconds):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def observe(self, headers):
+        """
+        Pause everyone until the reset time once the server says no requests are left.
+        """
+        remaining = headers.get('X-RateLimit-Remaining')
+        reset = headers.get('X-RateLimit-Reset')
+        if remaining is not None and reset is not None and int(remaining) <= 0:
+            self.pause(max(0.0, float(reset) - time.time()))
+
+
+class Backfill:
+    """
+    Chunked, concurrent download of deep bar history into the BarCache.
+
+    Every symbol's date range is split into chunks fetched in parallel over one
+    pooled HTTP session, paging through Alpaca's historical bars endpoint. Pages are
+    written straight to a staging file as they arrive, so only one page per thread
+    is ever in memory. A chunk's file is renamed into place only once it is
+    complete, and completed chunks are appended to the cache in time order as soon
+    as all earlier chunks of the symbol are in. An interrupted run resumes from the
+    cache and the staged chunks: nothing already downloaded is fetched again.
+
+    The cache is append-only, so bars older than what a symbol already has cached
+    are not added; backfill deeper history into a fresh cache directory.
+    """
+
+    def __init__(self, symbols, start, end, interval='minute', cache=None, chunk_days=7, max_workers=8,
+                 rate_limit=200, page_limit=10000, base_url=DATA_URL, key_id=None, secret_key=None, feed=None,
+                 max_retries=5, backoff=0.5, timeout=30, session=None):
+        """
+        Parameters:
+        - symbols: list of str, the symbols to backfill.
+        - start, end: str or Timestamp, the date range [start, end) (naive values are UTC).
+        - interval: str, the bar interval ('minute', '15Min', '1H', '1D').
+        - cache: BarCache receiving the bars (default is ./data_cache).
+        - chunk_days: int, days of history per request chunk.
+        - max_workers: int, concurrent chunk downloads (and pooled connections).
+        - rate_limit: int, requests per minute allowed by the account (None for no throttling).
+        - page_limit: int, bars per page (Alpaca allows up to 10000).
+        - base_url: str, the market data API, e.g. a utils/fake_data_api.py server offline.
+        - key_id, secret_key: str, API keys (default is key/config.py when it exists).
+        - feed: str, the data feed ('iex' or 'sip', default is the account's).
+        - max_retries: int, retries per request on rate-limit, server and connection errors.
+        - backoff: float, the first retry delay in seconds, doubled on every retry.
+        - timeout: float, seconds per HTTP request.
+        - session: requests.Session to use instead of a new pooled one.
+        """
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.symbols = [symbol.upper() for symbol in symbols]
+        self.interval = interval
+        self.timeframe = TIMEFRAMES[interval]
+        self.chunks = chunk_ranges(start, end, chunk_days)
+        self.cache = cache or BarCache()
+        self.max_workers = max_workers
+        self.page_limit = page_limit
+        self.base_url = base_url.rstrip('/')
+        self.feed = feed
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.limiter = RateLimiter(rate_limit)
+        self.staging = os.path.join(self.cache.root, '_backfill', interval)
+        self._merge_lock = threading.Lock()
+
+        if key_id is None:
+            try:
+                from key.config import ALPACA_API_KEY, ALPACA_SECRET_KEY
+                key_id, secret_key = ALPACA_API_KEY, ALPACA_SECRET_KEY
+            except ImportError:
+                pass
+        self.session = session
+        if self.session is None:
+            self.session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+            self.session.mount('http://', adapter)
+            self.session.mount('https://', adapter)
+        if key_id is not None:
+            self.session.headers.update({'APCA-API-KEY-ID': key_id, 'APCA-API-SECRET-KEY': secret_key})
+
+    def _chunk_path(self, symbol, chunk):
+        return os.path.join(self.staging, symbol, f"{chunk[0].value}_{chunk[1].value}.bin")
+
+    def _progress_path(self, symbol):
+        return os.path.join(self.staging, symbol, 'progress.json')
+
+    def merged_until(self, symbol):
+        """
+        Epoch nanoseconds up to which the symbol's history is complete in the cache (None if nothing is).
+        """
+        try:
+            with open(self._progress_path(symbol)) as f:
+                return json.load(f)['merged_until']
+        except FileNotFoundError:
+            return None
+
+    def pending(self, symbol):
+        """
+        Chunks of the symbol that still have to be downloaded.
+        """
+        done = self.merged_until(symbol)
+        last = self.cache.last_timestamp(symbol, self.interval)
+        return [chunk for chunk in self.chunks
+                if not (done is not None and chunk[1].value <= done)
+                and not (last is not None and chunk[1].value <= last)
+                and not os.path.exists(self._chunk_path(symbol, chunk))]
+
+    def _get(self, path, params):
+        delay = self.backoff
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            try:
+                response = self.session.get(self.base_url + path, params=params, timeout=self.timeout)
+            except OSError as e:  # requests' connection errors and timeouts
+                error, retry_after = e, None
+            else:
+                self.limiter.observe(response.headers)
+                if response.status_code == 200:
+                    return response.json()
+                error = RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}")
+                if response.status_code != 429 and response.status_code < 500:
+                    raise error
+                retry_after = response.headers.get('Retry-After')
+                if response.status_code == 429 and retry_after is None:
+                    reset = response.headers.get('X-RateLimit-Reset')
+                    retry_after = None if reset is None else max(0.0, float(reset) - time.time())
+            if attempt == self.max_retries:
+                raise error
+            wait = float(retry_after) if retry_after is not None else delay * (1 + random.random())
+            self.limiter.pause(wait)
+            delay = min(delay * 2, 30.0)
+
+    def download_chunk(self, symbol, chunk):
+        """
+        Page through one chunk, streaming every page to the chunk's staging file.
+
+        Returns:
+        - int, the number of bars downloaded.
+        """
+        path = self._chunk_path(symbol, chunk)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.part"
+        params = {
+            'timeframe': self.timeframe,
+            'start': chunk[0].strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'end': chunk[1].strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'limit': self.page_limit,
+            'adjustment': 'raw',
+        }
+        if self.feed is not None:
+            params['feed'] = self.feed
+
+        rows = 0
+        with open(tmp_path, 'wb') as f:
+            while True:
+                page = self._get(f"/v2/stocks/{symbol}/bars", params)
+                records = page_records(page.get('bars') or [])
+                f.write(records.tobytes())
+                rows += len(records)
+                token = page.get('next_page_token')
+                if not token:
+                    break
+                params['page_token'] = token
+        os.replace(tmp_path, path)
+        return rows
+
+    def merge(self, symbol):
+        """
+        Append the symbol's completed chunks to the cache in time order, up to the first one still missing.
+
+        Returns:
+        - int, the number of bars appended.
+        """
+        with self._merge_lock:
+            done = self.merged_until(symbol)
+            added = 0
+            for chunk in self.chunks:
+                if done is not None and chunk[1].value <= done:
+                    continue
+                path = self._chunk_path(symbol, chunk)
+                if not os.path.exists(path):
+                    last = self.cache.last_timestamp(symbol, self.interval)
+                    if last is None or chunk[1].value > last:
+                        break
+                else:
+                    # One chunk in memory at a time, the cache skips rows it already has
+                    records = np.fromfile(path, dtype=RECORD)
+                    if len(records):
+                        added += self.cache.append(symbol, self.interval,
+                                                   {column: records[column] for column in COLUMNS})
+                    os.remove(path)
+                done = chunk[1].value
+                progress_path = self._progress_path(symbol)
+                os.makedirs(os.path.dirname(progress_path), exist_ok=True)
+                with open(f"{progress_path}.tmp", 'w') as f:
+                    json.dump({'merged_until': done}, f)
+                os.replace(f"{progress_path}.tmp", progress_path)
+            return added
+
+    def run(self):
+        """
+        Download every pending chunk and merge the results into the cache.
+
+        Returns:
+        - dict with the chunk and bar counts, the failed (symbol, chunk start) pairs and the elapsed seconds.
+        """
+        start = time.perf_counter()
+        jobs = [(symbol, chunk) for symbol in self.symbols for chunk in self.pending(symbol)]
+        total_chunks = len(self.symbols) * len(self.chunks)
+        print(f"Backfilling {len(self.symbols)} symbols ({self.interval}): {len(jobs)} of {total_chunks} chunks to "
+              f"download, {self.max_workers} workers.")
+
+        # Chunks staged by an interrupted run are merged first
+        merged = sum(self.merge(symbol) for symbol in self.symbols)
+        downloaded = 0
+        failed = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(self.download_chunk, symbol, chunk): (symbol, chunk) for symbol, chunk in jobs}
+            for done, future in enumerate(as_completed(futures), 1):
+                symbol, chunk = futures[future]
+                try:
+                    downloaded += future.result()
+                except Exception as e:
+                    print(f"Error downloading {symbol} from {chunk[0]:%Y-%m-%d}: {e}")
+                    failed.append((symbol, chunk[0]))
+                    continue
+                merged += self.merge(symbol)
+                if done % 50 == 0 or done == len(jobs):
+                    print(f"{done}/{len(jobs)} chunks, {downloaded} bars downloaded, "
+                          f"{time.perf_counter() - start:.1f}s")
+
+        if failed:
+            print(f"{len(failed)} chunks failed, run the backfill again to resume.")
+        return {
+            'chunks': len(jobs),
+            'bars_downloaded': downloaded,
+            'bars_added': merged,
+            'failed': failed,
+            'seconds': time.perf_counter() - start,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill deep bar history from Alpaca into the local bar cache.")
+    parser.add_argument('--symbols', required=True, help="Comma-separated symbols.")
+    parser.add_argument('--start', required=True, help="First date, e.g. 2020-01-01.")
+    parser.add_argument('--end', default=None, help="End date, exclusive (default is now).")
+    parser.add_argument('--interval', default='minute', choices=list(TIMEFRAMES))
+    parser.add_argument('--chunk-days', type=int, default=7)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--rate-limit', type=int, default=200, help="Requests per minute (0 for no throttling).")
+    parser.add_argument('--url', default=DATA_URL,
+                        help="Market data API, e.g. http://127.0.0.1:8766 for utils/fake_data_api.py.")
+    parser.add_argument('--feed', default=None, choices=['iex', 'sip'])
+    parser.add_argument('--cache-dir', default='data_cache')
+    args = parser.parse_args()
+
+    symbols = [symbol.strip() for symbol in args.symbols.split(',') if symbol.strip()]
+    end = args.end or pd.Timestamp.now('UTC').floor('min')
+    backfill = Backfill(symbols, args.start, end, interval=args.interval, cache=BarCache(args.cache_dir),
+                        chunk_days=args.chunk_days, max_workers=args.workers, rate_limit=args.rate_limit or None,
+                        base_url=args.url, feed=args.feed)
+    result = backfill.run()
+    print(f"Downloaded {result['bars_downloaded']} bars ({result['bars_added']} new) in {result['seconds']:.1f}s.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import numpy as np
+import pandas as pd
+
+from utils.bar_cache import COLUMNS, DTYPES, to_epoch_ns
+
+# Alpaca's raw bar fields, by BarCache column name
+FIELDS = {'t': 'timestamp', 'o': 'open', 'h': 'high', 'l': 'low', 'c': 'close', 'v': 'volume', 'n': 'trade_count',
+          'vw': 'vwap'}
+
+
+def parse_bar_times(values):
+    """
+    Convert bar timestamps (RFC 3339 strings in UTC, as the REST API returns them) to int64 epoch nanoseconds.
+    """
+    values = list(values)
+    if values and all(isinstance(value, str) and value.endswith('Z') for value in values):
+        # NumPy parses naive ISO strings directly, much cheaper than building a DatetimeIndex
+        return np.array([value[:-1] for value in values], dtype='datetime64[ns]').view(np.int64)
+    return to_epoch_ns(pd.to_datetime(values, utc=True))
+
+
+def bar_columns(bars):
+    """
+    Convert raw bar dicts (REST raw=True responses or stream messages) to column arrays.
+
+    Returns:
+    - dict of column name -> 1-D array in BarCache dtypes (missing fields are NaN).
+    """
+    columns = {'timestamp': parse_bar_times(bar['t'] for bar in bars)}
+    for field, column in FIELDS.items():
+        if column != 'timestamp':
+            columns[column] = np.fromiter((bar.get(field, np.nan) for bar in bars), dtype=DTYPES[column],
+                                          count=len(bars))
+    return columns
+
+
+class BarBuffer:
+    """
+    The most recent `capacity` bars of one symbol as preallocated NumPy columns.
+
+    Storage is struct-of-arrays (int64 epoch-nanosecond timestamps, float64 prices
+    and volumes) with room for twice the capacity: bars are appended in place and,
+    when the end is reached, the newest `capacity` rows are moved back to the front
+    once. Every column is therefore always one contiguous, chronological slice, and
+    indicators read it as a view (buffer['close']) with no copy and no allocation
+    per bar. A DataFrame is only built on request (to_frame).
+    """
+
+    def __init__(self, capacity=500, columns=COLUMNS):
+        """
+        Parameters:
+        - capacity: int, the number of most recent bars kept.
+        - columns: sequence of column names to keep, must include 'timestamp'.
+        """
+        self.capacity = capacity
+        self.columns = tuple(columns)
+        self._data = {column: np.zeros(2 * capacity, dtype=DTYPES[column]) for column in self.columns}
+        self._start = 0
+        self._end = 0
+
+    def __len__(self):
+        return self._end - self._start
+
+    def __getitem__(self, column):
+        """
+        Read-only view of a column, oldest bar first.
+        """
+        view = self._data[column][self._start:self._end]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def last_timestamp(self):
+        return int(self._data['timestamp'][self._end - 1]) if len(self) else None
+
+    def _reserve(self, n):
+        # Keep the newest capacity - n rows and move them to the front when the tail is full
+        if self._end + n <= len(self._data['timestamp']):
+            return
+        keep = max(0, min(len(self), self.capacity - n))
+        for values in self._data.values():
+            values[:keep] = values[self._end - keep:self._end]
+        self._start, self._end = 0, keep
+
+    def append(self, timestamp, **values):
+        """
+        Append one bar if it is newer than the last one.
+
+        Parameters:
+        - timestamp: int, epoch nanoseconds.
+        - values: column name -> value (e.g., close=101.5), missing columns are NaN.
+
+        Returns:
+        - bool, whether the bar was added.
+        """
+        if len(self) and timestamp <= self._data['timestamp'][self._end - 1]:
+            return False
+        self._reserve(1)
+        for column, column_values in self._data.items():
+            column_values[self._end] = timestamp if column == 'timestamp' else values.get(column, np.nan)
+        self._end += 1
+        self._start = max(self._start, self._end - self.capacity)
+        return True
+
+    def extend(self, columns):
+        """
+        Append the bars newer than the last one, e.g. a fetched page.
+
+        Parameters:
+        - columns: dict of column name -> 1-D array, sorted by 'timestamp' (epoch nanoseconds).
+
+        Returns:
+        - int, the number of bars added (they are the last ones in the buffer). Of a page longer than
+          the capacity only the newest `capacity` bars are kept.
+        """
+        timestamps = np.asarray(columns['timestamp'], dtype=np.int64)
+        first = 0
+        if len(self):
+            first = int(np.searchsorted(timestamps, self._data['timestamp'][self._end - 1], side='right'))
+        n = len(timestamps) - first
+        if n <= 0:
+            return 0
+        # Only the newest capacity bars of a long page can be kept
+        skip = max(0, n - self.capacity)
+        first, n = first + skip, n - skip
+        self._reserve(n)
+        for column, values in self._data.items():
+            if column in columns:
+                values[self._end:self._end + n] = np.asarray(columns[column])[first:]
+            else:
+                values[self._end:self._end + n] = np.nan
+        self._end += n
+        self._start = max(self._start, self._end - self.capacity)
+        return n
+
+    def tail(self, n):
+        """
+        Views of the newest n bars of every column.
+        """
+        start = max(self._start, self._end - n)
+        return {column: values[start:self._end] for column, values in self._data.items()}
+
+    def to_frame(self, limit=None):
+        """
+        Return the newest `limit` bars (all if None) as a DataFrame indexed in market time, like BarCache.to_frame.
+        """
+        columns = self.tail(len(self) if limit is None else limit)
+        index = pd.to_datetime(columns.pop('timestamp'), utc=True).tz_convert('America/New_York')
+        data = pd.DataFrame({column: values.copy() for column, values in columns.items()}, index=index)
+        data.index.name = 'timestamp'
+        return data
+
+    @property
+    def nbytes(self):
+        return sum(values.nbytes for values in self._data.values())
@@ -0,0 +1,253 @@
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ('timestamp', 'open', 'high', 'low', 'close', 'volume', 'trade_count', 'vwap')
+DTYPES = {column: np.float64 for column in COLUMNS}
+DTYPES['timestamp'] = np.int64  # Epoch nanoseconds, UTC
+
+
+def to_epoch_ns(index):
+    """
+    Convert a DatetimeIndex (tz-aware or UTC-naive) to int64 epoch nanoseconds, whatever its resolution.
+    """
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_convert(None)
+    return index.to_numpy(dtype='datetime64[ns]').view(np.int64)
+
+
+class BarCache:
+    """
+    On-disk bar cache keyed by symbol and interval.
+
+    Each (symbol, interval) is a directory holding one raw column file per
+    field plus a small meta.json with the row count. Columns are
+    appended in place and read back as read-only np.memmap arrays, so readers
+    never copy the history and top-ups only write the new rows.
+    """
+
+    def __init__(self, root='data_cache', max_bytes=2 * 1024 ** 3, offline=False):
+        """
+        Parameters:
+        - root: str, directory holding the cache.
+        - max_bytes: int, total cache size above which least recently updated entries are evicted.
+        - offline: bool, never touch the network, serve only what is cached.
+        """
+        self.root = root
+        self.max_bytes = max_bytes
+        self.offline = offline
+
+    def _dir(self, symbol, interval):
+        return os.path.join(self.root, symbol.upper(), interval)
+
+    def _read_meta(self, path):
+        try:
+            with open(os.path.join(path, 'meta.json')) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_meta(self, path, meta):
+        tmp_path = os.path.join(path, 'meta.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(path, 'meta.json'))
+
+    def _touch(self, path, meta):
+        meta['last_access'] = time.time()
+        self._write_meta(path, meta)
+
+    def rows(self, symbol, interval):
+        """
+        Number of cached bars (0 if nothing is cached).
+        """
+        meta = self._read_meta(self._dir(symbol, interval))
+        return 0 if meta is None else meta['rows']
+
+    def last_timestamp(self, symbol, interval):
+        """
+        Timestamp (epoch nanoseconds) of the newest cached bar, or None.
+        """
+        meta = self._read_meta(self._dir(symbol, interval))
+        if meta is None or meta['rows'] == 0:
+            return None
+        return meta['last_timestamp']
+
+    def history_exhausted(self, symbol, interval):
+        """
+        Whether the source has no bars older than the first cached one (set by mark_history_exhausted).
+        """
+        meta = self._read_meta(self._dir(symbol, interval))
+        return meta is not None and meta.get('history_exhausted', False)
+
+    def mark_history_exhausted(self, symbol, interval):
+        """
+        Record that the source has no bars older than the first cached one, so backfills stop.
+        """
+        path = self._dir(symbol, interval)
+        meta = self._read_meta(path)
+        if meta is not None:
+            meta['history_exhausted'] = True
+            self._write_meta(path, meta)
+
+    def read(self, symbol, interval):
+        """
+        Memory-map the cached columns without copying.
+
+        Returns:
+        - dict of column name -> read-only np.memmap, or None if nothing is cached.
+        """
+        path = self._dir(symbol, interval)
+        meta = self._read_meta(path)
+        if meta is None or meta['rows'] == 0:
+            return None
+        return {
+            column: np.memmap(os.path.join(path, f"{column}.bin"), dtype=DTYPES[column], mode='r',
+                              shape=(meta['rows'],))
+            for column in COLUMNS
+        }
+
+    def append(self, symbol, interval, columns):
+        """
+        Append bars newer than the last cached one.
+
+        Parameters:
+        - columns: dict of column name -> 1-D array, sorted by 'timestamp' (epoch nanoseconds).
+          Missing price/volume columns are stored as NaN.
+
+        Returns:
+        - int, the number of rows appended.
+        """
+        path = self._dir(symbol, interval)
+        os.makedirs(path, exist_ok=True)
+        meta = self._read_meta(path) or {'rows': 0, 'last_timestamp': None}
+
+        timestamps = np.asarray(columns['timestamp'], dtype=np.int64)
+        keep = slice(None)
+        if meta['last_timestamp'] is not None:
+            keep = timestamps > meta['last_timestamp']
+        timestamps = timestamps[keep]
+        if len(timestamps) == 0:
+            return 0
+
+        for column in COLUMNS:
+            if column == 'timestamp':
+                values = timestamps
+            elif column in columns:
+                values = np.asarray(columns[column], dtype=DTYPES[column])[keep]
+            else:
+                values = np.full(len(timestamps), np.nan)
+            file_path = os.path.join(path, f"{column}.bin")
+            with open(file_path, 'ab') as f:
+                # Drop rows left behind by an append that never reached the meta update
+                f.truncate(meta['rows'] * np.dtype(DTYPES[column]).itemsize)
+                f.write(np.ascontiguousarray(values, dtype=DTYPES[column]).tobytes())
+
+        meta['rows'] += len(timestamps)
+        meta['last_timestamp'] = int(timestamps[-1])
+        self._touch(path, meta)
+        self.evict(keep=path)
+        return len(timestamps)
+
+    def prepend(self, symbol, interval, columns):
+        """
+        Prepend bars older than the first cached one (backfills history a cold fetch did not cover).
+
+        Unlike append this rewrites the column files, so it is meant for the occasional backfill only.
+        Readers still holding the old memmaps keep seeing the old files.
+
+        Parameters:
+        - columns: dict of column name -> 1-D array, sorted by 'timestamp' (epoch nanoseconds).
+          Missing price/volume columns are stored as NaN.
+
+        Returns:
+        - int, the number of rows prepended.
+        """
+        cached = self.read(symbol, interval)
+        if cached is None:
+            return self.append(symbol, interval, columns)
+        path = self._dir(symbol, interval)
+        meta = self._read_meta(path)
+
+        timestamps = np.asarray(columns['timestamp'], dtype=np.int64)
+        keep = timestamps < cached['timestamp'][0]
+        timestamps = timestamps[keep]
+        if len(timestamps) == 0:
+            return 0
+
+        # Write every new column first and swap them in only once all of them are complete
+        for column in COLUMNS:
+            if column == 'timestamp':
+                values = timestamps
+            elif column in columns:
+                values = np.asarray(columns[column], dtype=DTYPES[column])[keep]
+            else:
+                values = np.full(len(timestamps), np.nan)
+            with open(os.path.join(path, f"{column}.bin.tmp"), 'wb') as f:
+                f.write(np.ascontiguousarray(values, dtype=DTYPES[column]).tobytes())
+                f.write(np.ascontiguousarray(cached[column]).tobytes())
+        del cached
+        for column in COLUMNS:
+            os.replace(os.path.join(path, f"{column}.bin.tmp"), os.path.join(path, f"{column}.bin"))
+
+        meta['rows'] += len(timestamps)
+        self._touch(path, meta)
+        self.evict(keep=path)
+        return len(timestamps)
+
+    def to_frame(self, symbol, interval, limit=None):
+        """
+        Return the newest `limit` cached bars (all if None) as a DataFrame indexed in market time.
+        """
+        columns = self.read(symbol, interval)
+        if columns is None:
+            return pd.DataFrame()
+        start = 0 if limit is None else max(0, len(columns['timestamp']) - limit)
+        index = pd.to_datetime(np.asarray(columns['timestamp'][start:]), utc=True).tz_convert('America/New_York')
+        data = pd.DataFrame({column: np.array(columns[column][start:]) for column in COLUMNS[1:]}, index=index)
+        data.index.name = 'timestamp'
+        return data
+
+    def entries(self):
+        """
+        List cached entries as (path, size_in_bytes, last_access).
+        """
+        found = []
+        if not os.path.isdir(self.root):
+            return found
+        for symbol in os.listdir(self.root):
+            symbol_dir = os.path.join(self.root, symbol)
+            if not os.path.isdir(symbol_dir):
+                continue
+            for interval in os.listdir(symbol_dir):
+                path = os.path.join(symbol_dir, interval)
+                meta = self._read_meta(path)
+                if meta is None:
+                    continue
+                size = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+                found.append((path, size, meta.get('last_access', 0)))
+        return found
+
+    def evict(self, keep=None):
+        """
+        Delete least recently updated entries until the cache fits in max_bytes.
+
+        Parameters:
+        - keep: str, an entry path that must not be evicted (e.g., the one just written).
+        """
+        entries = sorted(self.entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            for name in os.listdir(path):
+                os.remove(os.path.join(path, name))
+            os.rmdir(path)
+            total -= size
+            print(f"Evicted {path} from the bar cache ({size} bytes).")
@@ -0,0 +1,224 @@
+import argparse
+import json
+import threading
+import time
+import zlib
+from collections import deque
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from utils.bar_cache import to_epoch_ns
+
+MARKET_TZ = 'America/New_York'
+TIMEFRAME_SECONDS = {'1Min': 60, '15Min': 900, '1Hour': 3600, '1Day': 86400}
+
+
+def _session_bars(symbol, day, step, seed):
+    """
+    Deterministic bars of one regular session: the same symbol, day and seed always give the same bars.
+
+    Returns:
+    - dict of Alpaca bar field -> NumPy array.
+    """
+    opening = pd.Timestamp(f"{day} 09:30", tz=MARKET_TZ)
+    if step >= 86400:
+        # Daily bars are stamped at midnight market time, like Alpaca's
+        timestamps = to_epoch_ns(pd.DatetimeIndex([pd.Timestamp(day, tz=MARKET_TZ)]))
+    else:
+        timestamps = to_epoch_ns(pd.date_range(opening, opening + pd.Timedelta(hours=6.5), freq=f"{step}s",
+                                               inclusive='left'))
+    rng = np.random.default_rng([seed, zlib.crc32(symbol.encode()), pd.Timestamp(day).toordinal()])
+    n = len(timestamps)
+    base = 50 + zlib.crc32(symbol.encode()) % 450
+    close = base * np.exp(rng.normal(0, 0.02) + np.cumsum(rng.normal(0, 0.001, n)))
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.0005, n)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.0005, n)))
+    volume = rng.integers(100, 10000, n)
+    return {'t': timestamps, 'o': open_, 'h': high, 'l': low, 'c': close, 'v': volume,
+            'n': rng.integers(1, 100, n), 'vw': (high + low + close) / 3}
+
+
+class FakeDataAPI:
+    """
+    Local stand-in for Alpaca's historical bars endpoint (GET /v2/stocks/{symbol}/bars).
+
+    Serves deterministic synthetic bars for regular weekday sessions, paginated with
+    next_page_token like the real service, with Alpaca's X-RateLimit-* headers and
+    HTTP 429 once more than rate_limit requests arrive within a minute. Used to run
+    the backfill downloader offline.
+    """
+
+    def __init__(self, host='127.0.0.1', port=8766, seed=0, rate_limit=None, latency=0.0, fail_every=0):
+        """
+        Parameters:
+        - host: str, interface to listen on.
+        - port: int, port to listen on (0 picks a free port).
+        - seed: int, random seed for the synthetic bars.
+        - rate_limit: int, requests allowed per minute (None for no limit).
+        - latency: float, seconds added to every response.
+        - fail_every: int, answer every n-th request with HTTP 500 (0 never does).
+        """
+        self.host = host
+        self.port = port
+        self.seed = seed
+        self.rate_limit = rate_limit
+        self.latency = latency
+        self.fail_every = fail_every
+        self.requests = 0
+        self._recent = deque()
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    def bars(self, symbol, timeframe, start, end, limit, page_token=None):
+        """
+        One page of bars in [start, end), starting at page_token (an epoch-nanosecond timestamp) if given.
+
+        Returns:
+        - (list of bar dicts, next_page_token or None)
+        """
+        step = TIMEFRAME_SECONDS[timeframe]
+        if page_token is not None:
+            start = pd.Timestamp(int(page_token), tz='UTC')
+        first_day = start.tz_convert(MARKET_TZ).date()
+        last_day = end.tz_convert(MARKET_TZ).date()
+        start_ns, end_ns = start.value, end.value
+
+        page = []
+        for day in pd.bdate_range(first_day, last_day):
+            bars = _session_bars(symbol, day.strftime('%Y-%m-%d'), step, self.seed)
+            rows = np.flatnonzero((bars['t'] >= start_ns) & (bars['t'] < end_ns))
+            for i in rows.tolist():
+                if len(page) == limit:
+                    return page, str(int(bars['t'][i]))
+                timestamp = datetime.fromtimestamp(bars['t'][i] / 1e9, tz=timezone.utc)
+                page.append({
+                    't': timestamp.isoformat().replace('+00:00', 'Z'),
+                    'o': round(float(bars['o'][i]), 2), 'h': round(float(bars['h'][i]), 2),
+                    'l': round(float(bars['l'][i]), 2), 'c': round(float(bars['c'][i]), 2),
+                    'v': int(bars['v'][i]), 'n': int(bars['n'][i]), 'vw': round(float(bars['vw'][i]), 4),
+                })
+        return page, None
+
+    def _admit(self):
+        # Sliding one-minute window, returns (allowed, remaining, reset epoch seconds, request number)
+        now = time.time()
+        with self._lock:
+            self.requests += 1
+            count = self.requests
+            while self._recent and self._recent[0] <= now - 60:
+                self._recent.popleft()
+            if self.rate_limit is None:
+                return True, None, None, count
+            reset = int((self._recent[0] if self._recent else now) + 60) + 1
+            if len(self._recent) >= self.rate_limit:
+                return False, 0, reset, count
+            self._recent.append(now)
+            return True, self.rate_limit - len(self._recent), reset, count
+
+    def _handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _reply(self, status, payload, headers=()):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in headers:
+                    self.send_header(name, str(value))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                parts = url.path.strip('/').split('/')
+                if len(parts) != 4 or parts[:2] != ['v2', 'stocks'] or parts[3] != 'bars':
+                    self._reply(404, {'message': 'not found'})
+                    return
+
+                if api.latency:
+                    time.sleep(api.latency)
+                allowed, remaining, reset, count = api._admit()
+                headers = []
+                if api.rate_limit is not None:
+                    headers = [('X-RateLimit-Limit', api.rate_limit), ('X-RateLimit-Remaining', remaining),
+                               ('X-RateLimit-Reset', reset)]
+                if not allowed:
+                    self._reply(429, {'message': 'too many requests.'}, headers)
+                    return
+                if api.fail_every and count % api.fail_every == 0:
+                    self._reply(500, {'message': 'internal server error'}, headers)
+                    return
+
+                query = {name: values[0] for name, values in parse_qs(url.query).items()}
+                try:
+                    timeframe = query.get('timeframe', '1Min')
+                    start = pd.Timestamp(query['start']).tz_convert('UTC')
+                    end = pd.Timestamp(query['end']).tz_convert('UTC') if 'end' in query else pd.Timestamp.now('UTC')
+                    limit = min(int(query.get('limit', 1000)), 10000)
+                    bars, token = api.bars(parts[2].upper(), timeframe, start, end, limit, query.get('page_token'))
+                except (KeyError, ValueError) as e:
+                    self._reply(422, {'message': f"invalid request: {e}"}, headers)
+                    return
+                self._reply(200, {'bars': bars, 'symbol': parts[2].upper(), 'next_page_token': token}, headers)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        """
+        Serve on a background thread and return the base URL once listening.
+        """
+        self._server = ThreadingHTTPServer((self.host, self.port), self._handler())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        """
+        Stop a server started with start().
+        """
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join(timeout=5)
+            self._server = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve synthetic Alpaca historical bars over local HTTP.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--rate-limit', type=int, default=None, help="Requests allowed per minute.")
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every response.")
+    args = parser.parse_args()
+
+    server = FakeDataAPI(args.host, args.port, seed=args.seed, rate_limit=args.rate_limit, latency=args.latency)
+    print(f"Fake data API listening on {server.start()}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+        print("Fake data API stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from datetime import datetime, timezone
+
+import msgpack
+import websockets
+
+
+def synthetic_bars(symbols, start_price=100.0, volatility=0.002, start_ns=None, step_ns=60_000_000_000,
+                   seed=0):
+    """
+    Generate an endless, deterministic sequence of one-minute bar messages for each symbol.
+
+    Parameters:
+    - symbols: list of str, the symbols to generate bars for.
+    - start_price: float, the first close of every symbol.
+    - volatility: float, standard deviation of the per-bar log return.
+    - start_ns: int, timestamp of the first bar in epoch nanoseconds (default is the current minute).
+    - step_ns: int, spacing between bar timestamps in nanoseconds.
+    - seed: int, random seed.
+
+    Yields:
+    - list of bar dicts (one per symbol) in Alpaca's stream message layout.
+    """
+    rng = random.Random(seed)
+    if start_ns is None:
+        start_ns = int(time.time() // 60 * 60) * 1_000_000_000
+    prices = {symbol: start_price for symbol in symbols}
+    timestamp = start_ns
+    while True:
+        batch = []
+        for symbol in symbols:
+            open_price = prices[symbol]
+            close = open_price * (1 + rng.gauss(0, volatility))
+            high = max(open_price, close) * (1 + abs(rng.gauss(0, volatility / 2)))
+            low = min(open_price, close) * (1 - abs(rng.gauss(0, volatility / 2)))
+            prices[symbol] = close
+            batch.append({
+                'T': 'b', 'S': symbol, 't': timestamp,
+                'o': round(open_price, 2), 'h': round(high, 2), 'l': round(low, 2), 'c': round(close, 2),
+                'v': rng.randint(100, 10000), 'n': rng.randint(1, 100), 'vw': round((high + low + close) / 3, 2),
+            })
+        yield batch
+        timestamp += step_ns
+
+
+class FakeBarStream:
+    """
+    Local stand-in for Alpaca's market data websocket (wss://stream.data.alpaca.markets/v2/<feed>).
+
+    Speaks the same connect/auth/subscribe handshake as the real service and pushes
+    bar messages for the subscribed symbols, so the streaming trader can be exercised
+    offline with alpaca_trade_api's Stream pointed at ws://host:port.
+    """
+
+    def __init__(self, host='127.0.0.1', port=8765, bar_interval=1.0, bars=None, seed=0):
+        """
+        Parameters:
+        - host: str, interface to listen on.
+        - port: int, port to listen on (0 picks a free port).
+        - bar_interval: float, real seconds between bar batches.
+        - bars: optional iterable of bar batches (lists of bar dicts) to replay instead of synthetic bars.
+        - seed: int, random seed for synthetic bars.
+        """
+        self.host = host
+        self.port = port
+        self.bar_interval = bar_interval
+        self.bars = bars
+        self.seed = seed
+        self._server = None
+        self._loop = None
+        self._thread = None
+
+    @staticmethod
+    def _encode(messages, binary):
+        if binary:
+            packed = []
+            for msg in messages:
+                msg = dict(msg)
+                if isinstance(msg.get('t'), int):
+                    msg['t'] = msgpack.Timestamp.from_unix_nano(msg['t'])
+                packed.append(msg)
+            return msgpack.packb(packed)
+
+        encoded = []
+        for msg in messages:
+            msg = dict(msg)
+            if isinstance(msg.get('t'), int):
+                msg['t'] = datetime.fromtimestamp(msg['t'] / 1e9, tz=timezone.utc).isoformat().replace('+00:00', 'Z')
+            encoded.append(msg)
+        return json.dumps(encoded)
+
+    @staticmethod
+    def _decode(raw):
+        if isinstance(raw, bytes):
+            return msgpack.unpackb(raw), True
+        return json.loads(raw), False
+
+    async def _handle(self, websocket, path=None):
+        await websocket.send(msgpack.packb([{'T': 'success', 'msg': 'connected'}]))
+
+        request, binary = self._decode(await websocket.recv())
+        if request.get('action') != 'auth':
+            await websocket.send(self._encode([{'T': 'error', 'code': 401, 'msg': 'not authenticated'}], binary))
+            return
+        await websocket.send(self._encode([{'T': 'success', 'msg': 'authenticated'}], binary))
+
+        subscribed = set()
+
+        async def read_subscriptions():
+            async for raw in websocket:
+                request, is_binary = self._decode(raw)
+                if request.get('action') == 'subscribe':
+                    subscribed.update(request.get('bars', []))
+                elif request.get('action') == 'unsubscribe':
+                    subscribed.difference_update(request.get('bars', []))
+                await websocket.send(self._encode(
+                    [{'T': 'subscription', 'trades': [], 'quotes': [], 'bars': sorted(subscribed)}], is_binary))
+
+        reader = asyncio.ensure_future(read_subscriptions())
+        try:
+            while not subscribed:
+                if reader.done():
+                    return
+                await asyncio.sleep(0.01)
+
+            source = self.bars
+            if source is None:
+                source = synthetic_bars(sorted(subscribed), seed=self.seed)
+            for batch in source:
+                messages = [bar for bar in batch if bar['S'] in subscribed or '*' in subscribed]
+                if messages:
+                    await websocket.send(self._encode(messages, binary))
+                await asyncio.sleep(self.bar_interval)
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            reader.cancel()
+
+    async def serve_forever(self):
+        """
+        Serve until cancelled.
+        """
+        async with websockets.serve(self._handle, self.host, self.port) as server:
+            self._server = server
+            self.port = server.sockets[0].getsockname()[1]
+            await asyncio.Future()
+
+    def start(self):
+        """
+        Run the server on a background thread and return its ws:// URL once listening.
+        """
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._server = self._loop.run_until_complete(websockets.serve(self._handle, self.host, self.port))
+            self.port = self._server.sockets[0].getsockname()[1]
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self.url
+
+    def stop(self):
+        """
+        Stop a server started with start().
+        """
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+            self._loop = None
+
+    @property
+    def url(self):
+        # Stream() appends '/v2/<feed>' and swaps http for ws, the path is ignored here
+        return f"http://{self.host}:{self.port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve synthetic Alpaca bar messages over a local websocket.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--bar-interval', type=float, default=1.0, help="Real seconds between bars.")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    server = FakeBarStream(args.host, args.port, bar_interval=args.bar_interval, seed=args.seed)
+    print(f"Fake bar stream listening on ws://{args.host}:{args.port}")
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("Fake bar stream stopped.")
+
+
+if __name__ == "__main__":
+    main()
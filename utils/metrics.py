@@ -0,0 +1,210 @@
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Latency buckets in seconds, from sub-millisecond indicator updates to slow fills
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ''
+    escaped = [(name, value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')) for name, value in pairs]
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+class Histogram:
+    """
+    Fixed-bucket latency histogram (Prometheus layout: cumulative bucket counts, sum and count).
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """
+        Estimate a quantile by linear interpolation within its bucket.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / count, self.max)
+            seen += count
+        return self.max
+
+
+class Metrics:
+    """
+    In-process registry of stage latencies, counters and gauges for the live loop.
+
+    Stage timings (fetch, indicator, risk, submit, fill, ...) go into one histogram
+    per stage and label set. Recording is a perf_counter read, a bisect and a few
+    additions under a lock, cheap enough for every bar. The registry is exported in
+    the Prometheus text format, over HTTP (serve) or to a file (write) for
+    node_exporter's textfile collector or offline inspection.
+    """
+
+    def __init__(self, namespace='trading', buckets=DEFAULT_BUCKETS):
+        """
+        Parameters:
+        - namespace: str, prefix of every exported metric name.
+        - buckets: sequence of float, the histogram bucket upper bounds in seconds.
+        """
+        self.namespace = namespace
+        self.buckets = tuple(buckets)
+        self.stages = {}  # (stage, label key) -> Histogram
+        self.counters = {}  # (name, label key) -> float
+        self.gauges = {}  # (name, label key) -> float
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds, **labels):
+        """
+        Record one duration (in seconds) for a stage.
+        """
+        key = (stage, _label_key(labels))
+        with self._lock:
+            histogram = self.stages.get(key)
+            if histogram is None:
+                histogram = self.stages[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    @contextmanager
+    def span(self, stage, **labels):
+        """
+        Time the enclosed block as one observation of `stage`, also when it raises.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, **labels)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self.gauges[(name, _label_key(labels))] = value
+
+    def summary(self):
+        """
+        Per-stage count, mean, p50, p95 and max latency in seconds (labels joined into the key).
+
+        Returns:
+        - dict of stage -> dict.
+        """
+        with self._lock:
+            items = [(stage, key, histogram) for (stage, key), histogram in self.stages.items()]
+            result = {}
+            for stage, key, histogram in sorted(items, key=lambda item: (item[0], item[1])):
+                name = stage + ''.join(f",{label}={value}" for label, value in key)
+                result[name] = {
+                    'count': histogram.count,
+                    'mean': histogram.sum / histogram.count if histogram.count else 0.0,
+                    'p50': histogram.quantile(0.5),
+                    'p95': histogram.quantile(0.95),
+                    'max': histogram.max,
+                }
+        return result
+
+    def to_prometheus(self):
+        """
+        Render every metric in the Prometheus text exposition format.
+        """
+        ns = self.namespace
+        lines = []
+        with self._lock:
+            if self.stages:
+                name = f"{ns}_stage_seconds"
+                lines += [f"# HELP {name} Live loop stage latency in seconds.", f"# TYPE {name} histogram"]
+                for (stage, key), histogram in sorted(self.stages.items()):
+                    key = (('stage', stage),) + key
+                    cumulative = 0
+                    for bound, count in zip(self.buckets + ('+Inf',), histogram.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(key + (('le', str(bound)),))} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {histogram.sum!r}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+            for kind, metrics, suffix in (('counter', self.counters, '_total'), ('gauge', self.gauges, '')):
+                for metric in sorted({name for name, _ in metrics}):
+                    name = f"{ns}_{metric}{suffix}"
+                    lines.append(f"# TYPE {name} {kind}")
+                    for (other, key), value in sorted(metrics.items()):
+                        if other == metric:
+                            lines.append(f"{name}{_format_labels(key)} {value!r}")
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """
+        Write the Prometheus text to a file, atomically so a scraper never reads half of it.
+        """
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+    def serve(self, port=9108, host='127.0.0.1'):
+        """
+        Serve the metrics at http://host:port/metrics from a background thread.
+
+        Returns:
+        - the ThreadingHTTPServer (call shutdown() to stop it).
+        """
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = metrics.to_prometheus().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def reset(self):
+        with self._lock:
+            self.stages.clear()
+            self.counters.clear()
+            self.gauges.clear()
+
+
+# Shared registry, used by the live loop, the engine and the order manager unless given another one
+METRICS = Metrics()
+